@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Body
-from typing import Optional, List
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import functools
 import io
+import json
 from pydantic import BaseModel, Field
 from app.models.schemas import EvaluationResponse, TeacherFileProcessResponse
 from app.services.preprocessing import preprocess_text
@@ -8,9 +12,16 @@ from app.services.similarity_service import calculate_semantic_similarity
 from app.services.concept_service import calculate_concept_coverage, extract_concepts_from_text
 from app.services.scoring_service import validate_weights
 from app.services.strict_scoring_service import calculate_strict_marks
-from app.services.feedback_service import generate_feedback_llm
-from app.services.ocr_service import extract_text_from_file
-from app.services.full_paper_evaluator import evaluate_full_paper
+from app.services.feedback_service import generate_feedback_llm_async
+from app.services.ocr_service import assess_ocr_quality
+from app.services.full_paper_evaluator import evaluate_full_paper, prepare_answer_key, evaluate_students_against_key
+from app.services.executor_service import run_inference
+from app.api.exams import require_exam
+from app.api.handwritten_evaluate import read_upload
+from app.services.ocr_pipeline import ocr_document
+from app.services.class_splitter import split_class_pages, validate_split_rule
+from app.services.job_service import JobProgress
+from app.config import settings
 from app.database.db import save_evaluation, get_evaluation, get_evaluations
 from datetime import datetime
 import logging
@@ -54,7 +65,7 @@ async def evaluate_answer(
         if teacherFile:
             try:
                 file_bytes = await teacherFile.read()
-                extracted_text = extract_text_from_file(file_bytes, teacherFile.content_type)
+                extracted_text = (await ocr_document(file_bytes, teacherFile.content_type))['text']
                 if extracted_text.strip():
                     teacher_answer = extracted_text
             except Exception as e:
@@ -63,7 +74,7 @@ async def evaluate_answer(
         if studentFile:
             try:
                 file_bytes = await studentFile.read()
-                extracted_text = extract_text_from_file(file_bytes, studentFile.content_type)
+                extracted_text = (await ocr_document(file_bytes, studentFile.content_type))['text']
                 if extracted_text.strip():
                     student_answer = extracted_text
             except Exception as e:
@@ -109,21 +120,23 @@ async def evaluate_answer(
         student_answer_processed = preprocess_text(student_answer)
         
         # Step 5: Calculate semantic similarity
-        semantic_similarity_score = calculate_semantic_similarity(
+        semantic_similarity_score = await run_inference(
+            calculate_semantic_similarity,
             teacher_answer_processed,
             student_answer_processed
         )
         semantic_similarity_percent = round(semantic_similarity_score * 100, 1)
         
         # Step 6: Calculate concept coverage
-        concept_data = calculate_concept_coverage(
+        # Extract required concepts from model answer for gating (reused for coverage)
+        required_concepts = extract_concepts_from_text(teacher_answer_processed, max_concepts=15)
+        concept_data = await run_inference(
+            calculate_concept_coverage,
             teacher_answer_processed,
-            student_answer_processed
+            student_answer_processed,
+            concepts=required_concepts
         )
         
-        # Extract required concepts from model answer for gating
-        required_concepts = extract_concepts_from_text(teacher_answer_processed, max_concepts=15)
-        
         # Step 7: Calculate final marks using strict scoring
         scoring_result = calculate_strict_marks(
             semantic_similarity_score,
@@ -139,7 +152,7 @@ async def evaluate_answer(
         final_marks = scoring_result['marks']
         
         # Step 8: Generate feedback
-        feedback = generate_feedback_llm(
+        feedback = await generate_feedback_llm_async(
             question=question,
             teacher_answer=teacher_answer_processed,
             student_answer=student_answer_processed,
@@ -194,7 +207,7 @@ async def evaluate_answer(
             logger.warning(f"Failed to save evaluation to database: {e}")
         
         return EvaluationResponse(**response_data)
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -215,8 +228,7 @@ async def process_teacher_file(file: UploadFile = File(...)):
         
         # Extract text based on file type
         if content_type == "application/pdf":
-            from app.services.ocr_service import extract_text_from_pdf
-            extracted_text = extract_text_from_pdf(file_bytes)
+            extracted_text = (await ocr_document(file_bytes, content_type))['text']
         elif content_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
             # Handle DOCX files
             from docx import Document
@@ -278,7 +290,7 @@ async def process_teacher_file(file: UploadFile = File(...)):
             })
         
         return TeacherFileProcessResponse(questions=questions)
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -364,8 +376,9 @@ async def submit_feedback(evaluation_id: str, feedback: dict):
 
 # Full Paper Evaluation Models
 class FullPaperEvaluationRequest(BaseModel):
-    questions: str
-    model_answers: str = Field(..., description="Model answer key text")
+    questions: Optional[str] = None
+    model_answers: Optional[str] = Field(None, description="Model answer key text")
+    exam_id: Optional[str] = Field(None, description="Compiled exam to use instead of questions and model_answers")
     student_answers: str = Field(..., description="Student answer sheet text")
     marks_per_question: float = Field(..., gt=0, description="Marks per question")
     semantic_weight: float = Field(0.5, ge=0, le=1, description="Weight for semantic similarity")
@@ -375,6 +388,99 @@ class FullPaperEvaluationRequest(BaseModel):
         protected_namespaces = ()
 
 
+async def _prepare_full_paper_request(request: FullPaperEvaluationRequest) -> Tuple[Optional[Dict], float, float]:
+    """
+    Validate a full-paper request and resolve its exam and effective weights
+    
+    Returns:
+        Tuple of (compiled exam or None, semantic weight, concept weight)
+    """
+    # Validate weights
+    if not validate_weights(request.semantic_weight, request.concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {request.semantic_weight + request.concept_weight})"
+        )
+    
+    if request.marks_per_question <= 0:
+        raise HTTPException(
+            status_code=400,
+            detail="marks_per_question must be greater than 0"
+        )
+    
+    # Validate inputs
+    key = None
+    if request.exam_id:
+        key = await require_exam(request.exam_id)
+    else:
+        if not (request.questions or "").strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Questions text cannot be empty"
+            )
+        
+        if not (request.model_answers or "").strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Model answers text cannot be empty"
+            )
+    
+    if not request.student_answers.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Student answers text cannot be empty"
+        )
+    
+    # For strict evaluation, default to 50/50 weights for balanced scoring
+    # But allow override if explicitly provided
+    if request.semantic_weight == 0.0 and request.concept_weight == 0.0:
+        # Use default 50/50 for strict evaluation
+        semantic_weight = 0.5
+        concept_weight = 0.5
+    else:
+        semantic_weight = request.semantic_weight
+        concept_weight = request.concept_weight
+        # Ensure weights sum to 1.0
+        if abs(semantic_weight + concept_weight - 1.0) > 0.01:
+            total = semantic_weight + concept_weight
+            semantic_weight = semantic_weight / total
+            concept_weight = concept_weight / total
+    
+    return key, semantic_weight, concept_weight
+
+
+async def _evaluate_full_paper_request(
+    request: FullPaperEvaluationRequest,
+    key: Optional[Dict],
+    semantic_weight: float,
+    concept_weight: float,
+    on_progress: Optional[Callable[[str, int, Dict], None]] = None
+) -> Dict:
+    """Evaluate a full-paper request (only student-side work for compiled exams)"""
+    if key is not None:
+        reports = await run_inference(
+            evaluate_students_against_key,
+            key,
+            [request.student_answers],
+            request.marks_per_question,
+            semantic_weight,
+            concept_weight,
+            on_progress=on_progress
+        )
+        return reports[0]
+    
+    return await run_inference(
+        evaluate_full_paper,
+        questions_text=request.questions,
+        model_answers_text=request.model_answers,
+        student_answers_text=request.student_answers,
+        marks_per_question=request.marks_per_question,
+        semantic_weight=semantic_weight,
+        concept_weight=concept_weight,
+        on_progress=on_progress
+    )
+
+
 @router.post("/evaluate/full-paper")
 async def evaluate_full_paper_endpoint(request: FullPaperEvaluationRequest = Body(...)):
     """
@@ -383,6 +489,7 @@ async def evaluate_full_paper_endpoint(request: FullPaperEvaluationRequest = Bod
     Accepts:
     - Full question paper text (numbered: 1. Question 2. Question...)
     - Full model answer key (numbered: 1. Answer 2. Answer...)
+    - Or an exam_id from POST /exams instead of the paper and key
     - Full student answer sheet (numbered: 1. Answer 2. Answer...)
     - Marks per question
     - Evaluation weights
@@ -392,65 +499,11 @@ async def evaluate_full_paper_endpoint(request: FullPaperEvaluationRequest = Bod
     - Question-wise detailed results with marks, similarity, feedback
     """
     try:
-        # Validate weights
-        if not validate_weights(request.semantic_weight, request.concept_weight):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Weights must sum to 1.0 (got {request.semantic_weight + request.concept_weight})"
-            )
-        
-        if request.marks_per_question <= 0:
-            raise HTTPException(
-                status_code=400,
-                detail="marks_per_question must be greater than 0"
-            )
-        
-        # Validate inputs
-        if not request.questions.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Questions text cannot be empty"
-            )
-        
-        if not request.model_answers.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Model answers text cannot be empty"
-            )
-        
-        if not request.student_answers.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Student answers text cannot be empty"
-            )
-        
-        # For strict evaluation, default to 50/50 weights for balanced scoring
-        # But allow override if explicitly provided
-        if request.semantic_weight == 0.0 and request.concept_weight == 0.0:
-            # Use default 50/50 for strict evaluation
-            semantic_weight = 0.5
-            concept_weight = 0.5
-        else:
-            semantic_weight = request.semantic_weight
-            concept_weight = request.concept_weight
-            # Ensure weights sum to 1.0
-            if abs(semantic_weight + concept_weight - 1.0) > 0.01:
-                total = semantic_weight + concept_weight
-                semantic_weight = semantic_weight / total
-                concept_weight = concept_weight / total
-        
-        # Evaluate full paper
-        result = evaluate_full_paper(
-            questions_text=request.questions,
-            model_answers_text=request.model_answers,
-            student_answers_text=request.student_answers,
-            marks_per_question=request.marks_per_question,
-            semantic_weight=semantic_weight,
-            concept_weight=concept_weight
-        )
+        key, semantic_weight, concept_weight = await _prepare_full_paper_request(request)
+        result = await _evaluate_full_paper_request(request, key, semantic_weight, concept_weight)
         
         return result
-        
+    
     except HTTPException:
         raise
     except ValueError as e:
@@ -462,3 +515,365 @@ async def evaluate_full_paper_endpoint(request: FullPaperEvaluationRequest = Bod
             detail=f"Full paper evaluation failed: {str(e)}"
         )
 
+
+
+def _sse(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/evaluate/full-paper/stream")
+async def evaluate_full_paper_stream_endpoint(request: FullPaperEvaluationRequest = Body(...)):
+    """
+    Evaluate a full question paper and stream results as server-sent events
+    
+    Takes the same body as /evaluate/full-paper. Events:
+    - question: a question's result with marks, sent as soon as it is scored
+      (feedback is null)
+    - feedback: {index, question_no, feedback} once the question's feedback
+      is generated
+    - summary: {summary} after every question is done
+    - error: {detail} if evaluation fails mid-stream
+    
+    All questions are scored after the batched model passes, before any LLM
+    feedback is requested, so marks arrive long before the full report.
+    """
+    key, semantic_weight, concept_weight = await _prepare_full_paper_request(request)
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_progress(stage: str, index: int, result: Dict):
+        if stage == 'scored':
+            event = _sse("question", {'index': index, **result})
+        else:
+            event = _sse("feedback", {
+                'index': index,
+                'question_no': result['question_no'],
+                'feedback': result['feedback']
+            })
+        loop.call_soon_threadsafe(events.put_nowait, event)
+    
+    async def evaluate():
+        try:
+            result = await _evaluate_full_paper_request(
+                request, key, semantic_weight, concept_weight, on_progress=on_progress
+            )
+            await events.put(_sse("summary", {'summary': result['summary']}))
+        except Exception as e:
+            logger.error(f"Error in streamed full paper evaluation: {e}", exc_info=True)
+            await events.put(_sse("error", {'detail': f"Full paper evaluation failed: {str(e)}"}))
+        await events.put(None)
+    
+    async def stream_events():
+        task = asyncio.create_task(evaluate())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/evaluate/full-paper/batch")
+async def evaluate_full_paper_batch_endpoint(
+    questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
+    model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of questions and model_answers"),
+    marks_per_question: float = Form(..., gt=0, description="Marks per question"),
+    semantic_weight: float = Form(0.5, ge=0, le=1, description="Weight for semantic similarity"),
+    concept_weight: float = Form(0.5, ge=0, le=1, description="Weight for concept coverage"),
+    student_answers: List[str] = Form([], description="Student answer sheet texts, one per student"),
+    student_files: List[UploadFile] = File([], description="Student answer sheet files (PDF, JPG, PNG), one per student")
+):
+    """
+    Evaluate a whole class against one question paper and answer key
+    
+    The answer key is parsed, preprocessed and embedded once (or loaded
+    from a compiled exam when exam_id is given). Students are
+    evaluated in batched passes of BULK_STUDENT_BATCH_SIZE and streamed back
+    as NDJSON, one line per student as soon as its batch finishes, followed
+    by a final line with "done": true.
+    """
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    if not exam_id:
+        if not (questions or "").strip():
+            raise HTTPException(status_code=400, detail="Questions text cannot be empty")
+        
+        if not (model_answers or "").strip():
+            raise HTTPException(status_code=400, detail="Model answers text cannot be empty")
+    
+    sources = [(f"text-{i + 1}", text, None) for i, text in enumerate(student_answers)]
+    # Uploads are read only when their batch is evaluated
+    sources += [
+        (upload.filename or f"file-{i + 1}", None, functools.partial(read_upload, upload))
+        for i, upload in enumerate(student_files)
+    ]
+    if not sources:
+        raise HTTPException(status_code=400, detail="At least one student answer sheet is required")
+    
+    if exam_id:
+        key = await require_exam(exam_id)
+    else:
+        try:
+            key = await run_inference(prepare_answer_key, questions, model_answers)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    async def stream_results():
+        async for line in iter_batch_results(key, sources, marks_per_question, semantic_weight, concept_weight):
+            yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.post("/evaluate/full-paper/handwritten/class")
+async def evaluate_class_document_endpoint(
+    questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
+    model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of questions and model_answers"),
+    marks_per_question: float = Form(..., gt=0, description="Marks per question"),
+    semantic_weight: float = Form(0.5, ge=0, le=1, description="Weight for semantic similarity"),
+    concept_weight: float = Form(0.5, ge=0, le=1, description="Weight for concept coverage"),
+    class_answer_file: UploadFile = File(..., description="The whole class's answer sheets scanned into one PDF"),
+    split_mode: str = Form("pages", description="How to find each student's pages: pages, cover or student_id"),
+    pages_per_student: Optional[int] = Form(None, ge=1, description="Pages per student (split_mode=pages)"),
+    cover_marker: Optional[str] = Form(None, description="Regex matching the text of each cover page (split_mode=cover)"),
+    student_id_pattern: Optional[str] = Form(None, description="Regex matching student-ID lines (split_mode=student_id)")
+):
+    """
+    Evaluate a whole class scanned into one PDF
+    
+    The document's pages are OCR'd in parallel and grouped into students'
+    sheets by the split rule: a fixed number of pages per student, a new
+    student at every cover page, or a new student at every student-ID line
+    (Student Name/ID, Roll No, ... unless student_id_pattern is given).
+    Each sheet is then evaluated against the shared key like
+    /evaluate/full-paper/batch and streamed back as NDJSON, with the
+    student's page numbers on every line.
+    """
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    try:
+        validate_split_rule(split_mode, pages_per_student, cover_marker, student_id_pattern)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not exam_id:
+        if not (questions or "").strip():
+            raise HTTPException(status_code=400, detail="Questions text cannot be empty")
+        
+        if not (model_answers or "").strip():
+            raise HTTPException(status_code=400, detail="Model answers text cannot be empty")
+    
+    if exam_id:
+        key = await require_exam(exam_id)
+    else:
+        try:
+            key = await run_inference(prepare_answer_key, questions, model_answers)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        sheets = await split_class_document(
+            await read_upload(class_answer_file),
+            split_mode,
+            pages_per_student,
+            cover_marker,
+            student_id_pattern
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=422, detail=f"Failed to extract text from class answer file: {str(e)}")
+    
+    async def stream_results():
+        async for line in iter_class_results(key, sheets, marks_per_question, semantic_weight, concept_weight):
+            yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+async def split_class_document(
+    file: Tuple[bytes, str],
+    split_mode: str,
+    pages_per_student: Optional[int] = None,
+    cover_marker: Optional[str] = None,
+    student_id_pattern: Optional[str] = None,
+    progress: Optional[JobProgress] = None
+) -> List[Dict]:
+    """
+    OCR a combined class document and split its pages into students' sheets
+    
+    Raises ValueError for an unsupported file, an invalid split rule or a
+    document with no student sheets, and RuntimeError if OCR failed on
+    every page.
+    """
+    ocr_result = await ocr_document(*file, progress=progress, page_text=True)
+    sheets = split_class_pages(ocr_result['pages'], split_mode, pages_per_student, cover_marker, student_id_pattern)
+    if not sheets:
+        raise ValueError("No student answer sheets found in the class document")
+    return sheets
+
+
+async def iter_class_results(
+    key: Dict,
+    sheets: List[Dict],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    progress: Optional[JobProgress] = None
+) -> AsyncIterator[Dict]:
+    """iter_batch_results for sheets split from a class document, with each student's pages"""
+    sources = [(sheet['student_id'], None, sheet) for sheet in sheets]
+    async for line in iter_batch_results(key, sources, marks_per_question, semantic_weight, concept_weight, progress):
+        if not line.get('done'):
+            sheet = sheets[line['student_index']]
+            line = {**line, 'pages': sheet['pages'], 'ocr_failed_pages': sheet['failed_pages']}
+        yield line
+
+
+async def iter_batch_results(
+    key: Dict,
+    sources: List[Tuple[str, Optional[str], Optional[Union[Tuple[bytes, str], Dict, Callable]]]],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    progress: Optional[JobProgress] = None
+) -> AsyncIterator[Dict]:
+    """
+    Evaluate students against a prepared key in batches of BULK_STUDENT_BATCH_SIZE
+    
+    Sources are (student_id, text, file) with file a (bytes, content type)
+    pair for sheets that need OCR, a coroutine function returning one
+    (read when the student's batch starts, so only one batch of uploads
+    is held in memory), or an already extracted dict with text and
+    confidence (a sheet split from a class document). Yields one dict per
+    student as soon as its batch finishes, then a final dict with
+    "done": true. If a batched pass fails, its students are evaluated
+    one at a time so only the sheets that fail are reported as failed.
+    """
+    async def _extract_sheet(file: Union[Tuple[bytes, str], Dict, Callable]):
+        if callable(file):
+            file = await file()
+        ocr_result = file if isinstance(file, dict) else await ocr_document(*file, progress=progress)
+        text = ocr_result['text']
+        if not text or not text.strip():
+            raise ValueError("Could not extract text from uploaded file")
+        assessment = assess_ocr_quality(text, ocr_result['confidence'])
+        if ocr_result.get('failed_pages'):
+            assessment['needs_warning'] = True
+            assessment['warning_reasons'].append(f"Pages {', '.join(map(str, ocr_result['failed_pages']))} could not be read")
+        return text, assessment
+    
+    completed = 0
+    failed = 0
+    batch_size = max(1, settings.BULK_STUDENT_BATCH_SIZE)
+    
+    for start in range(0, len(sources), batch_size):
+        chunk = list(enumerate(sources[start:start + batch_size], start=start))
+        
+        # Student-side text extraction (OCR runs concurrently in the process pool)
+        extracted = await asyncio.gather(
+            *[_extract_sheet(file) for _, (_, _, file) in chunk if file is not None],
+            return_exceptions=True
+        )
+        extracted = iter(extracted)
+        
+        ready = []  # (student_index, student_id, text, ocr_assessment)
+        for student_index, (student_id, text, file) in chunk:
+            if file is None:
+                ready.append((student_index, student_id, text, None))
+                continue
+            outcome = next(extracted)
+            if isinstance(outcome, Exception):
+                failed += 1
+                yield {
+                    "student_index": student_index,
+                    "student_id": student_id,
+                    "status": "failed",
+                    "error": f"Failed to extract text: {str(outcome)}"
+                }
+                continue
+            ready.append((student_index, student_id, outcome[0], outcome[1]))
+        
+        if not ready:
+            continue
+        
+        on_progress = progress.question_callback(
+            len(ready) * len(key['questions']), record_results=False
+        ) if progress else None
+        
+        async def _evaluate(students):
+            return await run_inference(
+                evaluate_students_against_key,
+                key,
+                [text for _, _, text, _ in students],
+                marks_per_question,
+                semantic_weight,
+                concept_weight,
+                ocr_quality_scores=[
+                    assessment['quality_score'] if assessment else None
+                    for _, _, _, assessment in students
+                ],
+                on_progress=on_progress
+            )
+        
+        try:
+            outcomes = await _evaluate(ready)
+        except Exception as e:
+            # Find the sheets that fail: evaluate the batch one student at a time
+            logger.error(f"Error in batch evaluation, retrying {len(ready)} students one at a time: {e}", exc_info=True)
+            outcomes = []
+            for student in ready:
+                try:
+                    outcomes.extend(await _evaluate([student]))
+                except Exception as student_error:
+                    logger.error(f"Evaluation failed for student {student[1]}: {student_error}")
+                    outcomes.append(student_error)
+        
+        for (student_index, student_id, _, assessment), report in zip(ready, outcomes):
+            if isinstance(report, Exception):
+                failed += 1
+                yield {
+                    "student_index": student_index,
+                    "student_id": student_id,
+                    "status": "failed",
+                    "error": f"Evaluation failed: {str(report)}"
+                }
+                continue
+            completed += 1
+            yield {
+                "student_index": student_index,
+                "student_id": student_id,
+                "status": "completed",
+                "is_ocr_extracted": assessment is not None,
+                "ocr_quality_score": assessment['quality_score'] if assessment else None,
+                "ocr_warning": assessment['needs_warning'] if assessment else False,
+                **report
+            }
+    
+    yield {
+        "done": True,
+        "total_students": len(sources),
+        "completed": completed,
+        "failed": failed
+    }
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException, Body
+from typing import Optional, Dict
+from pydantic import BaseModel, Field
+from app.services.exam_registry import (
+    compile_exam,
+    get_compiled_exam,
+    remember_exam,
+    is_exam_current,
+    make_exam_id,
+    exam_to_document,
+    exam_from_document,
+    exam_summary
+)
+from app.services.executor_service import run_inference
+from app.database.db import save_exam, get_exam
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["exams"])
+
+
+class ExamCreateRequest(BaseModel):
+    questions: str = Field(..., description="Question paper text (numbered: 1. Question 2. Question...)")
+    model_answers: str = Field(..., description="Model answer key text (numbered: 1. Answer 2. Answer...)")
+    title: Optional[str] = Field(None, description="Optional exam title")
+    
+    class Config:
+        protected_namespaces = ()
+
+
+async def resolve_exam(exam_id: str) -> Optional[Dict]:
+    """
+    Load a compiled exam from memory or MongoDB
+    
+    Exams compiled with different models (in memory or in MongoDB) are
+    recompiled from their stored texts and saved again.
+    """
+    key = get_compiled_exam(exam_id)
+    if key is not None and is_exam_current(key):
+        return key
+    
+    document = await get_exam(exam_id)
+    if document is not None:
+        key = exam_from_document(document)
+    elif key is None:
+        return None
+    
+    if not is_exam_current(key):
+        logger.info(f"Exam {exam_id} was compiled with other models, recompiling")
+        key = await run_inference(compile_exam, key['questions_text'], key['model_answers_text'], key['title'])
+        await save_exam(exam_to_document(key))
+    else:
+        remember_exam(key)
+    return key
+
+
+async def require_exam(exam_id: str) -> Dict:
+    """Resolve an exam or raise 404"""
+    key = await resolve_exam(exam_id)
+    if key is None:
+        raise HTTPException(status_code=404, detail=f"Exam with ID {exam_id} not found")
+    return key
+
+
+@router.post("/exams")
+async def create_exam(request: ExamCreateRequest = Body(...)):
+    """
+    Compile a question paper and answer key into a reusable exam
+    
+    The paper is parsed, model answers are preprocessed, required concepts
+    are extracted and answers and concepts are embedded once. Evaluation
+    endpoints then accept the returned exam_id and only do student-side work.
+    Identical papers and keys always compile to the same exam_id.
+    """
+    if not request.questions.strip():
+        raise HTTPException(status_code=400, detail="Questions text cannot be empty")
+    
+    if not request.model_answers.strip():
+        raise HTTPException(status_code=400, detail="Model answers text cannot be empty")
+    
+    try:
+        existing = await resolve_exam(make_exam_id(request.questions, request.model_answers))
+        if existing is not None:
+            return exam_summary(existing)
+        
+        key = await run_inference(compile_exam, request.questions, request.model_answers, request.title)
+        await save_exam(exam_to_document(key))
+        return exam_summary(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error compiling exam: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to compile exam: {str(e)}")
+
+
+@router.get("/exams/{exam_id}")
+async def get_exam_details(exam_id: str):
+    """
+    Get a compiled exam with its questions, model answers and required concepts
+    """
+    key = await require_exam(exam_id)
+    return exam_summary(key, include_questions=True)
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import Optional
-from app.services.ocr_service import extract_text_from_file, assess_ocr_quality
-from app.services.full_paper_evaluator import evaluate_full_paper
+from typing import Dict, Optional, Tuple
+from app.services.ocr_service import assess_ocr_quality
+from app.services.ocr_pipeline import ocr_document
+from app.services.full_paper_evaluator import evaluate_full_paper, evaluate_students_against_key
 from app.services.scoring_service import validate_weights
-from app.services.paper_parser import parse_full_paper
+from app.services.paper_parser import parse_paper, parse_questions_and_answers, parse_student_paper
+from app.services.answer_pipeline import AnswerSheetPipeline
+from app.api.exams import require_exam
+from app.services.executor_service import run_inference
+from app.services.job_service import JobProgress
+from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,6 +21,7 @@ router = APIRouter(tags=["handwritten-evaluation"])
 async def evaluate_handwritten_full_paper(
     questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
     model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of the question paper and answer key"),
     student_answers: Optional[str] = Form(None, description="Student answer sheet text (numbered: 1. Answer 2. Answer...)"),
     question_file: Optional[UploadFile] = File(None, description="Question paper file (PDF, JPG, PNG, TXT)"),
     model_answer_file: Optional[UploadFile] = File(None, description="Model answer key file (PDF, JPG, PNG, TXT)"),
@@ -39,179 +46,270 @@ async def evaluate_handwritten_full_paper(
     - OCR quality warnings (if applicable)
     """
     try:
-        # Step 1: Validate weights
-        if not validate_weights(semantic_weight, concept_weight):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
-            )
-        
-        # Step 2: Extract text from uploaded files (if provided)
-        questions_text = questions or ""
-        model_answers_text = model_answers or ""
-        student_answers_text = student_answers or ""
-        is_ocr_extracted = False
-        ocr_confidence = None
-        
-        # Extract questions from file if provided
-        if question_file:
-            try:
-                file_bytes = await question_file.read()
-                content_type = question_file.content_type or "application/octet-stream"
-                extracted, conf = extract_text_from_file(file_bytes, content_type, get_confidence=True)
-                if extracted.strip():
-                    questions_text = extracted
-            except Exception as e:
-                logger.warning(f"Error extracting questions from file: {e}")
-                raise HTTPException(status_code=400, detail=f"Failed to extract questions from file: {str(e)}")
-        
-        # Extract model answers from file if provided
-        if model_answer_file:
-            try:
-                file_bytes = await model_answer_file.read()
-                content_type = model_answer_file.content_type or "application/octet-stream"
-                extracted, conf = extract_text_from_file(file_bytes, content_type, get_confidence=True)
-                if extracted.strip():
-                    model_answers_text = extracted
-            except Exception as e:
-                logger.warning(f"Error extracting model answers from file: {e}")
-                raise HTTPException(status_code=400, detail=f"Failed to extract model answers from file: {str(e)}")
-        
-        # Step 3: Validate inputs
-        if not questions_text.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Questions are required (either text input or file upload)"
-            )
+        result = await run_handwritten_evaluation(
+            questions=questions,
+            model_answers=model_answers,
+            exam_id=exam_id,
+            student_answers=student_answers,
+            question_file=await read_upload(question_file),
+            model_answer_file=await read_upload(model_answer_file),
+            student_answer_sheet=await read_upload(student_answer_sheet),
+            marks_per_question=marks_per_question,
+            semantic_weight=semantic_weight,
+            concept_weight=concept_weight
+        )
+        return result
         
-        if not model_answers_text.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Model answers are required (either text input or file upload)"
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in handwritten evaluation: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Handwritten evaluation failed: {str(e)}"
+        )
+
+
+async def read_upload(upload: Optional[UploadFile]) -> Optional[Tuple[bytes, str]]:
+    """Read an optional upload into (bytes, content type)"""
+    if not upload:
+        return None
+    return await upload.read(), upload.content_type or "application/octet-stream"
+
+
+def _create_pipeline(key: Optional[Dict], questions_text: str, model_answers_text: str) -> Optional[AnswerSheetPipeline]:
+    """Pipeline for the student's sheet, or None when the key has nothing to match against"""
+    if key is not None:
+        return AnswerSheetPipeline(key['questions'], key['model_answers'], key=key)
+    questions = parse_questions_and_answers(questions_text)
+    model_answers = parse_questions_and_answers(model_answers_text)
+    if not questions or not model_answers:
+        return None  # reported by the regular parse below
+    return AnswerSheetPipeline(questions, model_answers)
+
+
+async def run_handwritten_evaluation(
+    questions: Optional[str],
+    model_answers: Optional[str],
+    exam_id: Optional[str],
+    student_answers: Optional[str],
+    question_file: Optional[Tuple[bytes, str]],
+    model_answer_file: Optional[Tuple[bytes, str]],
+    student_answer_sheet: Optional[Tuple[bytes, str]],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    progress: Optional[JobProgress] = None
+) -> Dict:
+    """
+    Handwritten full-paper evaluation shared by the endpoint and background jobs
+    
+    Files are (bytes, content type) pairs. Raises HTTPException for invalid
+    input. With a job progress tracker, OCR pages, scored questions and
+    finished feedback are reported as they complete.
+    """
+    # Step 1: Validate weights
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    # Step 2: Extract text from uploaded files (if provided)
+    key = await require_exam(exam_id) if exam_id else None
+    questions_text = key['questions_text'] if key else (questions or "")
+    model_answers_text = key['model_answers_text'] if key else (model_answers or "")
+    student_answers_text = student_answers or ""
+    is_ocr_extracted = False
+    ocr_confidence = None
+    failed_pages = []
+    page_report = []
+    
+    # Extract questions from file if provided
+    if question_file and key is None:
+        try:
+            extracted = (await ocr_document(*question_file, progress=progress))['text']
+            if extracted.strip():
+                questions_text = extracted
+        except Exception as e:
+            logger.warning(f"Error extracting questions from file: {e}")
+            raise HTTPException(status_code=400, detail=f"Failed to extract questions from file: {str(e)}")
+    
+    # Extract model answers from file if provided
+    if model_answer_file and key is None:
+        try:
+            extracted = (await ocr_document(*model_answer_file, progress=progress))['text']
+            if extracted.strip():
+                model_answers_text = extracted
+        except Exception as e:
+            logger.warning(f"Error extracting model answers from file: {e}")
+            raise HTTPException(status_code=400, detail=f"Failed to extract model answers from file: {str(e)}")
+    
+    # Step 3: Validate inputs
+    if not questions_text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Questions are required (either text input or file upload)"
+        )
+    
+    if not model_answers_text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Model answers are required (either text input or file upload)"
+        )
+    
+    # Step 4: Extract text from student answer sheet (handwritten or typed)
+    # Answers are parsed and analysed as pages come out of OCR
+    pipeline = None
+    analyses = None
+    if student_answer_sheet and settings.PIPELINED_OCR_EVALUATION:
+        pipeline = _create_pipeline(key, questions_text, model_answers_text)
+    
+    if student_answer_sheet:
+        try:
+            # Extract text with confidence scoring
+            ocr_result = await ocr_document(
+                *student_answer_sheet,
+                progress=progress,
+                on_page=pipeline.add_page if pipeline else None
             )
-        
-        # Step 4: Extract text from student answer sheet (handwritten or typed)
-        if student_answer_sheet:
-            try:
-                file_bytes = await student_answer_sheet.read()
-                content_type = student_answer_sheet.content_type or "application/octet-stream"
-                
-                # Extract text with confidence scoring
-                extracted_text, ocr_confidence = extract_text_from_file(
-                    file_bytes,
-                    content_type,
-                    get_confidence=True
-                )
-                
-                if not extracted_text or not extracted_text.strip():
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Could not extract text from uploaded file. Please ensure the file contains readable text."
-                    )
-                
-                student_answers_text = extracted_text
-                is_ocr_extracted = True
-                
-            except ValueError as e:
+            extracted_text = ocr_result['text']
+            ocr_confidence = ocr_result['confidence']
+            failed_pages = ocr_result['failed_pages']
+            page_report = ocr_result['pages']
+            
+            if not extracted_text or not extracted_text.strip():
                 raise HTTPException(
                     status_code=400,
-                    detail=f"Unsupported file type: {str(e)}. Supported formats: PDF, JPG, PNG"
+                    detail="Could not extract text from uploaded file. Please ensure the file contains readable text."
                 )
-            except Exception as e:
-                logger.error(f"OCR extraction error: {e}", exc_info=True)
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to extract text from student answer sheet: {str(e)}"
-                )
-        elif not student_answers_text.strip():
+            
+            student_answers_text = extracted_text
+            is_ocr_extracted = True
+            
+        except ValueError as e:
             raise HTTPException(
                 status_code=400,
-                detail="Student answers are required (either text input or file upload)"
+                detail=f"Unsupported file type: {str(e)}. Supported formats: PDF, JPG, PNG"
             )
-        
-        # Step 5: Assess OCR quality (if OCR was used)
-        ocr_assessment = None
-        ocr_warning = False
-        ocr_quality_score = 100.0
-        
-        if is_ocr_extracted:
-            ocr_assessment = assess_ocr_quality(student_answers_text, ocr_confidence)
-            ocr_warning = ocr_assessment['needs_warning']
-            ocr_quality_score = ocr_assessment['quality_score']
-        
-        # Step 6: Parse and match answers by number (STRICT NUMBER-BASED MATCHING)
-        try:
-            matched_pairs = parse_full_paper(
+        except Exception as e:
+            logger.error(f"OCR extraction error: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to extract text from student answer sheet: {str(e)}"
+            )
+    elif not student_answers_text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Student answers are required (either text input or file upload)"
+        )
+    
+    # Step 5: Assess OCR quality (if OCR was used)
+    ocr_assessment = None
+    ocr_warning = False
+    ocr_quality_score = 100.0
+    
+    if is_ocr_extracted:
+        ocr_assessment = assess_ocr_quality(student_answers_text, ocr_confidence)
+        if failed_pages:
+            ocr_assessment['needs_warning'] = True
+            ocr_assessment['warning_reasons'].append(f"Pages {', '.join(map(str, failed_pages))} could not be read")
+        ocr_warning = ocr_assessment['needs_warning']
+        ocr_quality_score = ocr_assessment['quality_score']
+    
+    # Step 6: Parse and match answers by number (STRICT NUMBER-BASED MATCHING)
+    # The parsed paper carries the OCR quality per question and is evaluated as-is
+    try:
+        if pipeline is not None:
+            paper, analyses = await pipeline.finish(ocr_quality_score)
+        elif key is not None:
+            paper = parse_student_paper(
+                key['questions'],
+                key['model_answers'],
+                student_answers_text,
+                ocr_quality_score=ocr_quality_score
+            )
+        else:
+            paper = parse_paper(
                 questions_text,
                 model_answers_text,
-                student_answers_text
+                student_answers_text,
+                ocr_quality_score=ocr_quality_score
             )
-            
-            if not matched_pairs:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Could not match answers to questions. Please ensure answers are numbered (1., 2., 3., etc.)"
-                )
-            
-        except Exception as e:
-            logger.error(f"Error parsing answers: {e}", exc_info=True)
+        
+        if not paper.items:
             raise HTTPException(
                 status_code=400,
-                detail=f"Failed to parse answers from extracted text: {str(e)}"
+                detail="Could not match answers to questions. Please ensure answers are numbered (1., 2., 3., etc.)"
             )
         
-        # Step 7: Evaluate full paper with OCR context
-        try:
-            result = evaluate_full_paper(
-                questions_text=questions_text,
-                model_answers_text=model_answers_text,
-                student_answers_text=student_answers_text,
+    except Exception as e:
+        logger.error(f"Error parsing answers: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to parse answers from extracted text: {str(e)}"
+        )
+    
+    # Step 7: Evaluate full paper with OCR context
+    try:
+        on_progress = progress.question_callback(len(paper)) if progress else None
+        if key is not None:
+            reports = await run_inference(
+                evaluate_students_against_key,
+                key,
+                [paper],
+                marks_per_question,
+                semantic_weight,
+                concept_weight,
+                on_progress=on_progress,
+                analyses=analyses
+            )
+            result = reports[0]
+        else:
+            result = await run_inference(
+                evaluate_full_paper,
+                questions_text=None,
+                model_answers_text=None,
+                student_answers_text=None,
                 marks_per_question=marks_per_question,
                 semantic_weight=semantic_weight,
                 concept_weight=concept_weight,
-                is_ocr_extracted=True,
-                ocr_quality_score=ocr_quality_score
-            )
-        except Exception as e:
-            logger.error(f"Error evaluating full paper: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=500,
-                detail=f"Evaluation failed: {str(e)}"
+                on_progress=on_progress,
+                paper=paper,
+                analyses=analyses
             )
-        
-        # Step 8: Add OCR warnings to response
-        result['ocr_warning'] = ocr_warning
-        result['ocr_quality_score'] = ocr_quality_score if is_ocr_extracted else None
-        result['ocr_warning_message'] = None
-        result['is_ocr_extracted'] = is_ocr_extracted
-        
-        if ocr_warning and ocr_assessment:
-            warning_message = "Handwriting clarity may affect evaluation accuracy. "
-            if ocr_assessment.get('warning_reasons'):
-                warning_message += "Reasons: " + ", ".join(ocr_assessment['warning_reasons']) + "."
-            result['ocr_warning_message'] = warning_message
-        
-        # Step 9: Add OCR context to question-wise results
-        for q_result in result.get('question_wise_results', []):
-            q_result['is_ocr_extracted'] = is_ocr_extracted
-            if is_ocr_extracted:
-                q_result['ocr_quality_score'] = ocr_quality_score
-            
-            # Add OCR-related feedback if quality is low
-            if ocr_quality_score < 70 and q_result.get('feedback'):
-                if 'weaknesses' not in q_result['feedback']:
-                    q_result['feedback']['weaknesses'] = []
-                if not any('OCR' in w for w in q_result['feedback']['weaknesses']):
-                    q_result['feedback']['weaknesses'].append("OCR extraction limitations may affect evaluation accuracy.")
-        
-        return result
-        
-    except HTTPException:
-        raise
     except Exception as e:
-        logger.error(f"Unexpected error in handwritten evaluation: {e}", exc_info=True)
+        logger.error(f"Error evaluating full paper: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
-            detail=f"Handwritten evaluation failed: {str(e)}"
+            detail=f"Evaluation failed: {str(e)}"
         )
-
+    
+    # Step 8: Add OCR warnings to response
+    result['ocr_warning'] = ocr_warning
+    result['ocr_quality_score'] = ocr_quality_score if is_ocr_extracted else None
+    result['ocr_warning_message'] = None
+    result['is_ocr_extracted'] = is_ocr_extracted
+    result['ocr_failed_pages'] = failed_pages
+    result['ocr_pages'] = page_report
+    
+    if ocr_warning and ocr_assessment:
+        warning_message = "Handwriting clarity may affect evaluation accuracy. "
+        if ocr_assessment.get('warning_reasons'):
+            warning_message += "Reasons: " + ", ".join(ocr_assessment['warning_reasons']) + "."
+        result['ocr_warning_message'] = warning_message
+    
+    # Step 9: Add OCR context to question-wise results
+    for q_result in result.get('question_wise_results', []):
+        q_result['is_ocr_extracted'] = is_ocr_extracted
+        if is_ocr_extracted:
+            q_result['ocr_quality_score'] = ocr_quality_score
+        
+        # Add OCR-related feedback if quality is low
+        if ocr_quality_score < 70 and q_result.get('feedback'):
+            if 'weaknesses' not in q_result['feedback']:
+                q_result['feedback']['weaknesses'] = []
+            if not any('OCR' in w for w in q_result['feedback']['weaknesses']):
+                q_result['feedback']['weaknesses'].append("OCR extraction limitations may affect evaluation accuracy.")
+    
+    return result
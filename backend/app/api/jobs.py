@@ -0,0 +1,306 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from typing import Dict, List, Optional
+from app.api.exams import require_exam
+from app.api.evaluate import iter_batch_results, iter_class_results, split_class_document
+from app.api.handwritten_evaluate import read_upload, run_handwritten_evaluation
+from app.services.full_paper_evaluator import prepare_answer_key
+from app.services.scoring_service import validate_weights
+from app.services.class_splitter import validate_split_rule
+from app.services.executor_service import run_inference
+from app.services.job_service import JobProgress, get_job_manager, register_job_handler
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["jobs"])
+
+
+async def _file_payload(upload: Optional[UploadFile], file_ids: List[str]) -> Optional[Dict]:
+    """
+    Store an upload with the job store and return its reference for a job payload
+
+    Payloads keep only the file ID and content type, so a class's worth of
+    PDFs never goes into the job document itself.
+    """
+    file = await read_upload(upload)
+    if not file:
+        return None
+    
+    data, content_type = file
+    try:
+        file_id = await get_job_manager().put_file(data)
+    except Exception as e:
+        logger.error(f"Error storing job upload: {e}", exc_info=True)
+        await get_job_manager().delete_files(file_ids)
+        raise HTTPException(status_code=503, detail=f"Failed to store uploaded file: {str(e)}")
+    file_ids.append(file_id)
+    return {'file_id': file_id, 'content_type': content_type}
+
+
+async def _file_from_payload(value: Optional[Dict]) -> Optional[tuple]:
+    if not value:
+        return None
+    return await get_job_manager().get_file(value['file_id']), value['content_type']
+
+
+async def _run_handwritten_job(payload: Dict, progress: JobProgress) -> Dict:
+    return await run_handwritten_evaluation(
+        questions=payload['questions'],
+        model_answers=payload['model_answers'],
+        exam_id=payload['exam_id'],
+        student_answers=payload['student_answers'],
+        question_file=await _file_from_payload(payload['question_file']),
+        model_answer_file=await _file_from_payload(payload['model_answer_file']),
+        student_answer_sheet=await _file_from_payload(payload['student_answer_sheet']),
+        marks_per_question=payload['marks_per_question'],
+        semantic_weight=payload['semantic_weight'],
+        concept_weight=payload['concept_weight'],
+        progress=progress
+    )
+
+
+async def _run_batch_job(payload: Dict, progress: JobProgress) -> Dict:
+    if payload['exam_id']:
+        key = await require_exam(payload['exam_id'])
+    else:
+        key = await run_inference(prepare_answer_key, payload['questions'], payload['model_answers'])
+    
+    sources = [
+        (source['student_id'], source['text'], functools.partial(_file_from_payload, source['file']) if source['file'] else None)
+        for source in payload['sources']
+    ]
+    progress.add_total('students', len(sources))
+    
+    students = []
+    async for line in iter_batch_results(
+        key,
+        sources,
+        payload['marks_per_question'],
+        payload['semantic_weight'],
+        payload['concept_weight'],
+        progress=progress
+    ):
+        if line.get('done'):
+            return {**line, 'students': sorted(students, key=lambda s: s['student_index'])}
+        students.append(line)
+        progress.set_partial_result(line['student_index'], line)
+        progress.advance('students')
+
+
+async def _run_class_job(payload: Dict, progress: JobProgress) -> Dict:
+    if payload['exam_id']:
+        key = await require_exam(payload['exam_id'])
+    else:
+        key = await run_inference(prepare_answer_key, payload['questions'], payload['model_answers'])
+    
+    sheets = await split_class_document(
+        await _file_from_payload(payload['class_answer_file']),
+        payload['split_mode'],
+        payload['pages_per_student'],
+        payload['cover_marker'],
+        payload['student_id_pattern'],
+        progress=progress
+    )
+    progress.add_total('students', len(sheets))
+    
+    students = []
+    async for line in iter_class_results(
+        key,
+        sheets,
+        payload['marks_per_question'],
+        payload['semantic_weight'],
+        payload['concept_weight'],
+        progress=progress
+    ):
+        if line.get('done'):
+            return {**line, 'students': sorted(students, key=lambda s: s['student_index'])}
+        students.append(line)
+        progress.set_partial_result(line['student_index'], line)
+        progress.advance('students')
+
+
+register_job_handler("handwritten", _run_handwritten_job)
+register_job_handler("batch", _run_batch_job)
+register_job_handler("class", _run_class_job)
+
+
+async def _submit(job_type: str, payload: Dict, file_ids: List[str] = ()) -> Dict:
+    try:
+        job_id = await get_job_manager().submit(job_type, payload, file_ids)
+    except Exception as e:
+        logger.error(f"Error submitting {job_type} job: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail=f"Failed to queue job: {str(e)}")
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.post("/jobs/handwritten", status_code=202)
+async def submit_handwritten_job(
+    questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
+    model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of the question paper and answer key"),
+    student_answers: Optional[str] = Form(None, description="Student answer sheet text (numbered: 1. Answer 2. Answer...)"),
+    question_file: Optional[UploadFile] = File(None, description="Question paper file (PDF, JPG, PNG, TXT)"),
+    model_answer_file: Optional[UploadFile] = File(None, description="Model answer key file (PDF, JPG, PNG, TXT)"),
+    student_answer_sheet: Optional[UploadFile] = File(None, description="Student answer sheet (PDF, JPG, PNG) - handwritten or typed"),
+    marks_per_question: float = Form(..., gt=0, description="Marks per question"),
+    semantic_weight: float = Form(0.5, ge=0, le=1, description="Weight for semantic similarity"),
+    concept_weight: float = Form(0.5, ge=0, le=1, description="Weight for concept coverage")
+):
+    """
+    Queue a handwritten full-paper evaluation
+    
+    Takes the same inputs as /evaluate/full-paper/handwritten and returns a
+    job_id immediately; poll GET /jobs/{job_id} for progress and the result.
+    """
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    if not student_answer_sheet and not (student_answers or "").strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Student answers are required (either text input or file upload)"
+        )
+    
+    file_ids = []
+    return await _submit("handwritten", {
+        'questions': questions,
+        'model_answers': model_answers,
+        'exam_id': exam_id,
+        'student_answers': student_answers,
+        'question_file': await _file_payload(question_file, file_ids),
+        'model_answer_file': await _file_payload(model_answer_file, file_ids),
+        'student_answer_sheet': await _file_payload(student_answer_sheet, file_ids),
+        'marks_per_question': marks_per_question,
+        'semantic_weight': semantic_weight,
+        'concept_weight': concept_weight
+    }, file_ids)
+
+
+@router.post("/jobs/full-paper/batch", status_code=202)
+async def submit_batch_job(
+    questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
+    model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of questions and model_answers"),
+    marks_per_question: float = Form(..., gt=0, description="Marks per question"),
+    semantic_weight: float = Form(0.5, ge=0, le=1, description="Weight for semantic similarity"),
+    concept_weight: float = Form(0.5, ge=0, le=1, description="Weight for concept coverage"),
+    student_answers: List[str] = Form([], description="Student answer sheet texts, one per student"),
+    student_files: List[UploadFile] = File([], description="Student answer sheet files (PDF, JPG, PNG), one per student")
+):
+    """
+    Queue a whole-class evaluation
+    
+    Takes the same inputs as /evaluate/full-paper/batch. Per-student results
+    appear in the job's partial_results as each batch finishes.
+    """
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    if not exam_id:
+        if not (questions or "").strip():
+            raise HTTPException(status_code=400, detail="Questions text cannot be empty")
+        
+        if not (model_answers or "").strip():
+            raise HTTPException(status_code=400, detail="Model answers text cannot be empty")
+    
+    sources = [
+        {'student_id': f"text-{i + 1}", 'text': text, 'file': None}
+        for i, text in enumerate(student_answers)
+    ]
+    if not sources and not student_files:
+        raise HTTPException(status_code=400, detail="At least one student answer sheet is required")
+    
+    file_ids = []
+    for i, upload in enumerate(student_files):
+        sources.append({
+            'student_id': upload.filename or f"file-{i + 1}",
+            'text': None,
+            'file': await _file_payload(upload, file_ids)
+        })
+    
+    return await _submit("batch", {
+        'questions': questions,
+        'model_answers': model_answers,
+        'exam_id': exam_id,
+        'sources': sources,
+        'marks_per_question': marks_per_question,
+        'semantic_weight': semantic_weight,
+        'concept_weight': concept_weight
+    }, file_ids)
+
+
+@router.post("/jobs/full-paper/handwritten/class", status_code=202)
+async def submit_class_job(
+    questions: Optional[str] = Form(None, description="Question paper text (numbered: 1. Question 2. Question...)"),
+    model_answers: Optional[str] = Form(None, description="Model answer key text (numbered: 1. Answer 2. Answer...)"),
+    exam_id: Optional[str] = Form(None, description="Compiled exam to use instead of questions and model_answers"),
+    marks_per_question: float = Form(..., gt=0, description="Marks per question"),
+    semantic_weight: float = Form(0.5, ge=0, le=1, description="Weight for semantic similarity"),
+    concept_weight: float = Form(0.5, ge=0, le=1, description="Weight for concept coverage"),
+    class_answer_file: UploadFile = File(..., description="The whole class's answer sheets scanned into one PDF"),
+    split_mode: str = Form("pages", description="How to find each student's pages: pages, cover or student_id"),
+    pages_per_student: Optional[int] = Form(None, ge=1, description="Pages per student (split_mode=pages)"),
+    cover_marker: Optional[str] = Form(None, description="Regex matching the text of each cover page (split_mode=cover)"),
+    student_id_pattern: Optional[str] = Form(None, description="Regex matching student-ID lines (split_mode=student_id)")
+):
+    """
+    Queue a whole-class evaluation of one combined PDF
+    
+    Takes the same inputs as /evaluate/full-paper/handwritten/class.
+    Per-student results appear in the job's partial_results as each batch
+    finishes.
+    """
+    if not validate_weights(semantic_weight, concept_weight):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Weights must sum to 1.0 (got {semantic_weight + concept_weight})"
+        )
+    
+    try:
+        validate_split_rule(split_mode, pages_per_student, cover_marker, student_id_pattern)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not exam_id:
+        if not (questions or "").strip():
+            raise HTTPException(status_code=400, detail="Questions text cannot be empty")
+        
+        if not (model_answers or "").strip():
+            raise HTTPException(status_code=400, detail="Model answers text cannot be empty")
+    
+    file_ids = []
+    return await _submit("class", {
+        'questions': questions,
+        'model_answers': model_answers,
+        'exam_id': exam_id,
+        'class_answer_file': await _file_payload(class_answer_file, file_ids),
+        'split_mode': split_mode,
+        'pages_per_student': pages_per_student,
+        'cover_marker': cover_marker,
+        'student_id_pattern': student_id_pattern,
+        'marks_per_question': marks_per_question,
+        'semantic_weight': semantic_weight,
+        'concept_weight': concept_weight
+    }, file_ids)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Get a job's status, per-stage progress and partial or final results
+    
+    progress maps stages (ocr_pages, questions_scored, feedback, students)
+    to done/total counts.
+    """
+    job = await get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    job.pop('heartbeat_at', None)
+    return job
@@ -11,6 +11,15 @@ class Settings(BaseSettings):
     
     # OpenAI
     OPENAI_API_KEY: str = ""
+    OPENAI_BASE_URL: str = ""  # "" uses api.openai.com; e.g. http://127.0.0.1:8001/v1 for scripts/mock_llm_server.py
+    OPENAI_MODEL: str = "gpt-3.5-turbo"
+    
+    # LLM feedback requests: in flight at once (per process), per-attempt timeout in
+    # seconds, and retries of timeouts, rate limits and 5xx with jittered backoff
+    LLM_CONCURRENCY: int = 8
+    LLM_TIMEOUT: float = 30.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
     
     # Database
     DATABASE_URL: str = ""
@@ -19,6 +28,71 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     CONCEPT_MODEL: str = "bert-base-uncased"
     
+    # Inference backend: "torch", "onnx" or "onnx-int8"
+    INFERENCE_BACKEND: str = "torch"
+    ONNX_MODEL_DIR: str = "onnx_models"
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 lets onnxruntime decide
+    
+    # Embedding cache (0 disables caching)
+    EMBEDDING_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    EMBEDDING_CACHE_FLOAT16: bool = False
+    
+    # Persistent memory-mapped embedding store ("" disables it)
+    EMBEDDING_STORE_DIR: str = "embedding_store"
+    
+    # Micro-batching of concurrent encode calls
+    BATCHING_ENABLED: bool = True
+    BATCH_MAX_SIZE: int = 64
+    BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Executors for blocking work (0 OCR workers runs OCR on inference threads)
+    INFERENCE_WORKERS: int = 4
+    OCR_WORKERS: int = 2
+    IO_WORKERS: int = 16
+    OCR_PAGE_CONCURRENCY: int = 0  # page chunks of one PDF OCR'd in parallel; 0 uses OCR_WORKERS
+    NATIVE_TEXT_MIN_CHARS: int = 20  # letters/digits for a PDF page's text layer to be used instead of OCR
+    
+    # OCR engine: "tesserocr" keeps tesseract loaded in each OCR worker, "pytesseract"
+    # runs the tesseract CLI per page, "auto" prefers tesserocr when installed
+    OCR_ENGINE: str = "auto"
+    OCR_LANG: str = "eng"
+    
+    # OCR rendering: "standard" renders PDF pages at OCR_DPI; "adaptive" preprocesses
+    # images (binarize, crop, deskew) and renders at OCR_LOW_DPI first, re-rendering at
+    # OCR_DPI only pages whose quality score is below OCR_RETRY_CONFIDENCE
+    OCR_MODE: str = "standard"
+    OCR_DPI: int = 300
+    OCR_LOW_DPI: int = 200
+    OCR_RETRY_CONFIDENCE: float = 70.0
+    
+    # Disk cache of OCR results keyed by file content and OCR settings ("" disables it)
+    OCR_CACHE_DIR: str = "ocr_cache"
+    OCR_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Parallel per-question evaluation (0 or 1 keeps the sequential path). Each worker
+    # process loads its own copy of both models at startup: with the default MiniLM and
+    # BERT-base models that is roughly 0.6-1 GB of RAM per worker on top of the API process
+    PARALLEL_QUESTION_WORKERS: int = 0
+    PARALLEL_TORCH_THREADS: int = 0  # per worker; 0 splits the cores evenly
+    
+    # Handwritten sheets: parse and analyse answers as pages come out of OCR
+    PIPELINED_OCR_EVALUATION: bool = True
+    
+    # Bulk class evaluation: students evaluated per batched pass
+    BULK_STUDENT_BATCH_SIZE: int = 8
+    
+    # Compiled exams kept in memory
+    EXAM_CACHE_SIZE: int = 64
+    
+    # Background evaluation jobs ("auto" uses MongoDB when connected, else memory;
+    # "mongo" also falls back to memory, with a warning, when MongoDB is not connected)
+    JOB_STORE: str = "auto"
+    JOB_WORKERS: int = 2  # concurrent jobs per process
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_PROGRESS_INTERVAL: float = 0.5
+    JOB_LEASE_SECONDS: float = 300.0  # requeue running jobs without a heartbeat
+    JOB_MAX_ATTEMPTS: int = 3  # claims (incl. after lease expiry) before a job is marked failed
+    
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
     
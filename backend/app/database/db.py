@@ -1,5 +1,6 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from app.config import settings
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -88,3 +89,144 @@ async def get_evaluations(limit: int = 10, skip: int = 0):
         return []
 
 
+
+
+async def save_exam(exam_document: dict):
+    """Save (or replace) a compiled exam by its exam_id"""
+    if db.database is None:
+        logger.warning("Database not connected. Skipping exam save.")
+        return None
+    
+    try:
+        collection = db.database["exams"]
+        await collection.replace_one({"exam_id": exam_document["exam_id"]}, exam_document, upsert=True)
+        return exam_document["exam_id"]
+    except Exception as e:
+        logger.error(f"Error saving exam: {e}")
+        return None
+
+
+async def get_exam(exam_id: str):
+    """Get a compiled exam by its exam_id"""
+    if db.database is None:
+        return None
+    
+    try:
+        collection = db.database["exams"]
+        result = await collection.find_one({"exam_id": exam_id})
+        if result:
+            result.pop("_id", None)
+        return result
+    except Exception as e:
+        logger.error(f"Error getting exam: {e}")
+        return None
+
+
+async def insert_job(job_document: dict):
+    """Insert a queued job"""
+    if db.database is None:
+        return None
+    
+    collection = db.database["jobs"]
+    await collection.insert_one(dict(job_document))
+    return job_document["job_id"]
+
+
+async def claim_next_job(lease_seconds: float, max_attempts: int):
+    """
+    Atomically claim the oldest queued job (or a running job whose worker
+    stopped heartbeating) and mark it running; a job already claimed
+    max_attempts times is marked failed instead
+    """
+    if db.database is None:
+        return None
+    
+    from pymongo import ReturnDocument
+    from datetime import timedelta
+    
+    now = datetime.utcnow()
+    collection = db.database["jobs"]
+    result = await collection.find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "running", "heartbeat_at": {"$lt": now - timedelta(seconds=lease_seconds)}}
+        ]},
+        {"$set": {"status": "running", "started_at": now, "heartbeat_at": now}, "$inc": {"attempts": 1}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    if result:
+        result.pop("_id", None)
+        if result["attempts"] > max_attempts:
+            # Still leased to this claim, so no other worker picks it up meanwhile
+            fields = {
+                "status": "failed",
+                "error": f"Job did not finish after {max_attempts} attempts",
+                "attempts": max_attempts,
+                "finished_at": now
+            }
+            await collection.update_one({"job_id": result["job_id"]}, {"$set": fields, "$unset": {"payload": ""}})
+            result.update(fields)
+            result.pop("payload", None)
+    return result
+
+
+async def update_job(job_id: str, fields: dict, unset: tuple = ()):
+    """Update fields of a job by its job_id"""
+    if db.database is None:
+        return
+    
+    update = {"$set": fields}
+    if unset:
+        update["$unset"] = {field: "" for field in unset}
+    collection = db.database["jobs"]
+    await collection.update_one({"job_id": job_id}, update)
+
+
+async def get_job(job_id: str):
+    """Get a job by its job_id (without its input payload and file IDs)"""
+    if db.database is None:
+        return None
+    
+    try:
+        collection = db.database["jobs"]
+        result = await collection.find_one({"job_id": job_id}, {"payload": 0, "file_ids": 0})
+        if result:
+            result.pop("_id", None)
+        return result
+    except Exception as e:
+        logger.error(f"Error getting job: {e}")
+        return None
+
+
+async def save_job_file(data: bytes):
+    """Store a job's uploaded file in the "job_files" GridFS bucket and return its ID"""
+    if db.database is None:
+        return None
+    
+    bucket = AsyncIOMotorGridFSBucket(db.database, bucket_name="job_files")
+    file_id = await bucket.upload_from_stream("upload", data)
+    return str(file_id)
+
+
+async def get_job_file(file_id: str):
+    """Read a job's uploaded file from GridFS"""
+    if db.database is None:
+        raise RuntimeError("Database not connected")
+    
+    from bson import ObjectId
+    
+    bucket = AsyncIOMotorGridFSBucket(db.database, bucket_name="job_files")
+    stream = await bucket.open_download_stream(ObjectId(file_id))
+    return await stream.read()
+
+
+async def delete_job_file(file_id: str):
+    """Delete a job's uploaded file from GridFS"""
+    if db.database is None:
+        return
+    
+    from bson import ObjectId
+    
+    bucket = AsyncIOMotorGridFSBucket(db.database, bucket_name="job_files")
+    await bucket.delete(ObjectId(file_id))
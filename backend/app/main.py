@@ -4,6 +4,8 @@ from contextlib import asynccontextmanager
 from app.config import settings
 from app.api import evaluate
 from app.api import handwritten_evaluate
+from app.api import exams
+from app.api import jobs
 from app.database.db import connect_to_mongo, close_mongo_connection
 from app.models.schemas import HealthResponse
 from datetime import datetime
@@ -27,6 +29,10 @@ async def lifespan(app: FastAPI):
     # Connect to MongoDB
     await connect_to_mongo()
     
+    # Start background evaluation job workers (MongoDB-backed when connected)
+    from app.services.job_service import start_job_workers
+    await start_job_workers()
+    
     # Pre-load ML models (this will cache them)
     try:
         from app.services.embedding_service import get_embedding_model
@@ -36,6 +42,17 @@ async def lifespan(app: FastAPI):
         get_embedding_model()
         get_concept_model()
         logger.info("ML models loaded successfully")
+        
+        # Map persisted model-answer and concept embeddings (zero copy)
+        from app.services.embedding_service import get_embedding_store
+        from app.services.onnx_backend import get_model_variant
+        get_embedding_store("embedding", get_model_variant(settings.EMBEDDING_MODEL))
+        get_embedding_store("concept", get_model_variant(settings.CONCEPT_MODEL))
+        
+        # Question worker processes load their own copies of the models
+        if settings.PARALLEL_QUESTION_WORKERS > 1:
+            from app.services.executor_service import start_question_workers
+            start_question_workers(settings.PARALLEL_QUESTION_WORKERS)
     except Exception as e:
         logger.error(f"Error loading ML models: {e}")
         logger.warning("Application will continue, but some features may not work")
@@ -44,6 +61,12 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down application...")
+    from app.services.job_service import stop_job_workers
+    await stop_job_workers()
+    from app.services.executor_service import shutdown_executors
+    shutdown_executors()
+    from app.services.feedback_service import shutdown_feedback_client
+    shutdown_feedback_client()
     await close_mongo_connection()
 
 
@@ -68,6 +91,8 @@ app.add_middleware(
 
 # Include routers
 app.include_router(evaluate.router)
+app.include_router(exams.router)
+app.include_router(jobs.router)
 try:
     from app.api import handwritten_evaluate
     app.include_router(handwritten_evaluate.router)
@@ -85,6 +110,43 @@ async def health_check():
     )
 
 
+@app.get("/metrics")
+async def metrics():
+    """Embedding cache, persistent store, OCR cache, micro-batching, job queue and LLM feedback metrics"""
+    from app.services.embedding_service import (
+        get_embedding_cache_stats, get_embedding_batcher, get_embedding_store
+    )
+    from app.services.concept_service import get_concept_batcher
+    from app.services.onnx_backend import get_model_variant
+    from app.services.executor_service import get_executor_stats
+    from app.services.job_service import get_job_manager
+    from app.services.ocr_cache import get_ocr_cache
+    from app.services.feedback_service import get_feedback_client
+    
+    stores = {}
+    for name, model_name in (("embedding", settings.EMBEDDING_MODEL), ("concept", settings.CONCEPT_MODEL)):
+        store = get_embedding_store(name, get_model_variant(model_name))
+        if store is not None:
+            stores[name] = store.stats()
+    
+    ocr_cache = get_ocr_cache()
+    feedback_client = get_feedback_client()
+    
+    return {
+        "embedding_cache": get_embedding_cache_stats(),
+        "embedding_store": stores,
+        "ocr_cache": ocr_cache.stats() if ocr_cache is not None else None,
+        "executors": get_executor_stats(),
+        "jobs": get_job_manager().stats(),
+        "llm_feedback": feedback_client.stats() if feedback_client is not None else None,
+        "batching": {
+            "enabled": settings.BATCHING_ENABLED,
+            "embedding": get_embedding_batcher().stats(),
+            "concept": get_concept_batcher().stats()
+        }
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -0,0 +1,105 @@
+from app.services.executor_service import run_inference
+from app.services.full_paper_evaluator import analyse_items
+from app.services.paper_parser import ParsedPaper, StreamingPaperParser, match_questions_answers
+from app.services.strict_scoring_service import is_not_answered
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerSheetPipeline:
+    """
+    Parses a student's sheet page by page and analyses answers as they complete
+
+    Pages are added in page order (ocr_document's on_page) and joined like
+    the combined OCR text, so the final paper is the same as parsing the
+    whole sheet afterwards. A numbered answer is complete once the next
+    one starts; completed answers go through the model passes
+    (analyse_items) on the inference pool while later pages are still
+    being OCR'd. One pass runs at a time and answers that complete during
+    it are batched into the next.
+
+    Marks depend on the OCR quality of the whole sheet, so scoring and
+    feedback still run after OCR, from the analyses returned by finish.
+    """
+
+    def __init__(self, questions: List[Dict], model_answers: List[Dict], key: Optional[Dict] = None):
+        self.questions = questions
+        self.model_answers = model_answers
+        self.key = key
+        self.passes = 0
+        self._questions_by_number: Dict[int, List[Dict]] = {}
+        for question in questions:
+            self._questions_by_number.setdefault(question['number'], []).append(question)
+        self._parser = StreamingPaperParser()
+        self._has_text = False
+        self._student_items: List[Dict] = []
+        self._analyses: Dict[str, Dict] = {}
+        self._seen = set()
+        self._pending: List[Dict] = []
+        self._running: Optional[asyncio.Future] = None
+
+    def add_page(self, page: Dict):
+        """Feed the next page (page, text and error as reported by ocr_document)"""
+        if page.get('error') or not page.get('text'):
+            return
+        items = self._parser.feed(("\n\n" if self._has_text else "") + page['text'])
+        self._has_text = True
+        self._add_items(items)
+
+    def _add_items(self, items: List[Dict]):
+        self._student_items.extend(items)
+        for student_item in items:
+            for question in self._questions_by_number.get(student_item['number'], []):
+                item = ParsedPaper(match_questions_answers([question], self.model_answers, [student_item])).items[0]
+                if item['content_hash'] in self._seen or is_not_answered(item['student_answer']):
+                    continue
+                self._seen.add(item['content_hash'])
+                self._pending.append(item)
+        self._start_pass()
+
+    def _start_pass(self):
+        if self._running is None and self._pending:
+            items, self._pending = self._pending, []
+            self._running = asyncio.ensure_future(self._analyse(items))
+
+    async def _analyse(self, items: List[Dict]):
+        try:
+            analyses = await run_inference(analyse_items, items, self.key)
+            for item, analysis in zip(items, analyses):
+                self._analyses[item['content_hash']] = analysis
+            self.passes += 1
+        except Exception as e:
+            # The answers are analysed again with the rest of the paper
+            logger.warning(f"Early analysis of {len(items)} answers failed: {e}")
+        finally:
+            self._running = None
+            self._start_pass()
+
+    async def finish(self, ocr_quality_score: Optional[float] = None) -> Tuple[ParsedPaper, Dict[str, Dict]]:
+        """
+        Finish parsing and wait for the running pass
+
+        Answers not analysed yet (the last one, and any still pending) are
+        left to the evaluator, which batches them with its own pass.
+
+        Returns:
+            Tuple of (matched paper with OCR metadata, analyses by item
+            content_hash for evaluate_full_paper / evaluate_students_against_key)
+        """
+        self._student_items.extend(self._parser.close())
+        self._pending = []
+        if self._running is not None:
+            await self._running
+
+        paper = ParsedPaper(match_questions_answers(self.questions, self.model_answers, self._student_items))
+        paper.set_ocr_metadata(ocr_quality_score)
+        analyses = {
+            item['content_hash']: self._analyses[item['content_hash']]
+            for item in paper.items
+            if item['content_hash'] in self._analyses
+        }
+        logger.info(f"Analysed {len(analyses)} of {len(paper)} answers during OCR in {self.passes} passes")
+        return paper, analyses
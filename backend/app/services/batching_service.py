@@ -0,0 +1,144 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+import logging
+import queue
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _BatchRequest:
+    __slots__ = ("texts", "future", "submitted_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Coalesce encode calls from concurrent requests into shared forward passes
+
+    Callers submit a list of texts and get a Future for their own rows. A
+    background thread collects queued requests until max_batch_size texts are
+    pending or max_wait_ms has passed since the first one arrived, runs
+    encode_fn once on all of them and splits the result back per caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        self.name = name
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[_BatchRequest]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.total_queue_wait = 0.0
+        self.total_forward_time = 0.0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts for encoding and return a Future resolving to their vectors"""
+        self._ensure_started()
+        request = _BatchRequest(list(texts))
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the shared batch and wait for the result"""
+        if not texts:
+            return self.encode_fn(texts)
+        return self.submit(texts).result()
+
+    def _collect(self) -> List[_BatchRequest]:
+        first = self._queue.get()
+        batch = [first]
+        pending = len(first.texts)
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+
+        while pending < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            pending += len(request.texts)
+
+        return batch
+
+    def _run(self):
+        # Nothing may escape this loop: a dead thread would leave every later submit() hanging
+        while True:
+            batch = []
+            try:
+                batch = self._collect()
+                self._encode_batch(batch)
+            except Exception as e:
+                logger.error(f"Batched encode failed in '{self.name}': {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _encode_batch(self, batch: List[_BatchRequest]):
+        # Drop cancelled requests; the rest can no longer be cancelled
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for request in batch for text in request.texts]
+        started = time.monotonic()
+        vectors = self.encode_fn(texts)
+        forward_time = time.monotonic() - started
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(vectors[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(texts))
+            self.total_queue_wait += sum(started - request.submitted_at for request in batch)
+            self.total_forward_time += forward_time
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'name': self.name,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'requests': self.requests,
+                'texts': self.texts,
+                'batches': self.batches,
+                'largest_batch': self.largest_batch,
+                'avg_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0,
+                'avg_requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'avg_queue_wait_ms': round(self.total_queue_wait / self.requests * 1000, 2) if self.requests else 0.0,
+                'avg_forward_ms': round(self.total_forward_time / self.batches * 1000, 2) if self.batches else 0.0
+            }
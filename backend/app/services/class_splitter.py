@@ -0,0 +1,179 @@
+from app.services.paper_parser import DEFAULT_STUDENT_SEPARATORS, StreamingPaperParser, compile_separators, iter_lines
+from typing import Dict, List, Optional, Sequence
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPLIT_MODES = ("pages", "cover", "student_id")
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def _sheet(index: int, student_id: Optional[str], pages: List[Dict], text: Optional[str] = None) -> Dict:
+    if text is None:
+        text = "\n\n".join(page['text'] for page in pages if page.get('text') and not page.get('error'))
+    return {
+        'index': index,
+        'student_id': student_id or f"student-{index + 1}",
+        'pages': [page['page'] for page in pages],
+        'text': text,
+        'confidence': _mean([page['confidence'] for page in pages if page.get('confidence') is not None]),
+        'failed_pages': [page['page'] for page in pages if page.get('error')]
+    }
+
+
+def split_by_page_count(pages: List[Dict], pages_per_student: int) -> List[Dict]:
+    """Every pages_per_student consecutive pages are one student's sheet"""
+    if pages_per_student < 1:
+        raise ValueError("pages_per_student must be at least 1")
+    return [
+        _sheet(index, None, pages[start:start + pages_per_student])
+        for index, start in enumerate(range(0, len(pages), pages_per_student))
+    ]
+
+
+def _student_id_from_cover(text: str, separator: re.Pattern) -> Optional[str]:
+    lines = [line.strip() for line in iter_lines(text) if line.strip()]
+    for line in lines:
+        if separator.match(line):
+            return line
+    return lines[0] if lines else None
+
+
+def split_by_cover_page(pages: List[Dict], cover_marker: str) -> List[Dict]:
+    """
+    Start a new sheet at every page whose text matches cover_marker
+
+    Cover pages are not evaluated; the student ID is taken from a
+    student-ID line on the cover (or its first line). Pages before the
+    first cover form a sheet only if they have text.
+    """
+    marker = re.compile(cover_marker, re.IGNORECASE)
+    separator = compile_separators(DEFAULT_STUDENT_SEPARATORS)
+
+    groups = []  # (student_id, pages)
+    current_id, current_pages, seen_cover = None, [], False
+    for page in pages:
+        if marker.search(page.get('text') or ''):
+            if seen_cover or any(p.get('text') for p in current_pages):
+                groups.append((current_id, current_pages))
+            current_id, current_pages, seen_cover = _student_id_from_cover(page['text'], separator), [], True
+            continue
+        current_pages.append(page)
+    if seen_cover or any(p.get('text') for p in current_pages):
+        groups.append((current_id, current_pages))
+
+    return [_sheet(index, student_id, group) for index, (student_id, group) in enumerate(groups)]
+
+
+def split_by_student_id(pages: List[Dict], separators: Sequence[str] = DEFAULT_STUDENT_SEPARATORS) -> List[Dict]:
+    """
+    Start a new sheet at every student-ID line, even mid-page
+
+    ID lines are found by StreamingPaperParser, so consecutive ID lines
+    with only blank lines between them (e.g. "Name:" then "Roll No:") are
+    one header, joined with " | " as the student ID.
+    A page shared by two students counts towards both sheets' pages.
+    Sheets without text are dropped unless they have failed pages; text
+    before the first ID line forms a sheet only if it is not blank.
+    """
+    parser = StreamingPaperParser(separators)
+
+    groups = []  # [section, pages, lines]
+    current = [0, [], []]
+    for page in pages:
+        current[1].append(page)
+        if page.get('error'):
+            continue
+        if current[2]:
+            current[2].append("")  # page break, like the joined document text
+        page_lines = 0
+        for line in iter_lines(page.get('text') or ''):
+            header = parser.section_headers.get(parser.section)
+            parser.push_line(line)
+            if parser.section != current[0]:
+                if not page_lines:
+                    current[1].pop()  # nothing on this page belongs to the previous sheet
+                groups.append(current)
+                current = [parser.section, [page], []]
+                page_lines = 0
+                continue
+            if parser.section_headers.get(parser.section) != header:
+                current[2] = []  # next line of the same header
+                continue
+            current[2].append(line)
+            if line.strip():
+                page_lines += 1
+    groups.append(current)
+
+    sheets = []
+    for section, group_pages, lines in groups:
+        student_id = parser.section_headers.get(section)
+        text = "\n".join(lines).strip()
+        failed = student_id is not None and any(page.get('error') for page in group_pages)
+        if group_pages and (text or failed):
+            sheets.append(_sheet(len(sheets), student_id, group_pages, text=text))
+    return sheets
+
+
+def validate_split_rule(
+    mode: str,
+    pages_per_student: Optional[int] = None,
+    cover_marker: Optional[str] = None,
+    student_id_pattern: Optional[str] = None
+):
+    """Raise ValueError for an unknown mode, a missing parameter or an invalid pattern"""
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode '{mode}'. Expected one of {SPLIT_MODES}")
+    if mode == "pages" and not pages_per_student:
+        raise ValueError("pages_per_student is required for the 'pages' split mode")
+    if mode == "pages" and pages_per_student < 1:
+        raise ValueError("pages_per_student must be at least 1")
+    if mode == "cover" and not cover_marker:
+        raise ValueError("cover_marker is required for the 'cover' split mode")
+
+    for name, pattern in (('cover_marker', cover_marker), ('student_id_pattern', student_id_pattern)):
+        if pattern:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid {name}: {e}")
+
+
+def split_class_pages(
+    pages: List[Dict],
+    mode: str,
+    pages_per_student: Optional[int] = None,
+    cover_marker: Optional[str] = None,
+    student_id_pattern: Optional[str] = None
+) -> List[Dict]:
+    """
+    Group the OCR'd pages of a combined class document into students' sheets
+
+    Args:
+        pages: Pages in order with page, text, confidence and error (as
+            returned by ocr_document with page_text=True)
+        mode: "pages" (fixed pages_per_student), "cover" (a new student at
+            each page matching cover_marker) or "student_id" (a new student
+            at each line matching student_id_pattern, by default Student
+            Name/ID, Name, Roll No or Registration No lines)
+
+    Returns:
+        One dict per student with index, student_id, pages (page numbers),
+        text, confidence (mean OCR page confidence) and failed_pages
+    """
+    validate_split_rule(mode, pages_per_student, cover_marker, student_id_pattern)
+
+    pages = sorted(pages, key=lambda page: page['page'])
+    if mode == "pages":
+        sheets = split_by_page_count(pages, pages_per_student)
+    elif mode == "cover":
+        sheets = split_by_cover_page(pages, cover_marker)
+    else:
+        sheets = split_by_student_id(pages, [student_id_pattern] if student_id_pattern else DEFAULT_STUDENT_SEPARATORS)
+
+    logger.info(f"Split {len(pages)} pages into {len(sheets)} student sheets ({mode})")
+    return sheets
@@ -3,7 +3,11 @@ import torch
 import numpy as np
 from app.config import settings
 from app.services.preprocessing import extract_key_phrases, clean_text
+from app.services.embedding_service import encode_with_cache
+from app.services.batching_service import MicroBatcher
+from app.services.onnx_backend import get_inference_backend, get_model_variant
 from sklearn.metrics.pairwise import cosine_similarity
+from typing import Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +15,7 @@ logger = logging.getLogger(__name__)
 # Global model instances
 _concept_tokenizer = None
 _concept_model = None
+_concept_batcher = None
 
 
 def get_concept_model():
@@ -18,9 +23,14 @@ def get_concept_model():
     global _concept_tokenizer, _concept_model
     if _concept_tokenizer is None or _concept_model is None:
         try:
-            logger.info(f"Loading concept model: {settings.CONCEPT_MODEL}")
+            backend = get_inference_backend()
+            logger.info(f"Loading concept model: {settings.CONCEPT_MODEL} ({backend})")
             _concept_tokenizer = AutoTokenizer.from_pretrained(settings.CONCEPT_MODEL)
-            _concept_model = AutoModel.from_pretrained(settings.CONCEPT_MODEL)
+            if backend == "torch":
+                _concept_model = AutoModel.from_pretrained(settings.CONCEPT_MODEL)
+            else:
+                from app.services.onnx_backend import OnnxEncoderModel
+                _concept_model = OnnxEncoderModel(settings.CONCEPT_MODEL, backend)
             _concept_model.eval()  # Set to evaluation mode
             logger.info("Concept model loaded successfully")
         except Exception as e:
@@ -74,73 +84,173 @@ def get_text_embedding(text: str) -> np.ndarray:
     Get BERT embedding for a text (for concept matching)
     """
     try:
-        tokenizer, model = get_concept_model()
-        
-        # Tokenize and encode
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-        
-        with torch.no_grad():
-            outputs = model(**inputs)
-            # Use [CLS] token embedding (first token)
-            embedding = outputs.last_hidden_state[0][0].numpy()
-        
-        return embedding
+        return get_text_embeddings([text])[0]
     except Exception as e:
         logger.error(f"Error getting text embedding: {e}")
         # Return zero vector as fallback
         return np.zeros(768)
 
 
-def check_concept_presence(concept: str, student_answer: str, threshold: float = 0.3) -> tuple:
+def _forward_concept_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """Run padded BERT forward passes and return the [CLS] embeddings"""
+    tokenizer, model = get_concept_model()
+    batches = []
+
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        inputs = tokenizer(chunk, return_tensors="pt", truncation=True, max_length=512, padding=True)
+
+        with torch.no_grad():
+            outputs = model(**inputs)
+            # Use [CLS] token embedding (first token) of every sequence
+            batches.append(outputs.last_hidden_state[:, 0, :].numpy())
+
+    return np.vstack(batches)
+
+
+def get_concept_batcher() -> MicroBatcher:
+    """Get the micro-batching scheduler in front of the concept model"""
+    global _concept_batcher
+    if _concept_batcher is None:
+        _concept_batcher = MicroBatcher(
+            "concept",
+            _forward_concept_texts,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS
+        )
+    return _concept_batcher
+
+
+def _encode_concept_texts(texts: List[str]) -> np.ndarray:
+    if settings.BATCHING_ENABLED:
+        return get_concept_batcher().encode(texts)
+    return _forward_concept_texts(texts)
+
+
+def get_text_embeddings(texts: List[str], persistent: Iterable[str] = ()) -> np.ndarray:
     """
-    Check if a concept is present in student answer
-    
+    Get BERT embeddings for multiple texts (padded batch processing)
+
+    Repeated texts such as concept phrases are served from the embedding cache.
+    Texts listed in persistent are also kept in the on-disk embedding store.
+
     Returns:
-        tuple: (is_present: bool, coverage: float 0-100, status: str)
+        np.ndarray of shape (len(texts), hidden_size) with [CLS] embeddings
+    """
+    if not texts:
+        return np.zeros((0, 768))
+
+    return encode_with_cache(
+        texts,
+        get_model_variant(settings.CONCEPT_MODEL),
+        _encode_concept_texts,
+        store_name="concept",
+        persistent=persistent
+    )
+
+
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize embedding rows so cosine similarity becomes a dot product"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def _match_concept_by_keywords(concept: str, student_answer: str) -> Optional[tuple]:
+    """
+    Keyword tiers of concept matching
+
+    Returns:
+        tuple (is_present, coverage, status) or None if the semantic tier is needed
     """
     if not concept or not student_answer:
         return False, 0.0, "missing"
-    
-    # Simple keyword matching first
+
     concept_lower = concept.lower()
     student_lower = student_answer.lower()
-    
+
     # Exact match
     if concept_lower in student_lower:
         return True, 100.0, "covered"
-    
+
     # Check if all words in concept are present
     concept_words = concept_lower.split()
     if len(concept_words) > 1:
         words_found = sum(1 for word in concept_words if word in student_lower)
         word_coverage = (words_found / len(concept_words)) * 100
-        
+
         if word_coverage >= 80:
             return True, word_coverage, "covered"
         elif word_coverage >= 50:
             return True, word_coverage, "partial"
+
+    return None
+
+
+def _match_concept_by_similarity(similarity: float) -> tuple:
+    """Semantic tier of concept matching"""
+    if similarity >= 0.5:
+        coverage = similarity * 100
+        status = "covered" if similarity >= 0.7 else "partial"
+        return True, coverage, status
+    return False, 0.0, "missing"
+
+
+def check_concept_presence(
+    concept: str,
+    student_answer: str,
+    threshold: float = 0.3,
+    student_embedding: Optional[np.ndarray] = None
+) -> tuple:
+    """
+    Check if a concept is present in student answer
+    
+    Args:
+        concept: Concept phrase to look for
+        student_answer: Student answer text
+        threshold: Unused, kept for backwards compatibility
+        student_embedding: Precomputed BERT embedding of student_answer,
+            reused across concepts instead of re-encoding the answer
+    
+    Returns:
+        tuple: (is_present: bool, coverage: float 0-100, status: str)
+    """
+    # Simple keyword matching first
+    match = _match_concept_by_keywords(concept, student_answer)
+    if match is not None:
+        return match
     
     # Semantic similarity check using embeddings
     try:
         concept_embedding = get_text_embedding(concept).reshape(1, -1)
-        student_embedding = get_text_embedding(student_answer).reshape(1, -1)
+        if student_embedding is None:
+            student_embedding = get_text_embedding(student_answer)
+        student_embedding = student_embedding.reshape(1, -1)
         
         similarity = cosine_similarity(concept_embedding, student_embedding)[0][0]
-        
-        if similarity >= 0.5:
-            coverage = similarity * 100
-            status = "covered" if similarity >= 0.7 else "partial"
-            return True, coverage, status
+        return _match_concept_by_similarity(float(similarity))
     except Exception as e:
         logger.warning(f"Error in semantic concept matching: {e}")
     
     return False, 0.0, "missing"
 
 
-def calculate_concept_coverage(teacher_answer: str, student_answer: str) -> dict:
+def calculate_concept_coverage(
+    teacher_answer: str,
+    student_answer: str,
+    concepts: Optional[List[str]] = None
+) -> dict:
     """
     Calculate concept coverage between teacher and student answers
     
+    The student answer is encoded at most once, and every concept that needs
+    the semantic tier is encoded in a single padded batch.
+    
+    Args:
+        teacher_answer: Teacher answer text
+        student_answer: Student answer text
+        concepts: Optional concepts already extracted from teacher_answer
+    
     Returns:
         dict with:
             - coverage: float (0-100)
@@ -148,48 +258,37 @@ def calculate_concept_coverage(teacher_answer: str, student_answer: str) -> dict
             - missing_concepts: list
             - concept_analysis: list of dicts with concept, status, coverage
     """
-    if not teacher_answer or not student_answer:
-        return {
-            "coverage": 0.0,
-            "covered_concepts": [],
-            "missing_concepts": [],
-            "concept_analysis": []
-        }
-    
-    # Extract concepts from teacher answer
-    concepts = extract_concepts_from_text(teacher_answer, max_concepts=15)
-    
-    if not concepts:
-        return {
-            "coverage": 0.0,
-            "covered_concepts": [],
-            "missing_concepts": [],
-            "concept_analysis": []
-        }
-    
+    concept_lists = [concepts] if concepts is not None else None
+    return calculate_concept_coverage_batch(
+        [teacher_answer],
+        [student_answer],
+        concept_lists=concept_lists
+    )[0]
+
+
+def _summarize_concept_matches(concepts: list, matches: list) -> dict:
+    """Aggregate per-concept matches into the coverage report"""
     covered_concepts = []
     missing_concepts = []
     concept_analysis = []
     total_coverage = 0.0
-    
-    for concept in concepts:
-        is_present, coverage, status = check_concept_presence(concept, student_answer)
-        
+
+    for concept, (is_present, coverage, status) in zip(concepts, matches):
         concept_analysis.append({
             "concept": concept,
             "status": status,
             "coverage": round(coverage, 1)
         })
-        
+
         if is_present:
             covered_concepts.append(concept)
             total_coverage += coverage
         else:
             missing_concepts.append(concept)
-    
+
     # Calculate average coverage percentage
     avg_coverage = (total_coverage / len(concepts)) if concepts else 0.0
-    
+
     return {
         "coverage": round(avg_coverage, 1),
         "covered_concepts": covered_concepts,
@@ -198,3 +297,73 @@ def calculate_concept_coverage(teacher_answer: str, student_answer: str) -> dict
     }
 
 
+def calculate_concept_coverage_batch(
+    teacher_answers: List[str],
+    student_answers: List[str],
+    concept_lists: Optional[List[list]] = None
+) -> List[dict]:
+    """
+    Calculate concept coverage for many teacher/student answer pairs at once
+
+    Keyword matching runs per concept as in calculate_concept_coverage. All
+    concepts that fall through to the semantic tier, and every student answer
+    that needs it, are encoded together in batched BERT forward passes.
+
+    Args:
+        teacher_answers: Teacher answers, one per pair
+        student_answers: Student answers, one per pair
+        concept_lists: Optional pre-extracted concepts per teacher answer
+
+    Returns:
+        List of coverage dicts in the same shape as calculate_concept_coverage
+    """
+    if len(teacher_answers) != len(student_answers):
+        raise ValueError("Teacher and student answers must have the same length")
+
+    if concept_lists is None:
+        concept_lists = [
+            extract_concepts_from_text(teacher, max_concepts=15) if teacher and student else []
+            for teacher, student in zip(teacher_answers, student_answers)
+        ]
+
+    # Stage 1: keyword tiers, collecting the concepts that need embeddings
+    all_matches = []
+    pending = []  # (pair index, concept index, concept)
+    for pair_index, (concepts, student) in enumerate(zip(concept_lists, student_answers)):
+        if not teacher_answers[pair_index] or not student:
+            concepts = []
+        matches = []
+        for concept_index, concept in enumerate(concepts):
+            match = _match_concept_by_keywords(concept, student)
+            if match is None:
+                pending.append((pair_index, concept_index, concept))
+                match = (False, 0.0, "missing")
+            matches.append(match)
+        all_matches.append(matches)
+
+    # Stage 2: one batched semantic pass over every pending concept
+    if pending:
+        try:
+            student_rows = {}
+            for pair_index, _, _ in pending:
+                student_rows.setdefault(pair_index, len(student_rows))
+
+            concepts = [concept for _, _, concept in pending]
+            texts = [student_answers[i] for i in student_rows] + concepts
+            embeddings = _normalize_rows(get_text_embeddings(texts, persistent=concepts))
+            student_embeddings = embeddings[:len(student_rows)]
+            concept_embeddings = embeddings[len(student_rows):]
+
+            rows = [student_rows[pair_index] for pair_index, _, _ in pending]
+            similarities = np.einsum('ij,ij->i', concept_embeddings, student_embeddings[rows])
+
+            for (pair_index, concept_index, _), similarity in zip(pending, similarities):
+                all_matches[pair_index][concept_index] = _match_concept_by_similarity(float(similarity))
+        except Exception as e:
+            logger.warning(f"Error in batched semantic concept matching: {e}")
+
+    results = []
+    for pair_index, matches in enumerate(all_matches):
+        concepts = concept_lists[pair_index] if matches else []
+        results.append(_summarize_concept_matches(concepts, matches))
+    return results
@@ -1,12 +1,208 @@
 from sentence_transformers import SentenceTransformer
 from app.config import settings
+from collections import OrderedDict
+from app.services.embedding_store import EmbeddingStore
+from app.services.batching_service import MicroBatcher
+from app.services.onnx_backend import get_inference_backend, get_model_variant
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
 import logging
+import threading
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
 # Global model instance (loaded once at startup)
 _embedding_model = None
+_embedding_batcher = None
+
+
+class EmbeddingCache:
+    """
+    In-process LRU cache of embeddings keyed by model name and text hash
+
+    Entries are evicted least-recently-used first once the stored vectors
+    exceed max_bytes. Vectors can be kept as float16 to halve memory use;
+    they are always returned as float32.
+    """
+
+    def __init__(self, max_bytes: int, use_float16: bool = False):
+        self.max_bytes = max_bytes
+        self.use_float16 = use_float16
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> Tuple[str, str]:
+        """Build a cache key from the model name and a hash of the normalized text"""
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return model_name, digest
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Tuple[str, str]):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.astype(np.float32)
+
+    def put(self, key: Tuple[str, str], vector: np.ndarray):
+        if not self.enabled:
+            return
+        stored = vector.astype(np.float16 if self.use_float16 else np.float32)
+        if stored.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._entries[key] = stored
+            self.current_bytes += stored.nbytes
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'float16': self.use_float16,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+_embedding_cache = EmbeddingCache(
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+    use_float16=settings.EMBEDDING_CACHE_FLOAT16
+)
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the shared embedding cache"""
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> Dict:
+    """Get hit/miss counters and memory usage of the embedding cache"""
+    return _embedding_cache.stats()
+
+
+_embedding_stores: Dict[str, EmbeddingStore] = {}
+_embedding_stores_lock = threading.Lock()
+
+
+def get_embedding_store(store_name: str, model_name: str) -> Optional[EmbeddingStore]:
+    """
+    Get the persistent embedding store for a model role ("embedding" or "concept")
+
+    The store is reset automatically when model_name differs from the model
+    that produced the stored vectors.
+    """
+    if not settings.EMBEDDING_STORE_DIR:
+        return None
+    with _embedding_stores_lock:
+        store = _embedding_stores.get(store_name)
+        if store is None or store.model_name != model_name:
+            try:
+                store = EmbeddingStore(settings.EMBEDDING_STORE_DIR, store_name, model_name)
+                logger.info(f"Opened embedding store '{store_name}' with {len(store)} vectors")
+            except Exception as e:
+                logger.warning(f"Embedding store '{store_name}' unavailable: {e}")
+                return None
+            _embedding_stores[store_name] = store
+        return store
+
+
+def encode_with_cache(
+    texts: List[str],
+    model_name: str,
+    encode_fn: Callable[[List[str]], np.ndarray],
+    store_name: Optional[str] = None,
+    persistent: Iterable[str] = ()
+) -> np.ndarray:
+    """
+    Encode texts, serving repeated texts from the embedding caches
+
+    Lookups go to the in-process LRU cache first, then to the persistent
+    store named store_name. Texts missing from both are encoded together in
+    one encode_fn call; those listed in persistent (model answers, concept
+    phrases) are also appended to the persistent store.
+
+    Returns:
+        np.ndarray with one row per input text
+    """
+    cache = _embedding_cache
+    store = get_embedding_store(store_name, model_name) if store_name else None
+    if not cache.enabled and store is None:
+        return encode_fn(texts)
+
+    keys = [cache.make_key(model_name, text) for text in texts]
+    rows: List = [None] * len(texts)
+    missing: Dict[Tuple[str, str], List[int]] = {}
+
+    for index, key in enumerate(keys):
+        if key in missing:
+            missing[key].append(index)
+            continue
+        vector = cache.get(key) if cache.enabled else None
+        if vector is None and store is not None:
+            vector = store.get(key[1])
+        if vector is None:
+            missing[key] = [index]
+        else:
+            rows[index] = vector
+
+    if missing:
+        persistent = set(persistent)
+        to_store = []
+        first_indices = [indices[0] for indices in missing.values()]
+        encoded = encode_fn([texts[i] for i in first_indices])
+        for (key, indices), vector in zip(missing.items(), encoded):
+            vector = np.asarray(vector, dtype=np.float32)
+            cache.put(key, vector)
+            if store is not None and texts[indices[0]] in persistent:
+                to_store.append((key[1], vector))
+            for index in indices:
+                rows[index] = vector
+        if to_store:
+            try:
+                store.add_many(to_store)
+            except Exception as e:
+                logger.warning(f"Failed to persist embeddings to store '{store_name}': {e}")
+
+    return np.vstack(rows)
+
+
+def seed_embedding_cache(model_name: str, texts: List[str], vectors: np.ndarray):
+    """Load precomputed vectors (e.g. from a compiled exam) into the LRU cache"""
+    cache = _embedding_cache
+    if not cache.enabled:
+        return
+    for text, vector in zip(texts, vectors):
+        cache.put(cache.make_key(model_name, text), np.asarray(vector, dtype=np.float32))
 
 
 def get_embedding_model():
@@ -14,8 +210,13 @@ def get_embedding_model():
     global _embedding_model
     if _embedding_model is None:
         try:
-            logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-            _embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            backend = get_inference_backend()
+            logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL} ({backend})")
+            if backend == "torch":
+                _embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            else:
+                from app.services.onnx_backend import OnnxSentenceEncoder
+                _embedding_model = OnnxSentenceEncoder(settings.EMBEDDING_MODEL, backend)
             logger.info("Embedding model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading embedding model: {e}")
@@ -23,21 +224,54 @@ def get_embedding_model():
     return _embedding_model
 
 
-def generate_embedding(text: str) -> np.ndarray:
+def _forward_texts(texts: List[str]) -> np.ndarray:
+    model = get_embedding_model()
+    return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+
+def get_embedding_batcher() -> MicroBatcher:
+    """Get the micro-batching scheduler in front of the embedding model"""
+    global _embedding_batcher
+    if _embedding_batcher is None:
+        _embedding_batcher = MicroBatcher(
+            "embedding",
+            _forward_texts,
+            max_batch_size=settings.BATCH_MAX_SIZE,
+            max_wait_ms=settings.BATCH_MAX_WAIT_MS
+        )
+    return _embedding_batcher
+
+
+def _encode_texts(texts: List[str]) -> np.ndarray:
+    if settings.BATCHING_ENABLED:
+        return get_embedding_batcher().encode(texts)
+    return _forward_texts(texts)
+
+
+def generate_embedding(text: str, persist: bool = False) -> np.ndarray:
     """
     Generate embedding for a single text
+    
+    persist=True also keeps the vector in the on-disk embedding store
+    (use it for reusable texts such as model answers).
     """
     if not text or not text.strip():
         raise ValueError("Text cannot be empty")
     
-    model = get_embedding_model()
-    embedding = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
-    return embedding
+    return encode_with_cache(
+        [text],
+        get_model_variant(settings.EMBEDDING_MODEL),
+        _encode_texts,
+        store_name="embedding",
+        persistent=[text] if persist else ()
+    )[0]
 
 
-def generate_embeddings(texts: list) -> np.ndarray:
+def generate_embeddings(texts: list, persistent: Iterable[str] = ()) -> np.ndarray:
     """
     Generate embeddings for multiple texts (batch processing)
+    
+    Texts listed in persistent are also kept in the on-disk embedding store.
     """
     if not texts:
         raise ValueError("Texts list cannot be empty")
@@ -47,8 +281,10 @@ def generate_embeddings(texts: list) -> np.ndarray:
     if not valid_texts:
         raise ValueError("No valid texts to encode")
     
-    model = get_embedding_model()
-    embeddings = model.encode(valid_texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
-    return embeddings
-
-
+    return encode_with_cache(
+        valid_texts,
+        get_model_variant(settings.EMBEDDING_MODEL),
+        _encode_texts,
+        store_name="embedding",
+        persistent=persistent
+    )
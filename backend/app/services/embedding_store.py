@@ -0,0 +1,220 @@
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 32  # raw SHA-256 digest bytes per index record
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store shared by all worker processes
+
+    Layout inside the store directory, per store name:
+        <name>.vectors  raw float32 rows, appended in index order
+        <name>.index    fixed-size SHA-256 digests, record i -> vector row i
+        <name>.json     manifest with the model name and vector dimension
+
+    Vectors are read through a read-only np.memmap, so lookups return views
+    into the page cache without copying. Writers append under an exclusive
+    file lock. The store is wiped when the manifest's model name no longer
+    matches the configured model; other processes notice the new manifest
+    (or the shrunken index), drop what they had read, and stop appending
+    if the store now belongs to another model.
+    """
+
+    def __init__(self, directory: str, name: str, model_name: str):
+        self.directory = directory
+        self.name = name
+        self.model_name = model_name
+        self.vectors_path = os.path.join(directory, f"{name}.vectors")
+        self.index_path = os.path.join(directory, f"{name}.index")
+        self.manifest_path = os.path.join(directory, f"{name}.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+
+        self.dim: Optional[int] = None
+        self._rows: Dict[bytes, int] = {}
+        self._index_bytes_read = 0
+        self._vectors: Optional[np.memmap] = None
+        self._manifest_id: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._file_lock():
+            self._validate_manifest()
+        self._refresh()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock across processes (no-op where fcntl is unavailable)"""
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, dim: Optional[int]):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"model": self.model_name, "dim": dim}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _validate_manifest(self):
+        """Drop the stored vectors if they were produced by a different model"""
+        manifest = self._read_manifest()
+        if manifest is None or manifest.get("model") != self.model_name:
+            if manifest is not None:
+                logger.info(
+                    f"Embedding store '{self.name}' was built for {manifest.get('model')}, "
+                    f"resetting for {self.model_name}"
+                )
+            for path in (self.vectors_path, self.index_path, self.manifest_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._write_manifest(None)  # claim the store before the dimension is known
+            return
+        self.dim = manifest.get("dim")
+
+    def _stat_manifest(self) -> Optional[Tuple[int, int]]:
+        """Identity of the manifest file; it is replaced, never edited, so this changes on every write"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _reset(self):
+        self.dim = None
+        self._rows = {}
+        self._index_bytes_read = 0
+        self._vectors = None
+
+    def _refresh(self):
+        """Pick up records appended by this or other processes since the last read"""
+        try:
+            index_size = os.path.getsize(self.index_path)
+        except OSError:
+            index_size = 0
+
+        manifest_id = self._stat_manifest()
+        if manifest_id != self._manifest_id or index_size < self._index_bytes_read:
+            # Another process reset the store (e.g. for a different model)
+            if self._rows:
+                logger.info(f"Embedding store '{self.name}' changed on disk, reloading")
+            self._reset()
+            self._manifest_id = manifest_id
+        if index_size == self._index_bytes_read:
+            return
+
+        if self.dim is None:
+            manifest = self._read_manifest()
+            if manifest is None or manifest.get("model") != self.model_name or not manifest.get("dim"):
+                return
+            self.dim = manifest["dim"]
+
+        row_bytes = self.dim * 4
+        vector_rows = os.path.getsize(self.vectors_path) // row_bytes
+        complete_bytes = min(index_size // DIGEST_SIZE, vector_rows) * DIGEST_SIZE
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_bytes_read)
+            data = f.read(complete_bytes - self._index_bytes_read)
+
+        first_row = self._index_bytes_read // DIGEST_SIZE
+        for offset in range(0, len(data), DIGEST_SIZE):
+            self._rows.setdefault(data[offset:offset + DIGEST_SIZE], first_row + offset // DIGEST_SIZE)
+        self._index_bytes_read = complete_bytes
+
+        rows = complete_bytes // DIGEST_SIZE
+        if rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, digest_hex: str, refresh: bool = True) -> Optional[np.ndarray]:
+        """Get a stored vector (a read-only view into the memory map) or None"""
+        digest = bytes.fromhex(digest_hex)
+        with self._lock:
+            row = self._rows.get(digest)
+            if row is None and refresh:
+                self._refresh()
+                row = self._rows.get(digest)
+            if row is None or self._vectors is None:
+                return None
+            return self._vectors[row]
+
+    def add_many(self, items: List[Tuple[str, np.ndarray]]):
+        """Append vectors keyed by hex digest, skipping ones already stored"""
+        if not items:
+            return
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            manifest = self._read_manifest()
+            if manifest is not None and manifest.get("model") != self.model_name:
+                logger.warning(
+                    f"Embedding store '{self.name}' now holds {manifest.get('model')} vectors, "
+                    f"not storing {self.model_name} vectors"
+                )
+                return
+
+            new_items = []
+            seen = set()
+            for digest_hex, vector in items:
+                digest = bytes.fromhex(digest_hex)
+                if digest in self._rows or digest in seen:
+                    continue
+                seen.add(digest)
+                new_items.append((digest, np.asarray(vector, dtype=np.float32).ravel()))
+            if not new_items:
+                return
+
+            dim = new_items[0][1].shape[0]
+            if self.dim is None:
+                self.dim = dim
+                self._write_manifest(dim)
+                self._manifest_id = self._stat_manifest()
+            elif dim != self.dim:
+                logger.warning(f"Embedding store '{self.name}' dimension mismatch ({dim} != {self.dim}), skipping")
+                return
+
+            # Drop any vector rows left behind by an interrupted append
+            rows = self._index_bytes_read // DIGEST_SIZE
+            with open(self.vectors_path, "ab") as vectors_file:
+                vectors_file.truncate(rows * self.dim * 4)
+                vectors_file.write(np.stack([vector for _, vector in new_items]).tobytes())
+            with open(self.index_path, "ab") as index_file:
+                index_file.truncate(self._index_bytes_read)
+                index_file.write(b"".join(digest for digest, _ in new_items))
+
+            self._refresh()
+
+    def stats(self) -> Dict:
+        return {
+            'name': self.name,
+            'model': self.model_name,
+            'entries': len(self._rows),
+            'dim': self.dim,
+            'bytes': len(self._rows) * (self.dim or 0) * 4
+        }
@@ -0,0 +1,177 @@
+from app.config import settings
+from app.services.full_paper_evaluator import prepare_answer_key
+from app.services.concept_service import get_text_embeddings
+from app.services.embedding_service import seed_embedding_cache
+from app.services.onnx_backend import get_model_variant
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Compiled answer keys kept in memory, most recently used last
+_compiled_exams: "OrderedDict[str, Dict]" = OrderedDict()
+_compiled_exams_lock = threading.Lock()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _current_model_variants() -> Dict[str, str]:
+    return {
+        'embedding': get_model_variant(settings.EMBEDDING_MODEL),
+        'concept': get_model_variant(settings.CONCEPT_MODEL)
+    }
+
+
+def make_exam_id(questions_text: str, model_answers_text: str) -> str:
+    """Content-addressed exam ID: identical paper and key compile to the same exam"""
+    return _sha256(_sha256(questions_text) + _sha256(model_answers_text))[:24]
+
+
+def _encode_array(array: np.ndarray) -> Dict:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {'dtype': 'float32', 'shape': list(array.shape), 'data': array.tobytes()}
+
+
+def _decode_array(payload: Dict) -> np.ndarray:
+    return np.frombuffer(payload['data'], dtype=payload['dtype']).reshape(payload['shape'])
+
+
+def compile_exam(questions_text: str, model_answers_text: str, title: Optional[str] = None) -> Dict:
+    """
+    Compile a question paper and answer key into a reusable artifact
+
+    The compiled key holds parsed questions, preprocessed model answers,
+    required concepts, model-answer and concept embeddings, and content
+    hashes. It is what prepare_answer_key returns plus exam metadata.
+    """
+    key = prepare_answer_key(questions_text, model_answers_text)
+
+    concepts = sorted({concept for concept_list in key['required_concepts'].values() for concept in concept_list})
+    concept_embeddings = get_text_embeddings(concepts, persistent=concepts) if concepts else np.zeros((0, 0))
+
+    key.update({
+        'exam_id': make_exam_id(questions_text, model_answers_text),
+        'title': title,
+        'questions_text': questions_text,
+        'model_answers_text': model_answers_text,
+        'concepts': concepts,
+        'concept_embeddings': concept_embeddings,
+        'content_hashes': {
+            'questions': _sha256(questions_text),
+            'model_answers': _sha256(model_answers_text),
+            'model_answers_by_question': {
+                number: _sha256(processed) for number, processed in key['model_answers_processed'].items()
+            }
+        },
+        'model_variants': _current_model_variants(),
+        'created_at': datetime.utcnow()
+    })
+    remember_exam(key)
+    return key
+
+
+def remember_exam(key: Dict):
+    """Keep a compiled exam in memory and warm the concept embedding cache"""
+    if key['concepts']:
+        seed_embedding_cache(key['model_variants']['concept'], key['concepts'], key['concept_embeddings'])
+    with _compiled_exams_lock:
+        _compiled_exams[key['exam_id']] = key
+        _compiled_exams.move_to_end(key['exam_id'])
+        while len(_compiled_exams) > settings.EXAM_CACHE_SIZE:
+            _compiled_exams.popitem(last=False)
+
+
+def get_compiled_exam(exam_id: str) -> Optional[Dict]:
+    """Get a compiled exam from memory"""
+    with _compiled_exams_lock:
+        key = _compiled_exams.get(exam_id)
+        if key is not None:
+            _compiled_exams.move_to_end(exam_id)
+        return key
+
+
+def is_exam_current(key: Dict) -> bool:
+    """Whether the exam was compiled with the models currently configured"""
+    return key.get('model_variants') == _current_model_variants()
+
+
+def exam_to_document(key: Dict) -> Dict:
+    """Serialize a compiled exam for MongoDB (string keys, binary arrays)"""
+    return {
+        'exam_id': key['exam_id'],
+        'title': key['title'],
+        'questions_text': key['questions_text'],
+        'model_answers_text': key['model_answers_text'],
+        'questions': key['questions'],
+        'model_answers': key['model_answers'],
+        'model_answers_processed': {str(n): v for n, v in key['model_answers_processed'].items()},
+        'required_concepts': {str(n): v for n, v in key['required_concepts'].items()},
+        'model_answer_rows': {str(n): v for n, v in key['model_answer_rows'].items()},
+        'model_answer_embeddings': _encode_array(key['model_answer_embeddings']),
+        'concepts': key['concepts'],
+        'concept_embeddings': _encode_array(key['concept_embeddings']),
+        'content_hashes': {
+            **key['content_hashes'],
+            'model_answers_by_question': {
+                str(n): v for n, v in key['content_hashes']['model_answers_by_question'].items()
+            }
+        },
+        'model_variants': key['model_variants'],
+        'created_at': key['created_at']
+    }
+
+
+def exam_from_document(document: Dict) -> Dict:
+    """Rebuild a compiled exam from its MongoDB document"""
+    return {
+        'exam_id': document['exam_id'],
+        'title': document.get('title'),
+        'questions_text': document['questions_text'],
+        'model_answers_text': document['model_answers_text'],
+        'questions': document['questions'],
+        'model_answers': document['model_answers'],
+        'model_answers_processed': {int(n): v for n, v in document['model_answers_processed'].items()},
+        'required_concepts': {int(n): v for n, v in document['required_concepts'].items()},
+        'model_answer_rows': {int(n): v for n, v in document['model_answer_rows'].items()},
+        'model_answer_embeddings': _decode_array(document['model_answer_embeddings']),
+        'concepts': document['concepts'],
+        'concept_embeddings': _decode_array(document['concept_embeddings']),
+        'content_hashes': {
+            **document['content_hashes'],
+            'model_answers_by_question': {
+                int(n): v for n, v in document['content_hashes']['model_answers_by_question'].items()
+            }
+        },
+        'model_variants': document['model_variants'],
+        'created_at': document.get('created_at')
+    }
+
+
+def exam_summary(key: Dict, include_questions: bool = False) -> Dict:
+    """Public view of a compiled exam (no embeddings)"""
+    summary = {
+        'exam_id': key['exam_id'],
+        'title': key['title'],
+        'total_questions': len(key['questions']),
+        'content_hashes': key['content_hashes'],
+        'model_variants': key['model_variants'],
+        'created_at': key['created_at']
+    }
+    if include_questions:
+        summary['questions'] = [
+            {
+                'question_no': question['number'],
+                'question': question['content'],
+                'model_answer': key['model_answers_processed'].get(question['number'], ''),
+                'required_concepts': key['required_concepts'].get(question['number'], [])
+            }
+            for question in key['questions']
+        ]
+    return summary
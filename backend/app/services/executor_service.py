@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor
+from app.config import settings
+from functools import partial
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+# Bounded executors (created lazily, shut down with the app)
+_inference_executor: Optional[ThreadPoolExecutor] = None
+_ocr_executor: Optional[Executor] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+_question_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Thread pool for model inference (torch/onnxruntime release the GIL)"""
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(
+            max_workers=settings.INFERENCE_WORKERS,
+            thread_name_prefix="inference"
+        )
+    return _inference_executor
+
+
+def get_ocr_executor() -> Executor:
+    """
+    Process pool for tesseract OCR
+
+    Uses the spawn start method so workers never inherit torch threads from
+    the parent. OCR_WORKERS=0 falls back to the inference thread pool.
+    """
+    global _ocr_executor
+    if _ocr_executor is None:
+        if settings.OCR_WORKERS <= 0:
+            return get_inference_executor()
+        _ocr_executor = ProcessPoolExecutor(
+            max_workers=settings.OCR_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _ocr_executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking I/O such as OCR cache reads and writes"""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(
+            max_workers=settings.IO_WORKERS,
+            thread_name_prefix="io"
+        )
+    return _io_executor
+
+
+def _init_question_worker(torch_threads: int):
+    """Give each question worker its own slice of the cores and load the models before its first task"""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except Exception as e:
+        logger.warning(f"Could not set torch thread budget: {e}")
+    
+    try:
+        from app.services.embedding_service import get_embedding_model
+        from app.services.concept_service import get_concept_model
+        get_embedding_model()
+        get_concept_model()
+    except Exception as e:
+        logger.warning(f"Could not preload models in question worker: {e}")
+
+
+def get_torch_thread_budget(workers: int) -> int:
+    """Intra-op threads per question worker so workers don't oversubscribe cores"""
+    if settings.PARALLEL_TORCH_THREADS > 0:
+        return settings.PARALLEL_TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+def get_question_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool for parallel per-question evaluation, one per worker count"""
+    executor = _question_executors.get(workers)
+    if executor is None:
+        torch_threads = get_torch_thread_budget(workers)
+        logger.info(f"Starting {workers} question workers with {torch_threads} torch threads each")
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_question_worker,
+            initargs=(torch_threads,)
+        )
+        _question_executors[workers] = executor
+    return executor
+
+
+def start_question_workers(workers: int):
+    """Spawn the question pool's workers now so their model loading happens at startup"""
+    executor = get_question_executor(workers)
+    for _ in range(workers):
+        executor.submit(os.getpid)
+
+
+async def _run(executor: Executor, fn: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+async def run_inference(fn: Callable, *args, **kwargs):
+    """Run a model-bound function off the event loop"""
+    return await _run(get_inference_executor(), fn, *args, **kwargs)
+
+
+async def run_ocr(fn: Callable, *args, **kwargs):
+    """Run an OCR function (must be picklable) in the OCR process pool"""
+    return await _run(get_ocr_executor(), fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable, *args, **kwargs):
+    """Run a blocking I/O-bound function off the event loop"""
+    return await _run(get_io_executor(), fn, *args, **kwargs)
+
+
+def get_executor_stats() -> Dict:
+    return {
+        'inference_workers': settings.INFERENCE_WORKERS,
+        'ocr_workers': settings.OCR_WORKERS,
+        'io_workers': settings.IO_WORKERS,
+        'parallel_question_workers': settings.PARALLEL_QUESTION_WORKERS,
+        'parallel_torch_threads': get_torch_thread_budget(settings.PARALLEL_QUESTION_WORKERS)
+    }
+
+
+def shutdown_executors():
+    """Shut down all executors (called on application shutdown)"""
+    global _inference_executor, _ocr_executor, _io_executor
+    for executor in (_ocr_executor, _inference_executor, _io_executor, *_question_executors.values()):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _question_executors.clear()
+    _inference_executor = None
+    _ocr_executor = None
+    _io_executor = None
@@ -1,48 +1,194 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, InternalServerError, RateLimitError
+from concurrent.futures import Future, as_completed
 from app.config import settings
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
+import asyncio
 import logging
+import random
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-_openai_client = None
+MAX_RETRY_DELAY = 8.0  # seconds, cap for the exponential backoff
 
+SYSTEM_PROMPT = "You are an expert educational evaluator providing constructive feedback to students."
 
-def get_openai_client():
-    """Get or initialize OpenAI client"""
-    global _openai_client
-    if _openai_client is None and settings.OPENAI_API_KEY:
+
+class LLMFeedbackClient:
+    """
+    Shared AsyncOpenAI client running on a background event loop
+
+    Evaluation runs on worker threads, so requests are submitted from there
+    and each gets a concurrent.futures Future for the completion text. The
+    loop runs in a daemon thread started on first use. At most concurrency
+    requests are in flight across all papers; every attempt is bounded by
+    timeout, and timeouts, connection errors, 429s and 5xx responses are
+    retried up to max_retries times after a full-jitter exponential backoff
+    (or the server's Retry-After, if longer).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        model: str = "gpt-3.5-turbo",
+        concurrency: int = 8,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5
+    ):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        # Retries are handled here, with jitter and without holding a slot while waiting
+        self._client = AsyncOpenAI(api_key=api_key, base_url=base_url or None, timeout=timeout, max_retries=0)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_latency = 0.0
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="llm-feedback", daemon=True)
+                self._thread.start()
+                self._loop = loop
+
+    def submit(self, messages: List[Dict]) -> Future:
+        """Queue a chat completion and return a Future resolving to its text"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._complete(messages), self._loop)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(MAX_RETRY_DELAY, self.retry_base_delay * 2 ** attempt))
+        if isinstance(error, APIStatusError):
+            try:
+                delay = max(delay, min(MAX_RETRY_DELAY, float(error.response.headers.get('retry-after', 0))))
+            except ValueError:
+                pass
+        return delay
+
+    async def _complete(self, messages: List[Dict]) -> str:
+        started = time.monotonic()
+        self.requests += 1
         try:
-            _openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            logger.info("OpenAI client initialized")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with self._semaphore:
+                        self.in_flight += 1
+                        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                        try:
+                            response = await self._client.chat.completions.create(
+                                model=self.model,
+                                messages=messages,
+                                temperature=0.7,
+                                max_tokens=500,
+                                timeout=self.timeout
+                            )
+                        finally:
+                            self.in_flight -= 1
+                    return response.choices[0].message.content
+                except (APIConnectionError, RateLimitError, InternalServerError) as e:
+                    # APIConnectionError includes APITimeoutError
+                    if attempt == self.max_retries:
+                        raise
+                    self.retries += 1
+                    delay = self._retry_delay(attempt, e)
+                    logger.warning(f"LLM request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.total_latency += time.monotonic() - started
+
+    def stats(self) -> Dict:
+        return {
+            'model': self.model,
+            'concurrency': self.concurrency,
+            'timeout': self.timeout,
+            'max_retries': self.max_retries,
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'avg_latency_ms': round(self.total_latency / self.requests * 1000, 2) if self.requests else 0.0
+        }
+
+    def close(self):
+        """Close the HTTP client and stop the loop"""
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {e}")
-    return _openai_client
+            logger.warning(f"Error closing LLM client: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
 
 
-def generate_feedback_llm(
+_feedback_client: Optional[LLMFeedbackClient] = None
+_feedback_client_lock = threading.Lock()
+
+
+def get_feedback_client() -> Optional[LLMFeedbackClient]:
+    """Get this process's LLM feedback client, or None when OPENAI_API_KEY is not set"""
+    global _feedback_client
+    if not settings.OPENAI_API_KEY:
+        return None
+    with _feedback_client_lock:
+        if _feedback_client is None:
+            try:
+                _feedback_client = LLMFeedbackClient(
+                    api_key=settings.OPENAI_API_KEY,
+                    base_url=settings.OPENAI_BASE_URL,
+                    model=settings.OPENAI_MODEL,
+                    concurrency=settings.LLM_CONCURRENCY,
+                    timeout=settings.LLM_TIMEOUT,
+                    max_retries=settings.LLM_MAX_RETRIES,
+                    retry_base_delay=settings.LLM_RETRY_BASE_DELAY
+                )
+                logger.info("OpenAI client initialized")
+            except Exception as e:
+                logger.error(f"Error initializing OpenAI client: {e}")
+        return _feedback_client
+
+
+def shutdown_feedback_client():
+    """Close the LLM feedback client (called on application shutdown)"""
+    global _feedback_client
+    with _feedback_client_lock:
+        if _feedback_client is not None:
+            _feedback_client.close()
+        _feedback_client = None
+
+
+def build_feedback_messages(
     question: str,
     teacher_answer: str,
     student_answer: str,
     missing_concepts: List[str],
     final_marks: float,
     max_marks: float
-) -> Dict[str, List[str]]:
-    """
-    Generate feedback using OpenAI GPT model
-    
-    Returns:
-        dict with keys: strengths, weaknesses, suggestions
-    """
-    client = get_openai_client()
-    
-    if not client:
-        logger.warning("OpenAI API key not configured. Using fallback feedback.")
-        return generate_fallback_feedback(missing_concepts, final_marks, max_marks)
-    
-    try:
-        prompt = f"""You are an expert educational evaluator. Analyze the following student answer and provide constructive feedback.
+) -> List[Dict]:
+    """Chat messages asking for strengths, weaknesses and suggestions"""
+    prompt = f"""You are an expert educational evaluator. Analyze the following student answer and provide constructive feedback.
 
 Question: {question}
 
@@ -74,27 +220,89 @@ SUGGESTIONS:
 - [suggestion 1]
 - [suggestion 2]
 """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert educational evaluator providing constructive feedback to students."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        feedback_text = response.choices[0].message.content
-        
-        # Parse the response
-        return parse_feedback_response(feedback_text)
-        
+
+def generate_feedback_llm(
+    question: str,
+    teacher_answer: str,
+    student_answer: str,
+    missing_concepts: List[str],
+    final_marks: float,
+    max_marks: float
+) -> Dict[str, List[str]]:
+    """
+    Generate feedback using OpenAI GPT model (blocks until the reply arrives)
+    
+    Returns:
+        dict with keys: strengths, weaknesses, suggestions
+    """
+    return next(iter_feedback_llm([{
+        'question': question,
+        'teacher_answer': teacher_answer,
+        'student_answer': student_answer,
+        'missing_concepts': missing_concepts,
+        'final_marks': final_marks,
+        'max_marks': max_marks
+    }]))[1]
+
+
+async def generate_feedback_llm_async(
+    question: str,
+    teacher_answer: str,
+    student_answer: str,
+    missing_concepts: List[str],
+    final_marks: float,
+    max_marks: float
+) -> Dict[str, List[str]]:
+    """generate_feedback_llm for the event loop, awaiting the shared client without a worker thread"""
+    client = get_feedback_client()
+    
+    if not client:
+        logger.warning("OpenAI API key not configured. Using fallback feedback.")
+        return generate_fallback_feedback(missing_concepts, final_marks, max_marks)
+    
+    try:
+        messages = build_feedback_messages(question, teacher_answer, student_answer, missing_concepts, final_marks, max_marks)
+        return parse_feedback_response(await asyncio.wrap_future(client.submit(messages)))
     except Exception as e:
         logger.error(f"Error generating LLM feedback: {e}")
         return generate_fallback_feedback(missing_concepts, final_marks, max_marks)
 
 
+def iter_feedback_llm(requests: List[Dict]) -> Iterator[Tuple[int, Dict[str, List[str]]]]:
+    """
+    Generate feedback for many answers at once
+    
+    All requests go out concurrently (bounded by LLM_CONCURRENCY) and
+    (index, feedback) pairs are yielded as replies arrive, so the order is
+    not the order of requests. Requests take generate_feedback_llm's
+    arguments; failed requests get fallback feedback.
+    """
+    client = get_feedback_client()
+    
+    if not client:
+        if requests:
+            logger.warning("OpenAI API key not configured. Using fallback feedback.")
+        for index, request in enumerate(requests):
+            yield index, generate_fallback_feedback(request['missing_concepts'], request['final_marks'], request['max_marks'])
+        return
+    
+    futures = {client.submit(build_feedback_messages(**request)): index for index, request in enumerate(requests)}
+    for future in as_completed(futures):
+        index = futures[future]
+        request = requests[index]
+        try:
+            feedback = parse_feedback_response(future.result())
+        except Exception as e:
+            logger.error(f"Error generating LLM feedback: {e}")
+            feedback = generate_fallback_feedback(request['missing_concepts'], request['final_marks'], request['max_marks'])
+        yield index, feedback
+
+
 def parse_feedback_response(feedback_text: str) -> Dict[str, List[str]]:
     """Parse LLM feedback response into structured format"""
     strengths = []
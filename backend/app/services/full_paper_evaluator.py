@@ -1,223 +1,434 @@
-from typing import List, Dict
-from app.services.paper_parser import parse_full_paper
+from typing import Callable, List, Dict, Optional, Tuple, Union
+from app.config import settings
+from app.services.paper_parser import ParsedPaper, parse_paper, parse_questions_and_answers, parse_student_paper
 from app.services.preprocessing import preprocess_text
-from app.services.similarity_service import calculate_semantic_similarity
-from app.services.concept_service import calculate_concept_coverage, extract_concepts_from_text
-from app.services.strict_scoring_service import calculate_strict_marks
-from app.services.feedback_service import generate_feedback_llm
+from app.services.similarity_service import (
+    calculate_pairwise_similarities,
+    calculate_similarities_to_embeddings,
+    encode_references
+)
+from app.services.concept_service import calculate_concept_coverage_batch, extract_concepts_from_text
+from app.services.strict_scoring_service import calculate_strict_marks, is_not_answered
+from app.services.feedback_service import iter_feedback_llm
+from app.services.executor_service import get_question_executor, get_torch_thread_budget
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def _not_answered_result(item: Dict, marks_per_question: float) -> Dict:
+    """Build the result entry for a question without a usable answer"""
+    return {
+        'question_no': item['question_no'],
+        'question': item['question'],
+        'marks': 0.0,
+        'max_marks': marks_per_question,
+        'label': 'Not Answered',
+        'semantic_similarity': 0.0,
+        'concept_coverage': 0.0,
+        'covered_concepts': [],
+        'missing_concepts': [],
+        'required_concepts': [],
+        'feedback': {
+            'strengths': [],
+            'weaknesses': ['No answer provided.'],
+            'suggestions': ['Please provide an answer for this question.']
+        },
+        'status': 'not_answered',
+        'penalties_applied': {
+            'length_penalty': False,
+            'concept_gating': False
+        },
+        'reason_for_marks': 'No answer provided.'
+    }
+
+
+def _score_question(
+    item: Dict,
+    student_answer_processed: str,
+    semantic_similarity_score: float,
+    concept_data: Dict,
+    required_concepts: List[str],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    is_ocr_extracted: bool,
+    ocr_quality_score: float
+) -> Tuple[Dict, bool]:
+    """
+    Score one answered question from precomputed similarity and concept data
+    
+    Returns:
+        Tuple of (result with feedback still None, whether the answer was a
+        wrong definition)
+    """
+    semantic_similarity_percent = round(semantic_similarity_score * 100, 1)
+    
+    # Calculate marks using strict scoring
+    scoring_result = calculate_strict_marks(
+        semantic_similarity_score,
+        concept_data["coverage"],
+        semantic_weight,
+        concept_weight,
+        marks_per_question,
+        student_answer_processed,
+        concept_data["covered_concepts"],
+        required_concepts,
+        is_ocr_extracted=is_ocr_extracted,
+        ocr_quality_score=ocr_quality_score
+    )
+    
+    marks = scoring_result['marks']
+    label = scoring_result['label']
+    
+    # Map label to status for consistency
+    label_lower = label.lower().replace(' ', '_')
+    status_map = {
+        'excellent': 'excellent',
+        'very_good': 'very_good',
+        'good': 'good',
+        'average': 'average',
+        'poor': 'poor',
+        'not_answered': 'not_answered'
+    }
+    status = status_map.get(label_lower, 'average')
+    
+    result = {
+        'question_no': item['question_no'],
+        'question': item['question'],
+        'marks': marks,
+        'max_marks': marks_per_question,
+        'label': label,
+        'semantic_similarity': semantic_similarity_percent,
+        'concept_coverage': concept_data["coverage"],
+        'covered_concepts': concept_data["covered_concepts"],
+        'missing_concepts': concept_data["missing_concepts"],
+        'required_concepts': required_concepts,
+        'feedback': None,
+        'status': status,
+        'penalties_applied': {
+            'length_penalty': scoring_result['length_penalty_applied'],
+            'concept_gating': scoring_result['concept_gating_applied']
+        },
+        'reason_for_marks': scoring_result.get('reason_for_marks', 'Answer evaluated based on semantic similarity and concept coverage.'),
+        'is_ocr_extracted': is_ocr_extracted,
+        'ocr_quality_score': ocr_quality_score if is_ocr_extracted else None
+    }
+    return result, scoring_result.get('is_wrong_definition', False)
+
+
+def _feedback_request(result: Dict, model_answer_processed: str, student_answer_processed: str) -> Dict:
+    """Arguments of the feedback request for a scored question"""
+    return {
+        'question': result['question'],
+        'teacher_answer': model_answer_processed,
+        'student_answer': student_answer_processed,
+        'missing_concepts': result['missing_concepts'],
+        'final_marks': result['marks'],
+        'max_marks': result['max_marks']
+    }
+
+
+def _annotate_feedback(result: Dict, feedback: Dict, is_wrong_definition: bool) -> Dict:
+    """Add OCR and wrong-definition notes to a question's generated feedback"""
+    # Add OCR-related feedback if applicable
+    if result['is_ocr_extracted'] and result['ocr_quality_score'] < 70:
+        if 'weaknesses' not in feedback:
+            feedback['weaknesses'] = []
+        feedback['weaknesses'].append("OCR extraction limitations may affect evaluation accuracy.")
+    
+    # Update feedback if wrong definition
+    if is_wrong_definition:
+        feedback['weaknesses'].insert(0, 'Answer is conceptually incorrect.')
+    
+    return feedback
+
+
+def analyse_items(items: List[Dict], key: Optional[Dict] = None) -> List[Dict]:
+    """
+    Preprocess answered items and run the batched model passes on them
+    
+    This is the heavy part of evaluation and does not depend on OCR
+    quality or marks, so it can run for answers as they arrive and be
+    handed to _evaluate_items later (keyed by the items' content_hash).
+    
+    Args:
+        key: Optional answer key from prepare_answer_key; its preprocessed
+            model answers, required concepts and embeddings are reused so
+            only student-side work is done
+    
+    Returns:
+        One dict per item with model_answer_processed,
+        student_answer_processed, similarity, concept_data and
+        required_concepts
+    """
+    if not items:
+        return []
+    
+    if key is not None:
+        model_answers = [key['model_answers_processed'].get(item['question_no'], '') for item in items]
+    else:
+        model_answers = [preprocess_text(item['model_answer']) for item in items]
+    student_answers = [preprocess_text(item['student_answer']) for item in items]
+    
+    if key is not None:
+        # Reuse the key's model-answer embeddings and concepts
+        rows = [key['model_answer_rows'][item['question_no']] for item in items]
+        similarities = calculate_similarities_to_embeddings(key['model_answer_embeddings'][rows], student_answers)
+        required_concepts_list = [key['required_concepts'].get(item['question_no'], []) for item in items]
+    else:
+        # Encode all model and student answers in one batch
+        similarities = calculate_pairwise_similarities(model_answers, student_answers)
+        required_concepts_list = [
+            extract_concepts_from_text(model_answer, max_concepts=15)
+            for model_answer in model_answers
+        ]
+    
+    # Concept matching for all questions in batched forward passes
+    concept_data_list = calculate_concept_coverage_batch(
+        model_answers,
+        student_answers,
+        concept_lists=required_concepts_list
+    )
+    
+    return [
+        {
+            'model_answer_processed': model_answer,
+            'student_answer_processed': student_answer,
+            'similarity': similarity,
+            'concept_data': concept_data,
+            'required_concepts': required_concepts
+        }
+        for model_answer, student_answer, similarity, concept_data, required_concepts in zip(
+            model_answers, student_answers, similarities, concept_data_list, required_concepts_list
+        )
+    ]
+
+
+def _evaluate_items(
+    matched_items: List[Dict],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    is_ocr_extracted: bool = False,
+    ocr_quality_score: float = 100.0,
+    key: Optional[Dict] = None,
+    on_progress: Optional[Callable[[str, int, Dict], None]] = None,
+    analyses: Optional[Dict[str, Dict]] = None
+) -> List[Dict]:
+    """
+    Evaluate matched question items with batched model passes
+    
+    Args:
+        key: Optional answer key, see analyse_items
+        on_progress: Optional callback called as (stage, index, result),
+            with stage "scored" once a question has marks and "feedback"
+            once its feedback is attached
+        analyses: Optional analyse_items results by item content_hash;
+            only items without one go through the model passes
+    
+    Returns:
+        Question-wise results in the order of matched_items
+    """
+    # Separate the answered questions from the ones without an answer
+    question_wise_results = [None] * len(matched_items)
+    answered = []  # (index, item)
+    for index, item in enumerate(matched_items):
+        if not item['has_student_answer'] or is_not_answered(item['student_answer']):
+            question_wise_results[index] = _not_answered_result(item, marks_per_question)
+            if on_progress:
+                on_progress('scored', index, question_wise_results[index])
+                on_progress('feedback', index, question_wise_results[index])
+            continue
+        answered.append((index, item))
+    
+    analyses = analyses or {}
+    computed = iter(analyse_items(
+        [item for _, item in answered if item.get('content_hash') not in analyses],
+        key
+    ))
+    item_analyses = [
+        analyses[item['content_hash']] if item.get('content_hash') in analyses else next(computed)
+        for _, item in answered
+    ]
+    
+    # Score every question first (items may carry their own OCR metadata)
+    wrong_definitions = []
+    for (index, item), analysis in zip(answered, item_analyses):
+        result, is_wrong_definition = _score_question(
+            item,
+            analysis['student_answer_processed'],
+            analysis['similarity'],
+            analysis['concept_data'],
+            analysis['required_concepts'],
+            marks_per_question,
+            semantic_weight,
+            concept_weight,
+            item.get('is_ocr_extracted', is_ocr_extracted),
+            item.get('ocr_quality_score', ocr_quality_score)
+        )
+        question_wise_results[index] = result
+        wrong_definitions.append(is_wrong_definition)
+        if on_progress:
+            on_progress('scored', index, result)
+    
+    # Then generate feedback, the slow (LLM) part: all requests go out at once
+    requests = [
+        _feedback_request(question_wise_results[index], analysis['model_answer_processed'], analysis['student_answer_processed'])
+        for (index, _), analysis in zip(answered, item_analyses)
+    ]
+    for position, feedback in iter_feedback_llm(requests):
+        index = answered[position][0]
+        result = question_wise_results[index]
+        result['feedback'] = _annotate_feedback(result, feedback, wrong_definitions[position])
+        if on_progress:
+            on_progress('feedback', index, result)
+    
+    return question_wise_results
+
+
+def _evaluate_items_parallel(
+    matched_items: List[Dict],
+    workers: int,
+    *args,
+    on_progress: Optional[Callable[[str, int, Dict], None]] = None
+) -> List[Dict]:
+    """
+    Spread question evaluation over a pool of worker processes
+    
+    Items are split into contiguous chunks (one per worker) so each worker
+    still batches its forward passes. Results keep the original order;
+    progress is reported per chunk as each worker finishes.
+    """
+    chunk_size = math.ceil(len(matched_items) / workers)
+    chunks = [matched_items[i:i + chunk_size] for i in range(0, len(matched_items), chunk_size)]
+    
+    executor = get_question_executor(workers)
+    futures = [executor.submit(_evaluate_items, chunk, *args) for chunk in chunks]
+    
+    question_wise_results = []
+    for future in futures:
+        chunk_results = future.result()
+        if on_progress:
+            for offset, result in enumerate(chunk_results, start=len(question_wise_results)):
+                on_progress('scored', offset, result)
+                on_progress('feedback', offset, result)
+        question_wise_results.extend(chunk_results)
+    return question_wise_results
+
+
+def build_summary(question_wise_results: List[Dict], marks_per_question: float) -> Dict:
+    """
+    Build the paper summary block from question-wise results
+    """
+    total_questions = len(question_wise_results)
+    total_marks_obtained = sum(r['marks'] for r in question_wise_results)
+    
+    total_marks = total_questions * marks_per_question
+    overall_percentage = (total_marks_obtained / total_marks) * 100 if total_marks > 0 else 0
+    
+    # Determine overall performance based on percentage (STRICT MAPPING)
+    # This ensures labels match marks accurately
+    if overall_percentage >= 90:
+        overall_performance = 'Excellent'
+    elif overall_percentage >= 75:
+        overall_performance = 'Very Good'
+    elif overall_percentage >= 55:
+        overall_performance = 'Good'
+    elif overall_percentage >= 35:
+        overall_performance = 'Average'
+    elif overall_percentage > 0:
+        overall_performance = 'Poor'
+    else:
+        overall_performance = 'Not Answered'
+    
+    # Calculate statistics based on labels (accurate counts)
+    answered_count = sum(1 for r in question_wise_results if r.get('label') != 'Not Answered' and r['status'] != 'not_answered')
+    not_answered_count = sum(1 for r in question_wise_results if r.get('label') == 'Not Answered' or r['status'] == 'not_answered')
+    excellent_count = sum(1 for r in question_wise_results if r.get('label') == 'Excellent')
+    very_good_count = sum(1 for r in question_wise_results if r.get('label') == 'Very Good')
+    good_count = sum(1 for r in question_wise_results if r.get('label') == 'Good')
+    average_count = sum(1 for r in question_wise_results if r.get('label') == 'Average')
+    poor_count = sum(1 for r in question_wise_results if r.get('label') == 'Poor' and r.get('label') != 'Not Answered')
+    
+    summary = {
+        'total_questions': total_questions,
+        'total_marks': round(total_marks, 1),
+        'marks_obtained': round(total_marks_obtained, 1),
+        'overall_percentage': round(overall_percentage, 1),
+        'overall_performance': overall_performance,
+        'answered_questions': answered_count,
+        'not_answered_questions': not_answered_count,
+        'statistics': {
+            'excellent': excellent_count,
+            'very_good': very_good_count,
+            'good': good_count,
+            'average': average_count,
+            'poor': poor_count,
+            'not_answered': not_answered_count
+        }
+    }
+    
+    return summary
+
+
 def evaluate_full_paper(
-    questions_text: str,
-    model_answers_text: str,
-    student_answers_text: str,
+    questions_text: Optional[str],
+    model_answers_text: Optional[str],
+    student_answers_text: Optional[str],
     marks_per_question: float,
     semantic_weight: float,
     concept_weight: float,
     is_ocr_extracted: bool = False,
-    ocr_quality_score: float = 100.0
+    ocr_quality_score: float = 100.0,
+    parallel_workers: Optional[int] = None,
+    on_progress: Optional[Callable[[str, int, Dict], None]] = None,
+    paper: Optional[ParsedPaper] = None,
+    analyses: Optional[Dict[str, Dict]] = None
 ) -> Dict:
     """
     Evaluate a full question paper with multiple questions
     
+    Args:
+        parallel_workers: Number of worker processes for per-question
+            evaluation (defaults to PARALLEL_QUESTION_WORKERS; 0 or 1 runs
+            sequentially)
+        on_progress: Optional per-question progress callback, see _evaluate_items
+        paper: Already parsed and matched paper; its items (and their OCR
+            metadata) are evaluated as-is and the texts are ignored
+        analyses: Optional precomputed model passes, see _evaluate_items
+    
     Returns:
         Complete evaluation report with question-wise results and summary
     """
     try:
-        # Step 1: Parse and match questions with answers
-        matched_items = parse_full_paper(
-            questions_text,
-            model_answers_text,
-            student_answers_text
-        )
+        # Step 1: Parse and match questions with answers (unless already done)
+        if paper is None:
+            paper = parse_paper(
+                questions_text,
+                model_answers_text,
+                student_answers_text
+            )
+        matched_items = paper.items
         
         if not matched_items:
             raise ValueError("No questions matched successfully")
         
-        # Step 2: Evaluate each question
-        question_wise_results = []
-        total_marks_obtained = 0.0
-        total_questions = len(matched_items)
+        # Step 2: Evaluate questions (batched, optionally across workers)
+        if parallel_workers is None:
+            parallel_workers = settings.PARALLEL_QUESTION_WORKERS
         
-        for item in matched_items:
-            question_no = item['question_no']
-            question = item['question']
-            model_answer = item['model_answer']
-            student_answer = item['student_answer']
-            has_answer = item['has_student_answer']
-            
-            # Check if not answered (using strict detection)
-            from app.services.strict_scoring_service import is_not_answered
-            
-            if not has_answer or is_not_answered(student_answer):
-                result = {
-                    'question_no': question_no,
-                    'question': question,
-                    'marks': 0.0,
-                    'max_marks': marks_per_question,
-                    'label': 'Not Answered',
-                    'semantic_similarity': 0.0,
-                    'concept_coverage': 0.0,
-                    'covered_concepts': [],
-                    'missing_concepts': [],
-                    'required_concepts': [],
-                    'feedback': {
-                        'strengths': [],
-                        'weaknesses': ['No answer provided.'],
-                        'suggestions': ['Please provide an answer for this question.']
-                    },
-                    'status': 'not_answered',
-                    'penalties_applied': {
-                        'length_penalty': False,
-                        'concept_gating': False
-                    },
-                    'reason_for_marks': 'No answer provided.'
-                }
-                question_wise_results.append(result)
-                continue
-            
-            # Preprocess texts
-            model_answer_processed = preprocess_text(model_answer)
-            student_answer_processed = preprocess_text(student_answer)
-            
-            # Calculate semantic similarity
-            semantic_similarity_score = calculate_semantic_similarity(
-                model_answer_processed,
-                student_answer_processed
-            )
-            semantic_similarity_percent = round(semantic_similarity_score * 100, 1)
-            
-            # Calculate concept coverage
-            concept_data = calculate_concept_coverage(
-                model_answer_processed,
-                student_answer_processed
-            )
-            
-            # Extract required concepts from model answer for gating
-            required_concepts = extract_concepts_from_text(model_answer_processed, max_concepts=15)
-            
-            # Calculate marks using strict scoring
-            scoring_result = calculate_strict_marks(
-                semantic_similarity_score,
-                concept_data["coverage"],
-                semantic_weight,
-                concept_weight,
-                marks_per_question,
-                student_answer_processed,
-                concept_data["covered_concepts"],
-                required_concepts,
-                is_ocr_extracted=is_ocr_extracted,
-                ocr_quality_score=ocr_quality_score
-            )
-            
-            marks = scoring_result['marks']
-            label = scoring_result['label']
-            
-            # Generate feedback
-            feedback = generate_feedback_llm(
-                question=question,
-                teacher_answer=model_answer_processed,
-                student_answer=student_answer_processed,
-                missing_concepts=concept_data["missing_concepts"],
-                final_marks=marks,
-                max_marks=marks_per_question
-            )
-            
-            # Add OCR-related feedback if applicable
-            if is_ocr_extracted and ocr_quality_score < 70:
-                if 'weaknesses' not in feedback:
-                    feedback['weaknesses'] = []
-                feedback['weaknesses'].append("OCR extraction limitations may affect evaluation accuracy.")
-            
-            # Map label to status for consistency
-            label_lower = label.lower().replace(' ', '_')
-            status_map = {
-                'excellent': 'excellent',
-                'very_good': 'very_good',
-                'good': 'good',
-                'average': 'average',
-                'poor': 'poor',
-                'not_answered': 'not_answered'
-            }
-            status = status_map.get(label_lower, 'average')
-            
-            # Update feedback if wrong definition
-            if scoring_result.get('is_wrong_definition', False):
-                feedback['weaknesses'].insert(0, 'Answer is conceptually incorrect.')
-            
-            result = {
-                'question_no': question_no,
-                'question': question,
-                'marks': marks,
-                'max_marks': marks_per_question,
-                'label': label,
-                'semantic_similarity': semantic_similarity_percent,
-                'concept_coverage': concept_data["coverage"],
-                'covered_concepts': concept_data["covered_concepts"],
-                'missing_concepts': concept_data["missing_concepts"],
-                'required_concepts': required_concepts,
-                'feedback': feedback,
-                'status': status,
-                'penalties_applied': {
-                    'length_penalty': scoring_result['length_penalty_applied'],
-                    'concept_gating': scoring_result['concept_gating_applied']
-                },
-                'reason_for_marks': scoring_result.get('reason_for_marks', 'Answer evaluated based on semantic similarity and concept coverage.'),
-                'is_ocr_extracted': is_ocr_extracted,
-                'ocr_quality_score': ocr_quality_score if is_ocr_extracted else None
-            }
-            
-            question_wise_results.append(result)
-            total_marks_obtained += marks
-        
-        # Step 3: Calculate summary
-        total_marks = total_questions * marks_per_question
-        overall_percentage = (total_marks_obtained / total_marks) * 100 if total_marks > 0 else 0
-        
-        # Determine overall performance based on percentage (STRICT MAPPING)
-        # This ensures labels match marks accurately
-        if overall_percentage >= 90:
-            overall_performance = 'Excellent'
-        elif overall_percentage >= 75:
-            overall_performance = 'Very Good'
-        elif overall_percentage >= 55:
-            overall_performance = 'Good'
-        elif overall_percentage >= 35:
-            overall_performance = 'Average'
-        elif overall_percentage > 0:
-            overall_performance = 'Poor'
+        args = (marks_per_question, semantic_weight, concept_weight, is_ocr_extracted, ocr_quality_score)
+        # With precomputed analyses only scoring and feedback are left, so stay in-process
+        if parallel_workers > 1 and len(matched_items) > 1 and not analyses:
+            question_wise_results = _evaluate_items_parallel(matched_items, parallel_workers, *args, on_progress=on_progress)
         else:
-            overall_performance = 'Not Answered'
-        
-        # Calculate statistics based on labels (accurate counts)
-        answered_count = sum(1 for r in question_wise_results if r.get('label') != 'Not Answered' and r['status'] != 'not_answered')
-        not_answered_count = sum(1 for r in question_wise_results if r.get('label') == 'Not Answered' or r['status'] == 'not_answered')
-        excellent_count = sum(1 for r in question_wise_results if r.get('label') == 'Excellent')
-        very_good_count = sum(1 for r in question_wise_results if r.get('label') == 'Very Good')
-        good_count = sum(1 for r in question_wise_results if r.get('label') == 'Good')
-        average_count = sum(1 for r in question_wise_results if r.get('label') == 'Average')
-        poor_count = sum(1 for r in question_wise_results if r.get('label') == 'Poor' and r.get('label') != 'Not Answered')
+            question_wise_results = _evaluate_items(matched_items, *args, on_progress=on_progress, analyses=analyses)
         
-        summary = {
-            'total_questions': total_questions,
-            'total_marks': round(total_marks, 1),
-            'marks_obtained': round(total_marks_obtained, 1),
-            'overall_percentage': round(overall_percentage, 1),
-            'overall_performance': overall_performance,
-            'answered_questions': answered_count,
-            'not_answered_questions': not_answered_count,
-            'statistics': {
-                'excellent': excellent_count,
-                'very_good': very_good_count,
-                'good': good_count,
-                'average': average_count,
-                'poor': poor_count,
-                'not_answered': not_answered_count
-            }
-        }
+        # Step 3: Calculate summary
+        summary = build_summary(question_wise_results, marks_per_question)
         
         return {
             'summary': summary,
@@ -228,3 +439,150 @@ def evaluate_full_paper(
         logger.error(f"Error evaluating full paper: {e}", exc_info=True)
         raise
 
+
+
+def prepare_answer_key(questions_text: str, model_answers_text: str) -> Dict:
+    """
+    Parse and precompute the key side of a paper once for many students
+    
+    Returns:
+        dict with parsed questions and model answers, preprocessed model
+        answers, required concepts and model-answer embeddings, all keyed
+        by question number
+    """
+    questions = parse_questions_and_answers(questions_text)
+    model_answers = parse_questions_and_answers(model_answers_text)
+    
+    if not questions:
+        raise ValueError("No questions found in the question paper")
+    
+    if not model_answers:
+        raise ValueError("No model answers found")
+    
+    model_dict = {item['number']: item['content'] for item in model_answers}
+    question_numbers = [question['number'] for question in questions]
+    
+    model_answers_processed = {
+        number: preprocess_text(model_dict.get(number, ''))
+        for number in question_numbers
+    }
+    required_concepts = {
+        number: extract_concepts_from_text(processed, max_concepts=15)
+        for number, processed in model_answers_processed.items()
+    }
+    
+    ordered_numbers = list(model_answers_processed.keys())
+    embeddings = encode_references([model_answers_processed[number] for number in ordered_numbers])
+    
+    return {
+        'questions': questions,
+        'model_answers': model_answers,
+        'model_answers_processed': model_answers_processed,
+        'required_concepts': required_concepts,
+        'model_answer_rows': {number: row for row, number in enumerate(ordered_numbers)},
+        'model_answer_embeddings': embeddings
+    }
+
+
+def evaluate_students_against_key(
+    key: Dict,
+    student_answers_texts: List[Union[str, ParsedPaper]],
+    marks_per_question: float,
+    semantic_weight: float,
+    concept_weight: float,
+    ocr_quality_scores: Optional[List[Optional[float]]] = None,
+    on_progress: Optional[Callable[[str, int, Dict], None]] = None,
+    analyses: Optional[Dict[str, Dict]] = None
+) -> List[Dict]:
+    """
+    Evaluate several students' answer sheets against a prepared answer key
+    
+    All students' answers go through the same batched model passes.
+    
+    Args:
+        student_answers_texts: Answer sheet texts, or papers already parsed
+            against the key (parse_student_paper), which are not parsed again
+        ocr_quality_scores: Optional per-student OCR quality; None entries
+            mark sheets that were not OCR-extracted
+        on_progress: Optional per-question progress callback, see
+            _evaluate_items (indices run across all students' questions)
+        analyses: Optional precomputed model passes, see _evaluate_items
+    
+    Returns:
+        One report per student, each shaped like evaluate_full_paper's result
+    """
+    all_items = []
+    counts = []
+    for student_index, student_answers in enumerate(student_answers_texts):
+        if not isinstance(student_answers, ParsedPaper):
+            student_answers = parse_student_paper(key['questions'], key['model_answers'], student_answers)
+        quality = ocr_quality_scores[student_index] if ocr_quality_scores else None
+        if quality is not None:
+            student_answers.set_ocr_metadata(quality)
+        all_items.extend(student_answers.items)
+        counts.append(len(student_answers))
+    
+    all_results = _evaluate_items(
+        all_items,
+        marks_per_question,
+        semantic_weight,
+        concept_weight,
+        key=key,
+        on_progress=on_progress,
+        analyses=analyses
+    )
+    
+    reports = []
+    offset = 0
+    for count in counts:
+        question_wise_results = all_results[offset:offset + count]
+        offset += count
+        reports.append({
+            'summary': build_summary(question_wise_results, marks_per_question),
+            'question_wise_results': question_wise_results
+        })
+    return reports
+
+
+def benchmark_parallel_evaluation(
+    questions_text: str,
+    model_answers_text: str,
+    student_answers_text: str,
+    worker_counts: List[int],
+    marks_per_question: float = 10.0,
+    repeats: int = 1
+) -> List[Dict]:
+    """
+    Time the sequential path against parallel evaluation for each worker count
+    
+    Each pool is warmed up once (model loading) before timing.
+    
+    Returns:
+        List of dicts with workers, torch_threads, seconds and speedup
+    """
+    def _time(workers: int) -> float:
+        evaluate_full_paper(
+            questions_text, model_answers_text, student_answers_text,
+            marks_per_question, 0.5, 0.5, parallel_workers=workers
+        )
+        started = time.perf_counter()
+        for _ in range(repeats):
+            evaluate_full_paper(
+                questions_text, model_answers_text, student_answers_text,
+                marks_per_question, 0.5, 0.5, parallel_workers=workers
+            )
+        return (time.perf_counter() - started) / repeats
+    
+    sequential = _time(0)
+    report = [{'workers': 1, 'torch_threads': None, 'seconds': round(sequential, 3), 'speedup': 1.0}]
+    for workers in worker_counts:
+        if workers <= 1:
+            continue
+        elapsed = _time(workers)
+        report.append({
+            'workers': workers,
+            'torch_threads': get_torch_thread_budget(workers),
+            'seconds': round(elapsed, 3),
+            'speedup': round(sequential / elapsed, 2) if elapsed > 0 else None
+        })
+    return report
@@ -0,0 +1,370 @@
+from app.config import settings
+from app.database import db as database
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import copy
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict, "JobProgress"], Awaitable[Dict]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def register_job_handler(job_type: str, handler: JobHandler):
+    """Register the coroutine that runs jobs of a type as handler(payload, progress)"""
+    _handlers[job_type] = handler
+
+
+class JobProgress:
+    """
+    Per-stage progress and partial results of a running job
+
+    Updated from event-loop code and from executor threads (evaluation
+    callbacks), so every change is taken under a lock. The job worker
+    periodically flushes snapshots to the job store.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+        self._partial_results: Dict[int, Dict] = {}
+        self._version = 0
+
+    def add_total(self, stage: str, count: int):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {'done': 0, 'total': 0})
+            entry['total'] += count
+            self._version += 1
+
+    def advance(self, stage: str, count: int = 1):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {'done': 0, 'total': 0})
+            entry['done'] += count
+            self._version += 1
+
+    def set_partial_result(self, index: int, result: Dict):
+        with self._lock:
+            self._partial_results[index] = copy.deepcopy(result)
+            self._version += 1
+
+    def question_callback(self, total: int, record_results: bool = True, offset: int = 0):
+        """
+        Build an on_progress callback for full_paper_evaluator
+
+        Counts questions_scored and feedback; with record_results each
+        question's latest result is kept as a partial result at offset + index.
+        """
+        self.add_total('questions_scored', total)
+        self.add_total('feedback', total)
+
+        def _on_progress(stage: str, index: int, result: Dict):
+            self.advance('questions_scored' if stage == 'scored' else 'feedback')
+            if record_results:
+                self.set_partial_result(offset + index, result)
+
+        return _on_progress
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'progress': copy.deepcopy(self._stages),
+                'partial_results': [self._partial_results[i] for i in sorted(self._partial_results)]
+            }
+
+
+class InMemoryJobStore:
+    """Process-local job store, used when MongoDB is not configured and in tests"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._files: Dict[str, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    async def insert(self, job: Dict):
+        async with self._lock:
+            self._jobs[job['job_id']] = job
+
+    async def claim(self, lease_seconds: float, max_attempts: int) -> Optional[Dict]:
+        async with self._lock:
+            now = datetime.utcnow()
+            stale_before = now - timedelta(seconds=lease_seconds)
+            for job in sorted(self._jobs.values(), key=lambda j: j['created_at']):
+                if job['status'] == 'queued' or (job['status'] == 'running' and job['heartbeat_at'] < stale_before):
+                    if job['attempts'] >= max_attempts:
+                        job.update(status='failed', error=f"Job did not finish after {max_attempts} attempts", finished_at=now)
+                        job.pop('payload', None)
+                    else:
+                        job.update(status='running', started_at=now, heartbeat_at=now, attempts=job['attempts'] + 1)
+                    return dict(job)
+            return None
+
+    async def update(self, job_id: str, fields: Dict, unset: tuple = ()):
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            for field in unset:
+                job.pop(field, None)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return {k: v for k, v in job.items() if k not in ('payload', 'file_ids')}
+
+    async def put_file(self, data: bytes) -> str:
+        file_id = uuid.uuid4().hex
+        self._files[file_id] = data
+        return file_id
+
+    async def get_file(self, file_id: str) -> bytes:
+        return self._files[file_id]
+
+    async def delete_file(self, file_id: str):
+        self._files.pop(file_id, None)
+
+
+class MongoJobStore:
+    """
+    Job store in the "jobs" collection, shared by every API process
+
+    Uploaded files go to the "job_files" GridFS bucket, so job documents
+    stay under MongoDB's 16 MB document limit.
+    """
+
+    async def insert(self, job: Dict):
+        if await database.insert_job(job) is None:
+            raise RuntimeError("Database not connected")
+
+    async def claim(self, lease_seconds: float, max_attempts: int) -> Optional[Dict]:
+        return await database.claim_next_job(lease_seconds, max_attempts)
+
+    async def update(self, job_id: str, fields: Dict, unset: tuple = ()):
+        await database.update_job(job_id, fields, unset)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await database.get_job(job_id)
+
+    async def put_file(self, data: bytes) -> str:
+        file_id = await database.save_job_file(data)
+        if file_id is None:
+            raise RuntimeError("Database not connected")
+        return file_id
+
+    async def get_file(self, file_id: str) -> bytes:
+        return await database.get_job_file(file_id)
+
+    async def delete_file(self, file_id: str):
+        await database.delete_job_file(file_id)
+
+
+class JobManager:
+    """
+    Queue of long-running evaluation jobs
+
+    Submitting stores the job and returns its ID immediately. JOB_WORKERS
+    worker tasks per process claim queued jobs from the store, run the
+    registered handler and flush progress, partial results and a heartbeat
+    every JOB_PROGRESS_INTERVAL seconds. Jobs whose worker stops heartbeating
+    for JOB_LEASE_SECONDS are picked up again by another worker, up to
+    JOB_MAX_ATTEMPTS claims in all; after that the job is marked failed.
+
+    Uploaded files are kept in the store (put_file) and payloads reference
+    them by ID; a job's files are deleted once it has finished.
+    """
+
+    def __init__(self, store, workers: int, poll_interval: float):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.running_jobs = 0
+
+    async def start(self):
+        for worker_index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"job-worker-{worker_index}"))
+        logger.info(f"Started {self.workers} job workers ({type(self.store).__name__})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, job_type: str, payload: Dict, file_ids: List[str] = ()) -> str:
+        """Queue a job whose payload references file_ids (from put_file) and return its ID"""
+        if job_type not in _handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+
+        now = datetime.utcnow()
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'type': job_type,
+            'status': 'queued',
+            'payload': payload,
+            'file_ids': list(file_ids),
+            'progress': {},
+            'partial_results': [],
+            'result': None,
+            'error': None,
+            'attempts': 0,
+            'created_at': now,
+            'started_at': None,
+            'heartbeat_at': None,
+            'finished_at': None
+        }
+        try:
+            await self.store.insert(job)
+        except Exception:
+            await self.delete_files(file_ids)
+            raise
+        self._wakeup.set()
+        return job['job_id']
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.store.get(job_id)
+
+    async def put_file(self, data: bytes) -> str:
+        """Store an uploaded file for a job payload and return its ID"""
+        return await self.store.put_file(data)
+
+    async def get_file(self, file_id: str) -> bytes:
+        return await self.store.get_file(file_id)
+
+    async def delete_files(self, file_ids: List[str]):
+        for file_id in file_ids:
+            try:
+                await self.store.delete_file(file_id)
+            except Exception as e:
+                logger.warning(f"Could not delete job file {file_id}: {e}")
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.store.claim(settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS)
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+
+            if job is not None and job['status'] == 'failed':
+                # Out of attempts: the store already marked it failed instead of running it
+                logger.error(f"Job {job['job_id']} failed: {job['error']}")
+                await self.delete_files(job.get('file_ids', []))
+                continue
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.running_jobs += 1
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive; the job is retried once its lease expires
+                logger.error(f"Error running job {job['job_id']}: {e}", exc_info=True)
+            finally:
+                self.running_jobs -= 1
+
+    async def _flush(self, job_id: str, progress: JobProgress):
+        last_version = -1
+        while True:
+            await asyncio.sleep(settings.JOB_PROGRESS_INTERVAL)
+            fields = {'heartbeat_at': datetime.utcnow()}
+            if progress.version != last_version:
+                last_version = progress.version
+                fields.update(progress.snapshot())
+            try:
+                await self.store.update(job_id, fields)
+            except Exception as e:
+                logger.warning(f"Could not flush progress of job {job_id}: {e}")
+
+    async def _run_job(self, job: Dict):
+        job_id = job['job_id']
+        handler = _handlers.get(job['type'])
+        progress = JobProgress()
+        flusher = asyncio.create_task(self._flush(job_id, progress))
+        logger.info(f"Running job {job_id} ({job['type']}, attempt {job['attempts']})")
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type '{job['type']}'")
+            result = await handler(job['payload'], progress)
+            fields = {
+                'status': 'completed',
+                'result': result,
+                'progress': progress.snapshot()['progress'],
+                'partial_results': []
+            }
+        except asyncio.CancelledError:
+            flusher.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            fields = {
+                'status': 'failed',
+                'error': str(getattr(e, 'detail', None) or e),
+                **progress.snapshot()
+            }
+        finally:
+            flusher.cancel()
+
+        fields['finished_at'] = datetime.utcnow()
+        try:
+            await self.store.update(job_id, fields, unset=('payload',))
+        except Exception as e:
+            logger.error(f"Could not store {fields['status']} job {job_id}; it is retried once its lease expires: {e}")
+            return
+        await self.delete_files(job.get('file_ids', []))
+        logger.info(f"Job {job_id} {fields['status']}")
+
+    def stats(self) -> Dict:
+        return {
+            'store': type(self.store).__name__,
+            'workers': self.workers,
+            'running_jobs': self.running_jobs
+        }
+
+
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Get the job manager; start_job_workers must have run"""
+    if _job_manager is None:
+        raise RuntimeError("Job workers are not running")
+    return _job_manager
+
+
+async def start_job_workers():
+    """Create the job manager on the configured store and start its workers"""
+    global _job_manager
+    connected = database.db.database is not None
+    if settings.JOB_STORE == "mongo" and not connected:
+        logger.warning("JOB_STORE is 'mongo' but MongoDB is not connected; jobs are kept in memory")
+    store = MongoJobStore() if settings.JOB_STORE in ("mongo", "auto") and connected else InMemoryJobStore()
+    _job_manager = JobManager(store, settings.JOB_WORKERS, settings.JOB_POLL_INTERVAL)
+    await _job_manager.start()
+
+
+async def stop_job_workers():
+    global _job_manager
+    if _job_manager is not None:
+        await _job_manager.stop()
+        _job_manager = None
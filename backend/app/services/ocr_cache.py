@@ -0,0 +1,175 @@
+from app.config import settings
+from app.services.ocr_engine import get_ocr_engine_name
+from typing import Callable, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Puts between full scans of the cache directory (to pick up other processes' writes)
+RESCAN_EVERY_PUTS = 100
+
+
+def ocr_settings_fingerprint() -> Dict:
+    """
+    OCR settings that change the extracted text, part of every cache key
+
+    The engine is the configured OCR_ENGINE ("auto" included), so the key
+    doesn't depend on what the calling process has installed; entries
+    record the engine the OCR workers actually used.
+    """
+    return {
+        'engine': get_ocr_engine_name(),
+        'lang': settings.OCR_LANG,
+        'mode': settings.OCR_MODE,
+        'dpi': settings.OCR_DPI,
+        'low_dpi': settings.OCR_LOW_DPI,
+        'retry_confidence': settings.OCR_RETRY_CONFIDENCE,
+        'native_text_min_chars': settings.NATIVE_TEXT_MIN_CHARS
+    }
+
+
+def ocr_cache_key(file_bytes: bytes, content_type: str) -> str:
+    """SHA-256 of the file bytes, content type and OCR settings"""
+    digest = hashlib.sha256(file_bytes)
+    digest.update(b"\0" + content_type.encode())
+    digest.update(b"\0" + json.dumps(ocr_settings_fingerprint(), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """
+    OCR results on disk, one JSON file per document
+
+    Entries are written to a temp file and renamed into place, so the API
+    process and the OCR pool processes can share the directory without
+    locking. A hit refreshes the entry's modification time; when the
+    directory grows past max_bytes the least recently used entries are
+    deleted. The directory size is tracked as entries are written and only
+    rescanned when it may be over the limit or every RESCAN_EVERY_PUTS puts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes: Optional[int] = None  # directory size as of the last scan, plus later puts
+        self._puts_since_scan = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str, accept: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Get an entry; entries that accept rejects (e.g. an older format) count as misses"""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            value = None
+        if value is None or (accept is not None and not accept(value)):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Dict):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = json.dumps(value).encode()
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write OCR cache entry: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._puts_since_scan += 1
+            if self._bytes is not None:
+                self._bytes += len(data) - previous_size
+            scan = self._bytes is None or self._bytes > self.max_bytes or self._puts_since_scan >= RESCAN_EVERY_PUTS
+        if scan:
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # already evicted by another process
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+        with self._lock:
+            self._bytes = total
+            self._puts_since_scan = 0
+
+    def stats(self) -> Dict:
+        entries = self._entries()
+        return {
+            'directory': self.directory,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_ocr_cache: Optional[OcrCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OcrCache]:
+    """Get this process's OCR cache, or None when OCR_CACHE_DIR is empty"""
+    global _ocr_cache
+    if not settings.OCR_CACHE_DIR or settings.OCR_CACHE_MAX_BYTES <= 0:
+        return None
+    with _ocr_cache_lock:
+        if _ocr_cache is None or _ocr_cache.directory != settings.OCR_CACHE_DIR:
+            try:
+                _ocr_cache = OcrCache(settings.OCR_CACHE_DIR, settings.OCR_CACHE_MAX_BYTES)
+            except OSError as e:
+                logger.warning(f"OCR cache unavailable: {e}")
+                return None
+        return _ocr_cache
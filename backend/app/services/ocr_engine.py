@@ -0,0 +1,194 @@
+from app.config import settings
+from typing import Dict, List, Optional
+import importlib.util
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ("auto", "tesserocr", "pytesseract")
+
+# Columns of tesseract's TSV output, as parsed by pytesseract.image_to_data
+TSV_COLUMNS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text'
+)
+
+
+def get_ocr_engine_name() -> str:
+    """Get the configured OCR engine, validated against ENGINES"""
+    engine = settings.OCR_ENGINE.lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown OCR_ENGINE '{settings.OCR_ENGINE}'. Expected one of {ENGINES}")
+    return engine
+
+
+class PytesseractEngine:
+    """Runs the tesseract CLI per call (new process, temp image file, model load)"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_data(self, image) -> Dict[str, List]:
+        return self._pytesseract.image_to_data(image, lang=self.lang, output_type=self._pytesseract.Output.DICT)
+
+
+class TesserocrEngine:
+    """
+    Keeps a tesseract API handle loaded in this thread
+
+    Images are handed over as raw pixel buffers, so there is no process
+    spawn, temp file or language model reload per page. Tesseract handles
+    are not thread-safe; get_ocr_engine keeps one per thread.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str):
+        import tesserocr
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+        self.lang = lang
+
+    def image_to_data(self, image) -> Dict[str, List]:
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('L' if image.mode in ('1', 'LA', 'I', 'I;16', 'F') else 'RGB')
+        bytes_per_pixel = 1 if image.mode == 'L' else 3
+
+        try:
+            self._api.SetImageBytes(image.tobytes(), image.width, image.height, bytes_per_pixel, image.width * bytes_per_pixel)
+            dpi = image.info.get('dpi')
+            if dpi:
+                self._api.SetSourceResolution(int(dpi[0]))
+            tsv = self._api.GetTSVText(0)
+        finally:
+            self._api.Clear()
+
+        return parse_tsv(tsv)
+
+    def close(self):
+        self._api.End()
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """Parse tesseract TSV rows into pytesseract's image_to_data DICT layout"""
+    data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t', len(TSV_COLUMNS) - 1)
+        if len(fields) < len(TSV_COLUMNS) - 1 or not fields[0].isdigit():
+            continue
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column == 'text':
+                data[column].append(value)
+            else:
+                # int(float()) like pytesseract, so confidences match across engines
+                data[column].append(int(float(value)))
+    return data
+
+
+_local = threading.local()
+
+
+def create_ocr_engine(name: str, lang: Optional[str] = None):
+    """Create an engine by name ("tesserocr" or "pytesseract")"""
+    lang = lang or settings.OCR_LANG
+    if name == "tesserocr":
+        return TesserocrEngine(lang)
+    if name == "pytesseract":
+        return PytesseractEngine(lang)
+    raise ValueError(f"Unknown OCR engine '{name}'")
+
+
+def resolve_ocr_engine_name() -> str:
+    """
+    Name of the engine this worker uses (or would use) without starting one
+
+    "auto" resolves to tesserocr when it is importable.
+    """
+    engine = getattr(_local, 'engine', None)
+    if engine is not None:
+        return engine.name
+    name = get_ocr_engine_name()
+    if name == "auto":
+        return "tesserocr" if importlib.util.find_spec("tesserocr") else "pytesseract"
+    return name
+
+
+def get_ocr_engine():
+    """
+    Get this thread's OCR engine, creating it on first use
+
+    OCR runs in pool workers (processes, or inference threads when
+    OCR_WORKERS=0), so each worker keeps its own warm engine. "auto" uses
+    tesserocr when it is installed and can load the language data, and
+    falls back to pytesseract otherwise.
+    """
+    engine = getattr(_local, 'engine', None)
+    if engine is not None:
+        return engine
+
+    name = get_ocr_engine_name()
+    if name == "pytesseract":
+        engine = create_ocr_engine("pytesseract")
+    else:
+        try:
+            engine = create_ocr_engine("tesserocr")
+        except Exception as e:
+            if name == "tesserocr":
+                raise RuntimeError(f"tesserocr engine is not available: {e}") from e
+            logger.info(f"tesserocr not available ({e}); using pytesseract")
+            engine = create_ocr_engine("pytesseract")
+
+    _local.engine = engine
+    return engine
+
+
+def benchmark_ocr_engines(images: List, engines=("pytesseract", "tesserocr"), repeats: int = 3) -> List[Dict]:
+    """
+    Measure per-page OCR latency of each engine on the same images
+
+    The first page of the first pass is reported separately (it includes
+    engine start-up); the per-page figure is the mean over the remaining
+    calls.
+
+    Returns:
+        One dict per engine with engine, pages, first_page_ms, ms_per_page
+        and speedup (relative to the first engine), or error when the
+        engine is unavailable
+    """
+    report = []
+    for name in engines:
+        try:
+            start = time.perf_counter()
+            engine = create_ocr_engine(name)
+            timings = []
+            for _ in range(repeats):
+                for image in images:
+                    engine.image_to_data(image)
+                    timings.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+            if hasattr(engine, 'close'):
+                engine.close()
+        except Exception as e:
+            logger.warning(f"OCR engine {name} failed: {e}")
+            report.append({'engine': name, 'error': str(e)})
+            continue
+
+        warm = timings[1:] or timings
+        report.append({
+            'engine': name,
+            'pages': len(timings),
+            'first_page_ms': round(timings[0] * 1000, 1),
+            'ms_per_page': round(sum(warm) / len(warm) * 1000, 1)
+        })
+
+    baseline = next((row['ms_per_page'] for row in report if 'ms_per_page' in row), None)
+    for row in report:
+        if 'ms_per_page' in row and baseline:
+            row['speedup'] = round(baseline / row['ms_per_page'], 2) if row['ms_per_page'] else None
+    return report
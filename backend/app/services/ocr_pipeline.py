@@ -0,0 +1,233 @@
+from app.config import settings
+from app.services.executor_service import run_ocr, run_io
+from app.services.ocr_cache import get_ocr_cache, ocr_cache_key
+from app.services.ocr_engine import resolve_ocr_engine_name
+from app.services.ocr_service import (
+    extract_text_from_file,
+    classify_pdf_pages,
+    ocr_pdf_pages,
+    ocr_spooled_pdf_pages,
+    merge_page_results,
+    combine_page_results
+)
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def get_page_concurrency() -> int:
+    """Page chunks of one document OCR'd at once (defaults to the OCR pool size)"""
+    if settings.OCR_PAGE_CONCURRENCY > 0:
+        return settings.OCR_PAGE_CONCURRENCY
+    return max(1, settings.OCR_WORKERS)
+
+
+def _page_report(pages: List[Dict]) -> List[Dict]:
+    return [
+        {
+            'page': page['page'],
+            'source': page['source'],
+            'confidence': page['confidence'],
+            'dpi': page.get('dpi'),
+            'error': page['error'],
+            'text': page.get('text') or ''
+        }
+        for page in sorted(pages, key=lambda page: page['page'])
+    ]
+
+
+def _without_page_text(result: Dict) -> Dict:
+    return {**result, 'pages': [{k: v for k, v in page.items() if k != 'text'} for page in result['pages']]}
+
+
+def _spool_document(file_bytes: bytes) -> Tuple[str, str]:
+    """Write a document to a temporary file for OCR workers; returns (path, SHA-256)"""
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="ocr-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(file_bytes)
+    return path, hashlib.sha256(file_bytes).hexdigest()
+
+
+async def _ocr_pages_in_order(pages: List[Dict], ocr_chunk, on_page: Callable[[Dict], None]) -> List[Dict]:
+    """
+    OCR the scanned pages one per task and hand every page to on_page in page order
+    
+    Pages are submitted in order, at most get_page_concurrency at a time,
+    so the earliest pages finish first; each page is passed on as soon as
+    it and all pages before it are resolved. ocr_chunk should not ship the
+    whole document per page (see ocr_spooled_pdf_pages). If a page or
+    on_page raises, the other pages are cancelled and awaited before the
+    error is raised.
+    """
+    resolved: Dict[int, Dict] = {}
+    released = 0
+    semaphore = asyncio.Semaphore(get_page_concurrency())
+    
+    def _resolve(index: int, page: Dict):
+        nonlocal released
+        resolved[index] = page
+        while released in resolved:
+            on_page(resolved[released])
+            released += 1
+    
+    async def _ocr_page(index: int, page: Dict):
+        async with semaphore:
+            results = await ocr_chunk([page['page']])
+        _resolve(index, merge_page_results([page], results)[0])
+    
+    tasks = []
+    try:
+        for index, page in enumerate(pages):
+            if page['source'] == 'ocr':
+                tasks.append(asyncio.ensure_future(_ocr_page(index, page)))
+            else:
+                _resolve(index, {**page, 'confidence': None, 'error': None})
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave pages queued or running (e.g. on a spooled file about to be removed)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return [resolved[index] for index in range(len(pages))]
+
+
+async def _ocr_uncached(file_bytes: bytes, content_type: str, progress, on_page) -> Dict:
+    if content_type != 'application/pdf':
+        if progress:
+            progress.add_total('ocr_pages', 1)
+        text, confidence = await run_ocr(extract_text_from_file, file_bytes, content_type, get_confidence=True)
+        if progress:
+            progress.advance('ocr_pages')
+        page = {'page': 1, 'source': 'ocr', 'confidence': confidence, 'dpi': None, 'error': None, 'text': text}
+        if on_page:
+            on_page(page)
+        return {
+            'text': text,
+            'confidence': confidence,
+            'pages': [page],
+            'failed_pages': []
+        }
+    
+    pages = await run_ocr(classify_pdf_pages, file_bytes)
+    ocr_numbers = [page['page'] for page in pages if page['source'] == 'ocr']
+    if progress:
+        progress.add_total('ocr_pages', len(pages))
+        progress.advance('ocr_pages', len(pages) - len(ocr_numbers))
+    
+    async def _ocr_chunk(page_numbers: List[int]) -> List[Dict]:
+        results = await run_ocr(ocr_pdf_pages, file_bytes, page_numbers, get_confidence=True)
+        if progress:
+            progress.advance('ocr_pages', len(page_numbers))
+        return results
+    
+    if on_page:
+        # One task per page: workers get a spooled file's path instead of the PDF
+        path, digest = await run_io(_spool_document, file_bytes) if ocr_numbers else (None, None)
+        
+        async def _ocr_spooled_page(page_numbers: List[int]) -> List[Dict]:
+            results = await run_ocr(ocr_spooled_pdf_pages, path, digest, page_numbers, get_confidence=True)
+            if progress:
+                progress.advance('ocr_pages', len(page_numbers))
+            return results
+        
+        try:
+            pages = await _ocr_pages_in_order(pages, _ocr_spooled_page, on_page)
+        finally:
+            if path:
+                await run_io(os.remove, path)
+    elif ocr_numbers:
+        chunk_size = math.ceil(len(ocr_numbers) / get_page_concurrency())
+        chunks = [ocr_numbers[i:i + chunk_size] for i in range(0, len(ocr_numbers), chunk_size)]
+        ocr_results = [page for chunk in await asyncio.gather(*[_ocr_chunk(c) for c in chunks]) for page in chunk]
+        pages = merge_page_results(pages, ocr_results)
+    
+    text, confidence = combine_page_results(pages)
+    
+    failed_pages = [page['page'] for page in pages if page['error']]
+    if failed_pages:
+        logger.warning(f"OCR failed on pages {failed_pages} of {len(pages)}")
+    
+    return {
+        'text': text,
+        'confidence': confidence,
+        'pages': _page_report(pages),
+        'failed_pages': failed_pages
+    }
+
+
+async def ocr_document(
+    file_bytes: bytes,
+    content_type: str,
+    progress=None,
+    page_text: bool = False,
+    on_page: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Extract text and OCR confidence from a file using the OCR process pool
+    
+    Results are cached by the file's SHA-256 and the OCR settings, so a
+    document uploaded again (the same question paper for every student) is
+    returned without rendering or OCR. PDF pages with a usable text layer
+    are taken as-is and blank pages are skipped; only the remaining
+    (scanned) pages are OCR'd, split into one chunk per OCR worker and
+    processed in parallel. Page order is preserved, OCR page confidences are
+    averaged, and pages that fail are reported instead of failing the
+    document (unless every page fails).
+    
+    Args:
+        progress: Optional job progress tracker; ocr_pages advances as pages
+            are resolved
+        page_text: Include each page's text in pages (for splitting a
+            combined document by page)
+        on_page: Optional callback given each page (with its text) in page
+            order as soon as it is resolved, so callers can start on a
+            document before it is fully OCR'd; scanned pages are then OCR'd
+            one per task instead of one chunk per worker, reading the PDF
+            from a temporary file rather than receiving it with every task
+    
+    Returns:
+        dict with text, confidence, pages (page, source, confidence, dpi
+        and error per page, plus text with page_text), failed_pages, engine
+        (the OCR engine used, None when no page needed OCR) and cached
+    """
+    if content_type != 'application/pdf' and not content_type.startswith('image/'):
+        raise ValueError(f"Unsupported file type: {content_type}")
+    
+    cache = get_ocr_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = await run_io(ocr_cache_key, file_bytes, content_type)
+        # Entries written before page text was cached can't serve page_text
+        needs_text = page_text or on_page is not None
+        cached = await run_io(
+            cache.get,
+            cache_key,
+            lambda entry: 'pages' in entry and (not needs_text or all('text' in page for page in entry['pages']))
+        )
+        if cached is not None:
+            if progress:
+                progress.add_total('ocr_pages', len(cached['pages']))
+                progress.advance('ocr_pages', len(cached['pages']))
+            if on_page:
+                for page in cached['pages']:
+                    on_page(page)
+            result = {**cached, 'engine': cached.get('engine'), 'failed_pages': [], 'cached': True}
+            return result if page_text else _without_page_text(result)
+    
+    result = await _ocr_uncached(file_bytes, content_type, progress, on_page)
+    # Asked of the OCR pool, since "auto" can resolve differently there than here
+    ocr_used = any(page['source'] == 'ocr' for page in result['pages'])
+    result['engine'] = await run_ocr(resolve_ocr_engine_name) if ocr_used else None
+    
+    if cache is not None and not result['failed_pages']:
+        entry = {key: result[key] for key in ('text', 'confidence', 'pages', 'engine')}
+        await run_io(cache.put, cache_key, entry)
+    result = {**result, 'cached': False}
+    return result if page_text else _without_page_text(result)
@@ -1,62 +1,239 @@
 from PIL import Image
-import pytesseract
 from pdf2image import convert_from_bytes
+from collections import OrderedDict
+from contextlib import contextmanager
 import io
 import logging
-from typing import Optional, Dict, Tuple
+import threading
+from typing import Iterator, List, Optional, Dict, Sequence, Tuple
+from app.config import settings
+from app.services.image_preprocessing import preprocess_image
+from app.services.ocr_engine import get_ocr_engine
 import re
 
 logger = logging.getLogger(__name__)
 
+# Pages where one image covers at least this share are treated as scans
+SCANNED_IMAGE_COVERAGE = 0.5
+
+# Spooled documents read by this OCR worker, by SHA-256 (most recently used last)
+SPOOLED_DOCUMENTS_PER_WORKER = 2
+_spooled_documents: "OrderedDict[str, bytes]" = OrderedDict()
+_spooled_documents_lock = threading.Lock()
 
-def _extract_native_text_from_pdf(pdf_bytes: bytes) -> Optional[str]:
-    try:
-        import fitz
-    except Exception:
-        return None
 
+def classify_pdf_pages(pdf_bytes: bytes) -> List[Dict]:
+    """
+    Decide per page whether to use the PDF's text layer or OCR
+    
+    Pages mostly covered by an image are scans and go to "ocr" (even with a
+    typed header). Otherwise a page is "native" when its text layer has at
+    least NATIVE_TEXT_MIN_CHARS letters or digits, or when it has nothing
+    but text. Pages with no text, images or drawings are "blank" and
+    skipped. Everything else is "ocr". Without PyMuPDF (or when it cannot
+    open the file) every page is OCR'd.
+    
+    Returns:
+        One dict per page with page, source ("native", "ocr" or "blank") and
+        text (the text layer for native pages, else "")
+    """
     try:
+        import fitz
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     except Exception:
-        return None
-
-    parts = []
+        return [{'page': page, 'source': 'ocr', 'text': ''} for page in range(1, get_pdf_page_count(pdf_bytes) + 1)]
+    
+    pages = []
     try:
-        for page in doc:
+        for page_index, page in enumerate(doc):
             try:
-                parts.append(page.get_text("text"))
+                text = page.get_text("text") or ""
             except Exception:
-                continue
+                text = ""
+            
+            page_area = abs(page.rect) or 1.0
+            image_area = 0.0
+            try:
+                for info in page.get_image_info():
+                    image_area = max(image_area, abs(fitz.Rect(info['bbox']) & page.rect))
+            except Exception:
+                image_area = page_area
+            
+            usable_chars = sum(1 for char in text if char.isalnum())
+            if image_area / page_area >= SCANNED_IMAGE_COVERAGE:
+                source = 'ocr'
+            elif usable_chars >= settings.NATIVE_TEXT_MIN_CHARS:
+                source = 'native'
+            elif image_area == 0 and not page.get_drawings():
+                # Nothing drawn beyond the text layer, so OCR could not add anything
+                source = 'native' if text.strip() else 'blank'
+            else:
+                source = 'ocr'
+            
+            pages.append({'page': page_index + 1, 'source': source, 'text': text.strip() if source == 'native' else ''})
     finally:
         try:
             doc.close()
         except Exception:
             pass
+    
+    return pages
+
 
-    text = "\n".join([p for p in parts if p]).strip()
-    return text if text else None
+@contextmanager
+def _pdf_page_renderer(pdf_bytes: bytes, dpi: int):
+    """
+    Yield a function rendering one 1-based PDF page to a PIL image
+    
+    The document is opened once with PyMuPDF; a page PyMuPDF cannot render
+    (or every page, without PyMuPDF) falls back to a single-page pdf2image
+    (Poppler) call. Raises RuntimeError when neither can render the page.
+    """
+    try:
+        import fitz
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        mat = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+    except Exception as e:
+        logger.warning(f"PyMuPDF cannot open PDF: {e}. Using pdf2image.")
+        doc = None
+    
+    def render(page_number: int) -> Image.Image:
+        if doc is not None:
+            try:
+                pix = doc[page_number - 1].get_pixmap(matrix=mat, alpha=False)
+                # Wrap the raw RGB samples directly instead of a PNG encode/decode
+                return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            except Exception as e:
+                logger.warning(f"PyMuPDF failed to render page {page_number}: {e}. Trying pdf2image.")
+        try:
+            return convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to render PDF page {page_number} for OCR. Install PyMuPDF (pymupdf) or Poppler (for pdf2image)."
+            ) from e
+    
+    try:
+        yield render
+    finally:
+        if doc is not None:
+            try:
+                doc.close()
+            except Exception:
+                pass
 
 
-def _render_pdf_to_images_pymupdf(pdf_bytes: bytes, dpi: int = 300):
-    import fitz
+def iter_pdf_pages(
+    pdf_bytes: bytes,
+    page_numbers: Optional[Sequence[int]] = None,
+    dpi: int = 300
+) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    Render PDF pages for OCR one at a time
+    
+    Yields (page number, PIL image) for the given 1-based page numbers (all
+    pages when None), using PyMuPDF with pdf2image (Poppler) as a per-page
+    fallback. Pages are rendered lazily, so memory is bounded by the page
+    being OCR'd rather than the length of the document; callers should
+    close each image when done.
+    """
+    if page_numbers is None:
+        page_numbers = range(1, get_pdf_page_count(pdf_bytes) + 1)
+    with _pdf_page_renderer(pdf_bytes, dpi) as render:
+        for page_number in page_numbers:
+            yield page_number, render(page_number)
 
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    images = []
-    zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
 
+def get_pdf_page_count(pdf_bytes: bytes) -> int:
+    """Count the pages of a PDF without rendering them (PyMuPDF, else Poppler)"""
     try:
-        for page in doc:
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            img_bytes = pix.tobytes("png")
-            images.append(Image.open(io.BytesIO(img_bytes)))
-    finally:
-        try:
-            doc.close()
-        except Exception:
-            pass
+        import fitz
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return doc.page_count
+    except Exception:
+        from pdf2image import pdfinfo_from_bytes
+        return int(pdfinfo_from_bytes(pdf_bytes)["Pages"])
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def recognize_image(image) -> Dict:
+    """
+    Run tesseract once on an image and rebuild text and confidence from it
+    
+    Uses image_to_data only: words are regrouped by block, paragraph and
+    line, so the text keeps image_to_string's layout (one line per line,
+    blank line between paragraphs) that paper_parser relies on.
+    
+    Returns:
+        dict with text, confidence (mean word confidence or None), lines
+        (text and confidence per line) and words (text, confidence and line
+        index per word)
+    """
+    data = get_ocr_engine().image_to_data(image)
+    
+    lines = []
+    words = []
+    paragraphs = []  # list of line indices per paragraph
+    current_line_key = None
+    current_paragraph_key = None
+    
+    for i, word_text in enumerate(data['text']):
+        if data['level'][i] != 5 or not word_text or not word_text.strip():
+            continue
+        
+        paragraph_key = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+        line_key = paragraph_key + (data['line_num'][i],)
+        if paragraph_key != current_paragraph_key:
+            paragraphs.append([])
+            current_paragraph_key = paragraph_key
+        if line_key != current_line_key:
+            lines.append({'text': '', 'confidence': None, 'words': []})
+            paragraphs[-1].append(len(lines) - 1)
+            current_line_key = line_key
+        
+        confidence = float(data['conf'][i])
+        word = {
+            'text': word_text.strip(),
+            'confidence': confidence if confidence >= 0 else None,
+            'line': len(lines) - 1
+        }
+        words.append(word)
+        lines[-1]['words'].append(word)
+    
+    for line in lines:
+        line['text'] = " ".join(word['text'] for word in line['words'])
+        line['confidence'] = _mean([w['confidence'] for w in line.pop('words') if w['confidence'] is not None])
+    
+    text = "\n\n".join(
+        "\n".join(lines[index]['text'] for index in paragraph)
+        for paragraph in paragraphs
+    )
+    
+    # Same statistic as before: mean of positive word confidences
+    return {
+        'text': text,
+        'confidence': _mean([w['confidence'] for w in words if w['confidence']]),
+        'lines': lines,
+        'words': words
+    }
+
 
-    return images
+def is_adaptive_mode() -> bool:
+    return settings.OCR_MODE == "adaptive"
+
+
+def recognize_page(image) -> Dict:
+    """recognize_image, after NumPy preprocessing in adaptive OCR mode"""
+    if not is_adaptive_mode():
+        return recognize_image(image)
+    
+    cleaned = preprocess_image(image)
+    try:
+        return recognize_image(cleaned)
+    finally:
+        cleaned.close()
 
 
 def extract_text_from_image(image_bytes: bytes, get_confidence: bool = False) -> Tuple[str, Optional[float]]:
@@ -72,25 +249,166 @@ def extract_text_from_image(image_bytes: bytes, get_confidence: bool = False) ->
     """
     try:
         image = Image.open(io.BytesIO(image_bytes))
-        text = pytesseract.image_to_string(image)
+        recognized = recognize_page(image)
         
         confidence = None
         if get_confidence:
-            # Get detailed OCR data with confidence
-            try:
-                data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-                confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                confidence = sum(confidences) / len(confidences) if confidences else 0.0
-            except Exception as e:
-                logger.warning(f"Could not extract OCR confidence: {e}")
-                confidence = None
+            confidence = recognized['confidence'] or 0.0
         
-        return text.strip(), confidence
+        return recognized['text'].strip(), confidence
     except Exception as e:
         logger.error(f"Error extracting text from image: {e}")
         raise
 
 
+def _ocr_page(image, get_confidence: bool) -> Tuple[str, Optional[float]]:
+    """OCR one rendered PDF page; confidence is None when unavailable"""
+    recognized = recognize_page(image)
+    return recognized['text'].strip(), recognized['confidence'] if get_confidence else None
+
+
+def _ocr_rendered_pages(
+    pdf_bytes: bytes,
+    page_numbers: Optional[Sequence[int]],
+    dpi: int,
+    get_confidence: bool
+) -> List[Dict]:
+    def _failed(page: int, error: Exception) -> Dict:
+        return {'page': page, 'source': 'ocr', 'text': '', 'confidence': None, 'dpi': dpi, 'error': str(error)}
+    
+    if page_numbers is None:
+        try:
+            page_numbers = range(1, get_pdf_page_count(pdf_bytes) + 1)
+        except Exception as e:
+            logger.error(f"Error reading PDF page count: {e}")
+            return [_failed(1, e)]
+    
+    results = []
+    with _pdf_page_renderer(pdf_bytes, dpi) as render:
+        for page in page_numbers:
+            try:
+                image = render(page)
+            except Exception as e:
+                logger.error(f"Error rendering PDF page {page}: {e}")
+                results.append(_failed(page, e))
+                continue
+            try:
+                text, confidence = _ocr_page(image, get_confidence)
+                results.append({'page': page, 'source': 'ocr', 'text': text, 'confidence': confidence, 'dpi': dpi, 'error': None})
+            except Exception as e:
+                logger.warning(f"OCR failed for page {page}: {e}")
+                results.append(_failed(page, e))
+            finally:
+                # Free the rendered page before the next one is rendered
+                image.close()
+    return results
+
+
+def _needs_higher_dpi(page: Dict) -> bool:
+    if page['error']:
+        return False
+    return assess_ocr_quality(page['text'], page['confidence'])['quality_score'] < settings.OCR_RETRY_CONFIDENCE
+
+
+def ocr_pdf_pages(
+    pdf_bytes: bytes,
+    page_numbers: Optional[Sequence[int]] = None,
+    get_confidence: bool = False
+) -> List[Dict]:
+    """
+    OCR selected pages of a PDF
+    
+    A page that fails is recorded with its error instead of failing the
+    call, so callers can spread pages over the OCR pool and still get a
+    result for every readable page. In adaptive OCR mode pages are rendered
+    at OCR_LOW_DPI first and only low-confidence pages are rendered again
+    at OCR_DPI, keeping whichever pass scored higher.
+    
+    Args:
+        page_numbers: 1-based page numbers in order; None means every page
+    
+    Returns:
+        One dict per page with page, source ("ocr"), text, confidence, dpi
+        and error (None on success)
+    """
+    if not is_adaptive_mode():
+        return _ocr_rendered_pages(pdf_bytes, page_numbers, settings.OCR_DPI, get_confidence)
+    
+    results = _ocr_rendered_pages(pdf_bytes, page_numbers, settings.OCR_LOW_DPI, get_confidence=True)
+    retry_pages = [page['page'] for page in results if _needs_higher_dpi(page)]
+    if retry_pages and settings.OCR_DPI > settings.OCR_LOW_DPI:
+        logger.info(f"Re-rendering {len(retry_pages)} low-confidence pages at {settings.OCR_DPI} DPI")
+        by_page = {page['page']: page for page in results}
+        for page in _ocr_rendered_pages(pdf_bytes, retry_pages, settings.OCR_DPI, get_confidence=True):
+            previous = by_page[page['page']]
+            if not page['error'] and (page['confidence'] or 0) >= (previous['confidence'] or 0):
+                by_page[page['page']] = page
+        results = [by_page[page['page']] for page in results]
+    
+    if not get_confidence:
+        for page in results:
+            page['confidence'] = None
+    return results
+
+
+def _read_spooled_document(path: str, digest: str) -> bytes:
+    with _spooled_documents_lock:
+        data = _spooled_documents.get(digest)
+        if data is not None:
+            _spooled_documents.move_to_end(digest)
+            return data
+    
+    with open(path, "rb") as f:
+        data = f.read()
+    with _spooled_documents_lock:
+        _spooled_documents[digest] = data
+        while len(_spooled_documents) > SPOOLED_DOCUMENTS_PER_WORKER:
+            _spooled_documents.popitem(last=False)
+    return data
+
+
+def ocr_spooled_pdf_pages(
+    path: str,
+    digest: str,
+    page_numbers: Sequence[int],
+    get_confidence: bool = False
+) -> List[Dict]:
+    """
+    ocr_pdf_pages for a PDF spooled to a file, read once per OCR worker
+    
+    Only the path and the document's SHA-256 are sent to the worker, so
+    OCR'ing a document one page per task does not pickle the whole PDF
+    for every page; each worker keeps the last few documents it read.
+    """
+    return ocr_pdf_pages(_read_spooled_document(path, digest), page_numbers, get_confidence)
+
+
+def combine_page_results(pages: List[Dict]) -> Tuple[str, Optional[float]]:
+    """
+    Join page texts in page order and average the OCR page confidences
+    
+    Raises:
+        RuntimeError: if every page failed
+    """
+    pages = sorted(pages, key=lambda page: page['page'])
+    if pages and all(page['error'] for page in pages):
+        raise RuntimeError(f"OCR failed on every page: {pages[0]['error']}")
+    
+    combined_text = "\n\n".join(page['text'] for page in pages if page['text'] and not page['error'])
+    confidences = [page['confidence'] for page in pages if page['confidence'] is not None]
+    avg_confidence = sum(confidences) / len(confidences) if confidences else None
+    return combined_text, avg_confidence
+
+
+def merge_page_results(classified_pages: List[Dict], ocr_results: List[Dict]) -> List[Dict]:
+    """Replace the OCR pages from classify_pdf_pages with their OCR results"""
+    by_page = {result['page']: result for result in ocr_results}
+    return [
+        by_page.get(page['page'], {**page, 'confidence': None, 'error': None})
+        for page in classified_pages
+    ]
+
+
 def extract_text_from_pdf(pdf_bytes: bytes, get_confidence: bool = False) -> Tuple[str, Optional[float]]:
     """
     Extract text from PDF using OCR with confidence scoring
@@ -103,43 +421,12 @@ def extract_text_from_pdf(pdf_bytes: bytes, get_confidence: bool = False) -> Tup
         Tuple of (extracted text, average confidence score) or (text, None)
     """
     try:
-        native_text = _extract_native_text_from_pdf(pdf_bytes)
-        if native_text:
-            return native_text.strip(), None
-
-        # Convert PDF to images (higher DPI for better OCR)
-        try:
-            images = convert_from_bytes(pdf_bytes, dpi=300)
-        except Exception as e:
-            logger.warning(f"pdf2image failed for PDF conversion: {e}. Trying PyMuPDF fallback.")
-            try:
-                images = _render_pdf_to_images_pymupdf(pdf_bytes, dpi=300)
-            except Exception as e2:
-                raise RuntimeError(
-                    "Failed to render PDF for OCR. Install Poppler (for pdf2image) or PyMuPDF (pymupdf) as a fallback."
-                ) from e2
-        
-        # Extract text from each page
-        texts = []
-        confidences = []
-        
-        for image in images:
-            text = pytesseract.image_to_string(image)
-            texts.append(text.strip())
-            
-            if get_confidence:
-                try:
-                    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-                    page_confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                    if page_confidences:
-                        confidences.append(sum(page_confidences) / len(page_confidences))
-                except Exception as e:
-                    logger.warning(f"Could not extract OCR confidence for page: {e}")
-        
-        combined_text = "\n\n".join(texts)
-        avg_confidence = sum(confidences) / len(confidences) if confidences else None
-        
-        return combined_text, avg_confidence
+        # Native text layer where usable, OCR only for scanned pages
+        pages = classify_pdf_pages(pdf_bytes)
+        ocr_pages = [page['page'] for page in pages if page['source'] == 'ocr']
+        if ocr_pages:
+            pages = merge_page_results(pages, ocr_pdf_pages(pdf_bytes, ocr_pages, get_confidence=get_confidence))
+        return combine_page_results(pages)
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         raise
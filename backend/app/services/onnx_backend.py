@@ -0,0 +1,302 @@
+from app.config import settings
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import re
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model-int8.onnx"
+META_FILENAME = "meta.json"
+
+
+def get_inference_backend() -> str:
+    """Get the configured inference backend, validated against BACKENDS"""
+    backend = settings.INFERENCE_BACKEND.lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{settings.INFERENCE_BACKEND}'. Expected one of {BACKENDS}")
+    return backend
+
+
+def get_model_variant(model_name: str) -> str:
+    """
+    Identify a model together with its backend
+
+    Used to key cached and persisted embeddings, so vectors from different
+    backends are never mixed.
+    """
+    backend = get_inference_backend()
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def get_artifact_dir(model_name: str) -> str:
+    """Directory holding the exported ONNX artifacts for a model"""
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '__', model_name)
+    return os.path.join(settings.ONNX_MODEL_DIR, slug)
+
+
+def export_onnx_model(
+    model_name: str,
+    quantize: bool = True,
+    pooling_mode: str = "cls",
+    normalize: bool = False,
+    max_seq_length: int = 512
+) -> str:
+    """
+    Export a Hugging Face encoder to ONNX and optionally quantize it to int8
+
+    Writes model.onnx, model-int8.onnx (dynamic int8 weight quantization),
+    the tokenizer files and meta.json into get_artifact_dir(model_name).
+
+    Returns:
+        Artifact directory path
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+
+    output_dir = get_artifact_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+
+    logger.info(f"Exporting {model_name} to ONNX in {output_dir}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt", padding=True)
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, FP32_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            args=tuple(sample[name] for name in input_names),
+            f=fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(output_dir, INT8_FILENAME), weight_type=QuantType.QInt8)
+
+    with open(os.path.join(output_dir, META_FILENAME), "w") as f:
+        json.dump({
+            "model": model_name,
+            "input_names": input_names,
+            "pooling_mode": pooling_mode,
+            "normalize": normalize,
+            "max_seq_length": max_seq_length,
+            "quantized": quantize
+        }, f, indent=2)
+
+    logger.info(f"ONNX export of {model_name} complete")
+    return output_dir
+
+
+def export_embedding_model(quantize: bool = True) -> str:
+    """Export settings.EMBEDDING_MODEL, reading pooling and length from its sentence-transformers config"""
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    pooling_mode = "mean"
+    normalize = False
+    for module in st_model:
+        if hasattr(module, "get_pooling_mode_str"):
+            pooling_mode = "mean" if "mean" in module.get_pooling_mode_str() else "cls"
+        if type(module).__name__ == "Normalize":
+            normalize = True
+
+    return export_onnx_model(
+        settings.EMBEDDING_MODEL,
+        quantize=quantize,
+        pooling_mode=pooling_mode,
+        normalize=normalize,
+        max_seq_length=st_model.max_seq_length
+    )
+
+
+def export_concept_model(quantize: bool = True) -> str:
+    """Export settings.CONCEPT_MODEL ([CLS] pooling, up to 512 tokens)"""
+    return export_onnx_model(settings.CONCEPT_MODEL, quantize=quantize)
+
+
+def _load_session(model_name: str, backend: str, export_fn):
+    """Load an onnxruntime session for the backend, exporting artifacts if missing"""
+    import onnxruntime as ort
+
+    artifact_dir = get_artifact_dir(model_name)
+    filename = INT8_FILENAME if backend == "onnx-int8" else FP32_FILENAME
+    model_path = os.path.join(artifact_dir, filename)
+
+    if not os.path.exists(model_path) or not os.path.exists(os.path.join(artifact_dir, META_FILENAME)):
+        logger.warning(f"ONNX artifacts for {model_name} not found, exporting now")
+        export_fn(quantize=(backend == "onnx-int8"))
+
+    with open(os.path.join(artifact_dir, META_FILENAME)) as f:
+        meta = json.load(f)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if settings.ONNX_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+    session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    return session, meta, artifact_dir
+
+
+def _pool(hidden: np.ndarray, attention_mask: np.ndarray, pooling_mode: str) -> np.ndarray:
+    if pooling_mode == "mean":
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    return hidden[:, 0, :]
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime stand-in for SentenceTransformer
+
+    Implements the encode() subset used by embedding_service: tokenize,
+    run the exported encoder, pool and optionally L2-normalize.
+    """
+
+    def __init__(self, model_name: str, backend: str):
+        from transformers import AutoTokenizer
+
+        self.session, self.meta, artifact_dir = _load_session(model_name, backend, export_embedding_model)
+        self.tokenizer = AutoTokenizer.from_pretrained(artifact_dir)
+        self.max_seq_length = self.meta["max_seq_length"]
+
+    def encode(
+        self,
+        sentences,
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = []
+
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                return_tensors="np",
+                truncation=True,
+                max_length=self.max_seq_length,
+                padding=True
+            )
+            feed = {name: inputs[name].astype(np.int64) for name in self.meta["input_names"]}
+            hidden = self.session.run(["last_hidden_state"], feed)[0]
+            embeddings = _pool(hidden, inputs["attention_mask"], self.meta["pooling_mode"])
+            if normalize_embeddings or self.meta.get("normalize"):
+                embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+            batches.append(embeddings.astype(np.float32))
+
+        embeddings = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+class OnnxEncoderModel:
+    """
+    ONNX Runtime stand-in for a transformers AutoModel
+
+    Called with the tokenizer's torch tensors, returns an object exposing
+    last_hidden_state as a torch tensor, like the eager model.
+    """
+
+    def __init__(self, model_name: str, backend: str):
+        self.session, self.meta, self.artifact_dir = _load_session(model_name, backend, export_concept_model)
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs):
+        import torch
+
+        feed = {
+            name: inputs[name].cpu().numpy().astype(np.int64)
+            for name in self.meta["input_names"]
+            if name in inputs
+        }
+        hidden = self.session.run(["last_hidden_state"], feed)[0]
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(hidden))
+
+
+def check_backend_parity(
+    texts: List[str],
+    backend: Optional[str] = None,
+    repeats: int = 3
+) -> Dict:
+    """
+    Compare an ONNX backend against the fp32 torch models
+
+    Reports cosine drift between the per-text embeddings, drift of the
+    pairwise similarity matrix (what scoring actually consumes) and the
+    per-text latency of each backend.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoTokenizer, AutoModel
+
+    backend = backend or get_inference_backend()
+    if backend == "torch":
+        raise ValueError("Parity check compares an ONNX backend against torch; choose 'onnx' or 'onnx-int8'")
+
+    def _timed(fn):
+        fn()  # warm-up
+        started = time.perf_counter()
+        for _ in range(repeats):
+            result = fn()
+        return result, (time.perf_counter() - started) / repeats / max(len(texts), 1) * 1000
+
+    def _normalize(x):
+        return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+    def _drift(reference, candidate):
+        reference, candidate = _normalize(reference), _normalize(candidate)
+        cosine = np.einsum('ij,ij->i', reference, candidate)
+        sim_delta = np.abs(reference @ reference.T - candidate @ candidate.T)
+        return {
+            'mean_cosine': round(float(cosine.mean()), 6),
+            'min_cosine': round(float(cosine.min()), 6),
+            'max_similarity_drift': round(float(sim_delta.max()), 6),
+            'mean_similarity_drift': round(float(sim_delta.mean()), 6)
+        }
+
+    report = {'backend': backend, 'texts': len(texts)}
+
+    # Sentence embedding model
+    torch_st = SentenceTransformer(settings.EMBEDDING_MODEL)
+    onnx_st = OnnxSentenceEncoder(settings.EMBEDDING_MODEL, backend)
+    reference, torch_ms = _timed(lambda: torch_st.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False))
+    candidate, onnx_ms = _timed(lambda: onnx_st.encode(texts, normalize_embeddings=True))
+    report['embedding'] = {**_drift(reference, candidate), 'torch_ms_per_text': round(torch_ms, 3), 'onnx_ms_per_text': round(onnx_ms, 3)}
+
+    # Concept model ([CLS] embeddings)
+    tokenizer = AutoTokenizer.from_pretrained(settings.CONCEPT_MODEL)
+    torch_model = AutoModel.from_pretrained(settings.CONCEPT_MODEL).eval()
+    onnx_model = OnnxEncoderModel(settings.CONCEPT_MODEL, backend)
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, max_length=512, padding=True)
+
+    def _torch_cls():
+        with torch.no_grad():
+            return torch_model(**inputs).last_hidden_state[:, 0, :].numpy()
+
+    reference, torch_ms = _timed(_torch_cls)
+    candidate, onnx_ms = _timed(lambda: onnx_model(**inputs).last_hidden_state[:, 0, :].numpy())
+    report['concept'] = {**_drift(reference, candidate), 'torch_ms_per_text': round(torch_ms, 3), 'onnx_ms_per_text': round(onnx_ms, 3)}
+
+    return report
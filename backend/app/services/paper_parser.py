@@ -1,10 +1,204 @@
 import re
-from typing import List, Dict, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, TextIO, Tuple, Union
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# One alternation of the supported numbering styles, tried in this order:
+# "1. text" / "1) text", "Q1. text" / "Q1) text", "Question 1: text"
+ITEM_PATTERN = re.compile(
+    r'^(?:(\d+)[\.\)]|[Qq](\d+)[\.\)]|[Qq]uestion\s+(\d+)[:\-\.])\s*(.+)$',
+    re.IGNORECASE
+)
+
+# Lines that start a new student's sheet in a combined answer book
+DEFAULT_STUDENT_SEPARATORS = (
+    r'^(?:student\s*(?:name|id|no\.?|number)?|name|roll\s*(?:no\.?|number)|reg(?:istration)?\s*(?:no\.?|number))\s*[:#\-]',
+)
+
+
+def compile_separators(separators: Sequence[str]) -> Pattern:
+    """Combine separator regexes into one case-insensitive pattern"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in separators), re.IGNORECASE)
+
+
+class StreamingPaperParser:
+    """
+    Incremental parser for numbered questions/answers
+    
+    Text is fed in arbitrary chunks (feed) or line by line (push_line) and
+    each item is returned as soon as it is complete, i.e. when the next
+    item, a student separator or the end of input (close) is seen. Work
+    and memory are linear in the input: every line is stripped and matched
+    against one precompiled pattern, and only the current item's lines are
+    kept.
+    
+    With separators (regexes matched against stripped lines), items also
+    get a section number that increases at every separator line, so one
+    document can hold several students' sheets; section_headers maps
+    each section to its separator line. Separator lines with only blank
+    lines between them (e.g. "Name: ..." then "Roll No: ...") are one
+    header, joined with " | ".
+    """
+    
+    def __init__(self, separators: Optional[Sequence[str]] = None):
+        self._separator = compile_separators(separators) if separators else None
+        self._buffer = ""
+        self._number = None
+        self._lines: List[str] = []
+        self.section = 0
+        self.section_headers: Dict[int, str] = {}
+        self._header_open = False
+    
+    def _finish_item(self) -> Optional[Dict]:
+        if self._number is None:
+            return None
+        content = '\n'.join(self._lines).strip()
+        number = self._number
+        self._number = None
+        self._lines = []
+        if not content:  # Only items with content count
+            return None
+        item = {'number': number, 'content': content}
+        if self._separator is not None:
+            item['section'] = self.section
+        return item
+    
+    def push_line(self, line: str) -> Optional[Dict]:
+        """Consume one line; returns the item it completed, if any"""
+        line = line.strip()
+        
+        if self._separator is not None and self._separator.match(line):
+            if self._header_open:
+                self.section_headers[self.section] += f" | {line}"
+                return None
+            item = self._finish_item()
+            self.section += 1
+            self.section_headers[self.section] = line
+            self._header_open = True
+            return item
+        
+        if line:
+            self._header_open = False
+        
+        match = ITEM_PATTERN.match(line)
+        if match:
+            item = self._finish_item()
+            self._number = int(match.group(1) or match.group(2) or match.group(3))
+            self._lines.append(match.group(4).strip())
+            return item
+        
+        if self._number is not None and (line or self._lines):
+            # Continue current item (multiline content, blank lines preserved)
+            self._lines.append(line)
+        return None
+    
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a chunk of text; returns the items it completed"""
+        lines = (self._buffer + chunk).split('\n')
+        self._buffer = lines.pop()
+        items = []
+        for line in lines:
+            item = self.push_line(line)
+            if item:
+                items.append(item)
+        return items
+    
+    def close(self) -> List[Dict]:
+        """Finish the input; returns the remaining items"""
+        items = []
+        if self._buffer:
+            item = self.push_line(self._buffer)
+            self._buffer = ""
+            if item:
+                items.append(item)
+        item = self._finish_item()
+        if item:
+            items.append(item)
+        return items
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield the lines of text one at a time without splitting it up front"""
+    start = 0
+    find = text.find
+    while True:
+        end = find('\n', start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_paper_items(
+    source: Union[str, TextIO, Iterable[str]],
+    separators: Optional[Sequence[str]] = None
+) -> Iterator[Dict]:
+    """
+    Lazily parse numbered items from text, a text file object or an iterable of lines
+    
+    Yields the same dicts as parse_questions_and_answers, one at a time;
+    see StreamingPaperParser for separators.
+    """
+    parser = StreamingPaperParser(separators)
+    lines = iter_lines(source) if isinstance(source, str) else source
+    for line in lines:
+        item = parser.push_line(line)
+        if item:
+            yield item
+    yield from parser.close()
+
+
+def iter_student_sections(
+    source: Union[str, TextIO, Iterable[str]],
+    separators: Sequence[str] = DEFAULT_STUDENT_SEPARATORS
+) -> Iterator[Dict]:
+    """
+    Split a combined answer book into students' sheets as it is parsed
+    
+    A new sheet starts at every separator line; adjacent separator lines
+    are one header. Sheets are yielded as soon as the next one starts;
+    text before the first separator counts as a sheet only if it has
+    numbered items.
+    
+    Yields:
+        dicts with index (0-based), header (the separator lines, or None) and
+        items (as returned by parse_questions_and_answers)
+    """
+    parser = StreamingPaperParser(separators)
+    lines = iter_lines(source) if isinstance(source, str) else source
+    index = 0
+    section = 0
+    items: List[Dict] = []
+    
+    def _sheet() -> Dict:
+        return {
+            'index': index,
+            'header': parser.section_headers.get(section),
+            'items': [{'number': item['number'], 'content': item['content']} for item in items]
+        }
+    
+    for line in lines:
+        item = parser.push_line(line)
+        if item:
+            # A separator line completes the previous sheet's last item
+            items.append(item)
+        if parser.section != section:
+            if section > 0 or items:
+                yield _sheet()
+                index += 1
+            section = parser.section
+            items = []
+    
+    items.extend(parser.close())
+    if section > 0 or items:
+        yield _sheet()
+
+
 def parse_questions_and_answers(text: str) -> List[Dict[str, str]]:
     """
     Parse questions/answers from text using numbering patterns
@@ -21,57 +215,7 @@ def parse_questions_and_answers(text: str) -> List[Dict[str, str]]:
     if not text or not text.strip():
         return []
     
-    items = []
-    lines = text.split('\n')
-    current_item = None
-    current_content = []
-    
-    # Pattern to detect start of new item
-    number_pattern = re.compile(r'^(\d+)[\.\)]\s*(.+)$', re.IGNORECASE)
-    q_pattern = re.compile(r'^[Qq](\d+)[\.\)]\s*(.+)$', re.IGNORECASE)
-    question_pattern = re.compile(r'^[Qq]uestion\s+(\d+)[:\-\.]\s*(.+)$', re.IGNORECASE)
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Check if this line starts a new numbered item
-        match = None
-        number = None
-        content_start = ''
-        
-        # Try different patterns
-        for pattern in [number_pattern, q_pattern, question_pattern]:
-            match = pattern.match(line)
-            if match:
-                number = int(match.group(1))
-                content_start = match.group(2).strip() if len(match.groups()) > 1 else ''
-                break
-        
-        if match:
-            # Save previous item if exists
-            if current_item:
-                current_item['content'] = '\n'.join(current_content).strip()
-                if current_item['content']:  # Only add if has content
-                    items.append(current_item)
-            
-            # Start new item
-            current_item = {
-                'number': number,
-                'content': content_start
-            }
-            current_content = [content_start] if content_start else []
-        elif current_item:
-            # Continue current item (multiline content)
-            if line or current_content:  # Add line even if empty (preserves structure)
-                current_content.append(line)
-    
-    # Add last item
-    if current_item:
-        current_item['content'] = '\n'.join(current_content).strip()
-        if current_item['content']:  # Only add if has content
-            items.append(current_item)
-    
-    return items
+    return list(iter_paper_items(text))
 
 
 def match_questions_answers(
@@ -136,3 +280,66 @@ def parse_full_paper(
         logger.error(f"Error parsing full paper: {e}")
         raise
 
+
+def _item_hash(item: Dict) -> str:
+    content = "\0".join((item['question'], item['model_answer'], item['student_answer']))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ParsedPaper:
+    """
+    A student's answer sheet parsed and matched against the questions
+    
+    items are match_questions_answers entries, each with a content_hash
+    (SHA-256 of its question, model answer and student answer) and, for
+    OCR-extracted sheets, is_ocr_extracted and ocr_quality_score. Parse a
+    paper once and pass this object on; evaluators use the items as-is
+    instead of parsing the texts again.
+    """
+    items: List[Dict]
+    
+    def __post_init__(self):
+        for item in self.items:
+            item.setdefault('content_hash', _item_hash(item))
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 over the items' hashes, identifying the whole matched paper"""
+        return hashlib.sha256("".join(item['content_hash'] for item in self.items).encode("ascii")).hexdigest()
+    
+    def set_ocr_metadata(self, ocr_quality_score: Optional[float]):
+        """Mark every question as OCR-extracted with the sheet's quality score (None clears it)"""
+        for item in self.items:
+            if ocr_quality_score is None:
+                item.pop('is_ocr_extracted', None)
+                item.pop('ocr_quality_score', None)
+            else:
+                item['is_ocr_extracted'] = True
+                item['ocr_quality_score'] = ocr_quality_score
+        return self
+
+
+def parse_paper(
+    questions_text: str,
+    model_answers_text: str,
+    student_answers_text: str,
+    ocr_quality_score: Optional[float] = None
+) -> ParsedPaper:
+    """Parse and match a full paper into a ParsedPaper (see parse_full_paper)"""
+    paper = ParsedPaper(parse_full_paper(questions_text, model_answers_text, student_answers_text))
+    return paper.set_ocr_metadata(ocr_quality_score)
+
+
+def parse_student_paper(
+    questions: List[Dict[str, str]],
+    model_answers: List[Dict[str, str]],
+    student_answers_text: str,
+    ocr_quality_score: Optional[float] = None
+) -> ParsedPaper:
+    """Parse a student's sheet and match it against already parsed questions and model answers"""
+    items = match_questions_answers(questions, model_answers, parse_questions_and_answers(student_answers_text))
+    return ParsedPaper(items).set_ocr_metadata(ocr_quality_score)
@@ -1,33 +1,117 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from app.services.embedding_service import generate_embedding
+from typing import Iterable, List
+from app.services.embedding_service import generate_embeddings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _encode_aligned(texts: List[str], persistent: Iterable[str] = ()) -> np.ndarray:
+    """
+    Encode texts in a single batch, keeping one row per input text
+
+    Empty texts get a zero vector so they score 0.0 against everything.
+    """
+    valid_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not valid_indices:
+        return np.zeros((len(texts), 0), dtype=np.float32)
+
+    encoded = generate_embeddings([texts[i] for i in valid_indices], persistent=persistent)
+    embeddings = np.zeros((len(texts), encoded.shape[1]), dtype=encoded.dtype)
+    embeddings[valid_indices] = encoded
+    return embeddings
+
+
+def calculate_similarity_matrix(references: List[str], candidates: List[str]) -> np.ndarray:
+    """
+    Calculate similarity between N candidate texts and M reference texts
+
+    All texts are encoded in one forward pass. Embeddings are already
+    L2-normalized, so cosine similarity reduces to a dot product.
+
+    Returns:
+        np.ndarray of shape (N, M) with scores between 0 and 1
+    """
+    if not references or not candidates:
+        return np.zeros((len(candidates), len(references)), dtype=np.float32)
+
+    try:
+        embeddings = _encode_aligned(list(references) + list(candidates), persistent=references)
+        reference_embeddings = embeddings[:len(references)]
+        candidate_embeddings = embeddings[len(references):]
+
+        similarity = candidate_embeddings @ reference_embeddings.T
+
+        # Ensure values are between 0 and 1
+        return np.clip(similarity, 0.0, 1.0)
+    except Exception as e:
+        logger.error(f"Error calculating similarity matrix: {e}")
+        raise
+
+
+def calculate_pairwise_similarities(references: List[str], candidates: List[str]) -> List[float]:
+    """
+    Calculate similarity of each candidate against the reference at the same index
+
+    Returns:
+        List of similarity scores between 0 and 1
+    """
+    if len(references) != len(candidates):
+        raise ValueError("References and candidates must have the same length")
+    if not references:
+        return []
+
+    embeddings = _encode_aligned(list(references) + list(candidates), persistent=references)
+    reference_embeddings = embeddings[:len(references)]
+    candidate_embeddings = embeddings[len(references):]
+
+    similarity = np.einsum('ij,ij->i', candidate_embeddings, reference_embeddings)
+    return [float(s) for s in np.clip(similarity, 0.0, 1.0)]
+
+
+def encode_references(references: List[str]) -> np.ndarray:
+    """
+    Encode reference texts (model answers) once for reuse across candidates
+
+    Returns:
+        np.ndarray with one row per reference (zero rows for empty texts)
+    """
+    if not references:
+        return np.zeros((0, 0), dtype=np.float32)
+    return _encode_aligned(list(references), persistent=references)
+
+
+def calculate_similarities_to_embeddings(reference_embeddings: np.ndarray, candidates: List[str]) -> List[float]:
+    """
+    Calculate similarity of each candidate against a pre-encoded reference row
+
+    Only the candidates go through the model.
+
+    Returns:
+        List of similarity scores between 0 and 1
+    """
+    if len(reference_embeddings) != len(candidates):
+        raise ValueError("References and candidates must have the same length")
+    if not candidates:
+        return []
+
+    candidate_embeddings = _encode_aligned(list(candidates))
+    if reference_embeddings.shape[1] == 0 or candidate_embeddings.shape[1] == 0:
+        return [0.0] * len(candidates)
+
+    similarity = np.einsum('ij,ij->i', candidate_embeddings, reference_embeddings)
+    return [float(s) for s in np.clip(similarity, 0.0, 1.0)]
+
+
 def calculate_cosine_similarity(text1: str, text2: str) -> float:
     """
     Calculate cosine similarity between two texts using embeddings
-    
+
     Returns:
         float: Similarity score between 0 and 1
     """
     try:
-        # Generate embeddings
-        embedding1 = generate_embedding(text1)
-        embedding2 = generate_embedding(text2)
-        
-        # Reshape for cosine_similarity (needs 2D array)
-        embedding1 = embedding1.reshape(1, -1)
-        embedding2 = embedding2.reshape(1, -1)
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(embedding1, embedding2)[0][0]
-        
-        # Ensure value is between 0 and 1
-        similarity = max(0.0, min(1.0, similarity))
-        
+        similarity = calculate_similarity_matrix([text1], [text2])[0][0]
         return float(similarity)
     except Exception as e:
         logger.error(f"Error calculating similarity: {e}")
@@ -37,13 +121,11 @@ def calculate_cosine_similarity(text1: str, text2: str) -> float:
 def calculate_semantic_similarity(teacher_answer: str, student_answer: str) -> float:
     """
     Calculate semantic similarity between teacher and student answers
-    
+
     Returns:
         float: Similarity score between 0 and 1
     """
     if not teacher_answer or not student_answer:
         return 0.0
-    
-    return calculate_cosine_similarity(teacher_answer, student_answer)
-
 
+    return calculate_cosine_similarity(teacher_answer, student_answer)
@@ -0,0 +1,101 @@
+"""
+Measure LLM feedback latency for one paper against the local mock LLM server
+
+Starts scripts/mock_llm_server.py in-process and times feedback for every
+question of a paper, requested one after another (as before) and all at
+once through the shared async client at each concurrency limit.
+
+Usage:
+    python scripts/benchmark_feedback.py [--questions 20] [--concurrency 1 4 8 20] [--latency 0.5] [--error-rate 0.0]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+
+from app.config import settings
+from app.services.feedback_service import (
+    generate_feedback_llm, get_feedback_client, iter_feedback_llm, shutdown_feedback_client
+)
+from mock_llm_server import create_app
+
+
+def start_mock_server(latency: float, jitter: float, error_rate: float) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(latency, jitter, error_rate), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def mock_stats(url: str, reset: bool = False) -> dict:
+    request = urllib.request.Request(f"{url}/stats/reset" if reset else f"{url}/stats", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def build_requests(count: int):
+    return [
+        {
+            'question': f"Question {i + 1}: explain photosynthesis.",
+            'teacher_answer': "photosynthesis uses sunlight water and carbon dioxide to make glucose and oxygen",
+            'student_answer': "plants make food from sunlight",
+            'missing_concepts': ["carbon dioxide", "glucose"],
+            'final_marks': 4.0,
+            'max_marks': 10.0
+        }
+        for i in range(count)
+    ]
+
+
+def run(name: str, url: str, fn):
+    shutdown_feedback_client()
+    mock_stats(url, reset=True)
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    client = get_feedback_client().stats()
+    print(f"{name:>18} {elapsed:>9.3f} {mock_stats(url)['max_in_flight']:>13} {client['retries']:>8} {client['failures']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 20])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    url = start_mock_server(args.latency, args.jitter, args.error_rate)
+    settings.OPENAI_API_KEY = "mock"
+    settings.OPENAI_BASE_URL = f"{url}/v1"
+    settings.LLM_RETRY_BASE_DELAY = min(settings.LLM_RETRY_BASE_DELAY, args.latency)
+    requests = build_requests(args.questions)
+
+    print(f"{args.questions} questions, mock latency {args.latency}s +/- {args.jitter}s, error rate {args.error_rate}")
+    print(f"{'run':>18} {'seconds':>9} {'max in flight':>13} {'retries':>8} {'failures':>9}")
+    run("one at a time", url, lambda: [generate_feedback_llm(**request) for request in requests])
+    for concurrency in args.concurrency:
+        settings.LLM_CONCURRENCY = concurrency
+        run(f"concurrent ({concurrency})", url, lambda: list(iter_feedback_llm(requests)))
+    shutdown_feedback_client()
+
+
+if __name__ == "__main__":
+    main()
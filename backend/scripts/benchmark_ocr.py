@@ -0,0 +1,81 @@
+"""
+Compare per-page OCR latency of the pytesseract and tesserocr engines
+
+Pages come from the given PDF/image files, or are synthetic typed pages
+when no files are given.
+
+Usage:
+    python scripts/benchmark_ocr.py [files ...] [--pages 5] [--repeats 3] [--dpi 300]
+"""
+import argparse
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.ocr_engine import benchmark_ocr_engines
+from app.services.ocr_service import iter_pdf_pages
+
+LINES = [
+    "1. Photosynthesis is the process by which green plants make glucose from sunlight.",
+    "2. An operating system manages hardware resources and schedules processes.",
+    "3. Newton's second law states that force equals mass times acceleration.",
+]
+
+
+def synthetic_page(index: int, dpi: int) -> Image.Image:
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=dpi // 7)
+    for row in range(30):
+        draw.text((dpi, dpi + row * dpi // 4), LINES[(index + row) % len(LINES)], fill=0, font=font)
+    return image
+
+
+def load_pages(paths, page_limit: int, dpi: int):
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.lower().endswith(".pdf"):
+            for _, image in iter_pdf_pages(data, dpi=dpi):
+                pages.append(image)
+                if len(pages) >= page_limit:
+                    return pages
+        else:
+            pages.append(Image.open(io.BytesIO(data)))
+            if len(pages) >= page_limit:
+                return pages
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.files:
+        pages = load_pages(args.files, args.pages, args.dpi)
+    else:
+        pages = [synthetic_page(i, args.dpi) for i in range(args.pages)]
+
+    report = benchmark_ocr_engines(pages, repeats=args.repeats)
+
+    print(f"{'engine':>12} {'pages':>6} {'first ms':>9} {'ms/page':>9} {'speedup':>8}")
+    for row in report:
+        if 'error' in row:
+            print(f"{row['engine']:>12}  unavailable: {row['error']}")
+            continue
+        speedup = row.get('speedup') if row.get('speedup') is not None else '-'
+        print(f"{row['engine']:>12} {row['pages']:>6} {row['first_page_ms']:>9} {row['ms_per_page']:>9} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare sequential and parallel per-question evaluation on a synthetic paper
+
+Usage:
+    python scripts/benchmark_parallel.py [--questions 30] [--workers 2 4 8 16]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.full_paper_evaluator import benchmark_parallel_evaluation
+
+TOPICS = [
+    ("Explain photosynthesis.",
+     "photosynthesis is the process by which green plants use sunlight, water and carbon dioxide to produce glucose and oxygen in the chloroplasts.",
+     "plants make food from sunlight and water and release oxygen, this happens in the leaves."),
+    ("What is an operating system?",
+     "an operating system is system software that manages hardware resources, schedules processes and provides common services for application programs.",
+     "the operating system controls the computer hardware and runs programs for the user."),
+    ("State Newton's second law.",
+     "newton's second law states that the net force on a body equals its mass multiplied by its acceleration, f = ma.",
+     "force is mass times acceleration which means heavier objects need more force."),
+]
+
+
+def build_paper(question_count: int):
+    questions, model_answers, student_answers = [], [], []
+    for i in range(question_count):
+        question, model_answer, student_answer = TOPICS[i % len(TOPICS)]
+        questions.append(f"{i + 1}. {question}")
+        model_answers.append(f"{i + 1}. {model_answer}")
+        student_answers.append(f"{i + 1}. {student_answer}")
+    return "\n".join(questions), "\n".join(model_answers), "\n".join(student_answers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    report = benchmark_parallel_evaluation(*build_paper(args.questions), args.workers, repeats=args.repeats)
+
+    print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'speedup':>8}")
+    for row in report:
+        threads = row['torch_threads'] if row['torch_threads'] is not None else '-'
+        print(f"{row['workers']:>8} {threads:>8} {row['seconds']:>9} {row['speedup']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure paper parser throughput (MB/s) on a synthetic combined answer book
+
+Usage:
+    python scripts/benchmark_parser.py [--size-mb 20] [--repeats 3]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.paper_parser import iter_paper_items, iter_student_sections, parse_questions_and_answers
+
+ANSWER_LINES = [
+    "Photosynthesis is the process by which green plants make glucose",
+    "from sunlight, water and carbon dioxide, releasing oxygen.",
+    "",
+    "An operating system manages hardware and schedules processes.",
+]
+
+
+def build_answer_book(size_bytes: int, questions: int = 20) -> str:
+    parts = []
+    size = 0
+    student = 0
+    while size < size_bytes:
+        student += 1
+        sheet = [f"Student Name: Student {student}"]
+        for number in range(1, questions + 1):
+            sheet.append(f"{number}. {ANSWER_LINES[number % len(ANSWER_LINES)] or 'Short answer'}")
+            sheet.extend(ANSWER_LINES[:1 + number % len(ANSWER_LINES)])
+        text = "\n".join(sheet) + "\n"
+        parts.append(text)
+        size += len(text.encode("utf-8"))
+    return "".join(parts)
+
+
+def measure(name: str, run, megabytes: float, repeats: int):
+    best = float("inf")
+    count = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = run()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>28} {count:>9} {best:>9.3f} {megabytes / best:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_answer_book(int(args.size_mb * 1024 * 1024))
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+    print(f"{megabytes:.1f} MB, {text.count(chr(10))} lines")
+
+    print(f"{'parser':>28} {'results':>9} {'seconds':>9} {'MB/s':>8}")
+    measure("parse_questions_and_answers", lambda: len(parse_questions_and_answers(text)), megabytes, args.repeats)
+    measure("iter_paper_items (file)", lambda: sum(1 for _ in iter_paper_items(io.StringIO(text))), megabytes, args.repeats)
+    measure("iter_student_sections", lambda: sum(1 for _ in iter_student_sections(text)), megabytes, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
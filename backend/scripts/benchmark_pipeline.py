@@ -0,0 +1,119 @@
+"""
+Compare handwritten-sheet latency with and without the OCR -> parse -> evaluate pipeline
+
+Times OCR alone, then the full evaluation with PIPELINED_OCR_EVALUATION
+off (OCR, then parse, then evaluate) and on. With no files, a synthetic
+scanned sheet (one typed answer per page) and its key are generated. The
+OCR cache is disabled so every run OCRs the sheet.
+
+Usage:
+    python scripts/benchmark_pipeline.py [--sheet sheet.pdf --questions q.txt --model-answers m.txt]
+                                         [--pages 15] [--repeats 3]
+"""
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.config import settings
+from app.api.handwritten_evaluate import run_handwritten_evaluation
+from app.services.executor_service import shutdown_executors
+from app.services.ocr_pipeline import ocr_document
+
+TOPICS = [
+    ("Explain photosynthesis.",
+     "photosynthesis is the process by which green plants use sunlight, water and carbon dioxide to produce glucose and oxygen in the chloroplasts.",
+     "plants make food from sunlight and water and release oxygen, this happens in the leaves."),
+    ("What is an operating system?",
+     "an operating system is system software that manages hardware resources, schedules processes and provides common services for application programs.",
+     "the operating system controls the computer hardware and runs programs for the user."),
+    ("State Newton's second law.",
+     "newton's second law states that the net force on a body equals its mass multiplied by its acceleration, f = ma.",
+     "force is mass times acceleration which means heavier objects need more force."),
+]
+
+
+def build_sheet(page_count: int, dpi: int = 150):
+    questions, model_answers, pages = [], [], []
+    font = ImageFont.load_default(size=dpi // 6)
+    for i in range(page_count):
+        question, model_answer, student_answer = TOPICS[i % len(TOPICS)]
+        questions.append(f"{i + 1}. {question}")
+        model_answers.append(f"{i + 1}. {model_answer}")
+
+        image = Image.new("L", (int(8.27 * dpi), int(11.69 * dpi)), 255)
+        draw = ImageDraw.Draw(image)
+        words = f"{i + 1}. {student_answer}".split()
+        for row in range(0, len(words), 6):
+            draw.text((dpi // 2, dpi // 2 + row * dpi // 20), " ".join(words[row:row + 6]), fill=0, font=font)
+        pages.append(image)
+
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=dpi)
+    return buffer.getvalue(), "\n".join(questions), "\n".join(model_answers)
+
+
+async def best_of(repeats: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def benchmark(sheet: bytes, questions: str, model_answers: str, repeats: int):
+    async def evaluate():
+        return await run_handwritten_evaluation(
+            questions, model_answers, None, None, None, None, (sheet, "application/pdf"), 10.0, 0.5, 0.5
+        )
+
+    await evaluate()  # warm up models and the OCR pool
+
+    ocr_seconds = await best_of(repeats, lambda: ocr_document(sheet, "application/pdf"))
+    settings.PIPELINED_OCR_EVALUATION = False
+    sequential = await best_of(repeats, evaluate)
+    settings.PIPELINED_OCR_EVALUATION = True
+    pipelined = await best_of(repeats, evaluate)
+
+    print(f"{'run':>22} {'seconds':>9} {'over OCR':>9}")
+    for name, seconds in (("OCR only", ocr_seconds), ("OCR, then evaluate", sequential), ("pipelined", pipelined)):
+        print(f"{name:>22} {seconds:>9.3f} {seconds - ocr_seconds:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sheet")
+    parser.add_argument("--questions")
+    parser.add_argument("--model-answers")
+    parser.add_argument("--pages", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.sheet:
+        if not (args.questions and args.model_answers):
+            parser.error("--sheet needs --questions and --model-answers")
+        with open(args.sheet, "rb") as f:
+            sheet = f.read()
+        with open(args.questions) as f:
+            questions = f.read()
+        with open(args.model_answers) as f:
+            model_answers = f.read()
+    else:
+        sheet, questions, model_answers = build_sheet(args.pages)
+
+    settings.OCR_CACHE_DIR = ""
+    try:
+        asyncio.run(benchmark(sheet, questions, model_answers, args.repeats))
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Export the embedding and concept models to ONNX (fp32 + int8) and report
+similarity drift against the fp32 torch models
+
+Usage:
+    python scripts/export_onnx.py [--backend onnx-int8] [--skip-export]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.onnx_backend import export_embedding_model, export_concept_model, check_backend_parity
+
+PARITY_TEXTS = [
+    "photosynthesis is the process by which green plants prepare food using sunlight, water and carbon dioxide.",
+    "plants make their food with the help of sunlight and chlorophyll.",
+    "the mitochondria is the powerhouse of the cell and produces atp through respiration.",
+    "newton's second law states that force equals mass times acceleration.",
+    "an operating system manages hardware resources and provides services to programs.",
+    "a stack is a last in first out data structure.",
+    "the french revolution began in 1789 and ended the absolute monarchy.",
+    "osmosis is the movement of water across a semi-permeable membrane.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["onnx", "onnx-int8"], default="onnx-int8")
+    parser.add_argument("--skip-export", action="store_true", help="Only run the parity check")
+    parser.add_argument("--no-quantize", action="store_true", help="Export fp32 only")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        print("Exported:", export_embedding_model(quantize=not args.no_quantize))
+        print("Exported:", export_concept_model(quantize=not args.no_quantize))
+
+    report = check_backend_parity(PARITY_TEXTS, backend=args.backend)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Local stand-in for the OpenAI chat completions API, for testing LLM feedback offline
+
+Replies in the STRENGTHS/WEAKNESSES/SUGGESTIONS format after a configurable
+latency, optionally failing a share of requests with 429/500 to exercise
+retries. GET /stats reports requests, failures and the peak number of
+requests in flight; POST /stats/reset clears them.
+
+Usage:
+    python scripts/mock_llm_server.py [--port 8001] [--latency 0.5] [--jitter 0.1] [--error-rate 0.0]
+
+Then run the backend with OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FEEDBACK = """STRENGTHS:
+- The answer addresses the main idea of the question.
+- Relevant terms are used correctly.
+
+WEAKNESSES:
+- Some key concepts are not explained.
+- The answer could be more detailed.
+
+SUGGESTIONS:
+- Cover the missing concepts listed above.
+- Compare your answer with the model answer.
+"""
+
+
+def create_app(latency: float = 0.5, jitter: float = 0.1, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    stats = {'requests': 0, 'failures': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+            if random.random() < error_rate:
+                stats['failures'] += 1
+                status = random.choice((429, 500))
+                return JSONResponse(
+                    status_code=status,
+                    content={"error": {"message": "mock failure", "type": "server_error", "code": status}}
+                )
+        finally:
+            stats['in_flight'] -= 1
+
+        return {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": FEEDBACK},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.update(requests=0, failures=0, max_in_flight=stats['in_flight'])
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per reply")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 429/500")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency, args.jitter, args.error_rate), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
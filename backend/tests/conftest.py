@@ -0,0 +1,53 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def bag_of_words_vectors(texts, dim=64):
+    """Deterministic stand-in for the models: hashed word counts, so shared words mean similar vectors"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.encode()) % dim] += 1.0
+    return vectors
+
+
+class FakeModels:
+    """Records the texts of every forward pass of the stand-in models"""
+
+    def __init__(self):
+        self.embedding_calls = []
+        self.concept_calls = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False):
+        self.embedding_calls.append(list(texts))
+        vectors = bag_of_words_vectors(texts)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def forward_concept_texts(self, texts):
+        self.concept_calls.append(list(texts))
+        return bag_of_words_vectors(texts)
+
+
+@pytest.fixture
+def deterministic_models(monkeypatch):
+    """Replace both models with FakeModels, with no micro-batching, persistent store or LLM"""
+    from app.config import settings
+    from app.services import concept_service, embedding_service
+
+    models = FakeModels()
+    monkeypatch.setattr(settings, 'BATCHING_ENABLED', False)
+    monkeypatch.setattr(settings, 'EMBEDDING_STORE_DIR', "")
+    monkeypatch.setattr(settings, 'OPENAI_API_KEY', "")
+    monkeypatch.setattr(embedding_service, 'get_embedding_model', lambda: models)
+    monkeypatch.setattr(concept_service, '_forward_concept_texts', models.forward_concept_texts)
+    embedding_service.get_embedding_cache().clear()
+    yield models
+    embedding_service.get_embedding_cache().clear()
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services import answer_pipeline
+from app.services.answer_pipeline import AnswerSheetPipeline
+from app.services.full_paper_evaluator import evaluate_full_paper
+from app.services.paper_parser import parse_questions_and_answers, parse_student_paper
+
+QUESTIONS = parse_questions_and_answers("1. What is photosynthesis?\n2. State Newton's second law.\n3. What is osmosis?")
+MODEL_ANSWERS = parse_questions_and_answers(
+    "1. Plants make food from sunlight, water and carbon dioxide.\n"
+    "2. Force equals mass times acceleration.\n"
+    "3. Water moving through a membrane from low to high concentration."
+)
+PAGES = [
+    {'page': 1, 'text': "1. Plants use sunlight and water to make food.\n2. Force is mass", 'error': None},
+    {'page': 2, 'text': "times acceleration.\n3. Movement of water", 'error': None},
+    {'page': 3, 'text': "", 'error': "tesseract failed"},
+    {'page': 4, 'text': "through a membrane.", 'error': None},
+]
+
+
+def test_answers_are_analysed_as_pages_arrive(deterministic_models, monkeypatch):
+    passes = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run_inference(fn, items, key):
+            passes.append([item['question_no'] for item in items])
+            await release.wait()
+            return fn(items, key)
+
+        monkeypatch.setattr(answer_pipeline, 'run_inference', run_inference)
+        pipeline = AnswerSheetPipeline(QUESTIONS, MODEL_ANSWERS)
+
+        # A page's last line may continue on the next page, so answer 1 completes with page 2
+        pipeline.add_page(PAGES[0])
+        await asyncio.sleep(0)
+        assert passes == []
+        pipeline.add_page(PAGES[1])
+        await asyncio.sleep(0)
+        assert passes == [[1]]
+
+        # Answer 2 completes while that pass is running and waits for the next one
+        pipeline.add_page(PAGES[2])
+        pipeline.add_page(PAGES[3])
+        await asyncio.sleep(0)
+        assert passes == [[1]]
+
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return await pipeline.finish(ocr_quality_score=80.0)
+
+    paper, analyses = asyncio.run(scenario())
+
+    # Answer 3 is only complete at the end and is left to the evaluator
+    assert passes == [[1], [2]]
+    sheet_text = "\n\n".join(page['text'] for page in PAGES if page['text'])
+    expected = parse_student_paper(QUESTIONS, MODEL_ANSWERS, sheet_text, 80.0)
+    assert paper.items == expected.items
+    assert list(analyses) == [item['content_hash'] for item in paper.items[:2]]
+
+    args = (None, None, None, 5, 0.5, 0.5, True, 80.0, 0)
+    assert evaluate_full_paper(*args, paper=paper, analyses=analyses) == evaluate_full_paper(*args, paper=paper)
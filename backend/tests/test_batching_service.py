@@ -0,0 +1,46 @@
+from concurrent.futures import wait
+
+import numpy as np
+import pytest
+
+from app.services.batching_service import MicroBatcher
+
+
+def _encode(texts):
+    return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+
+def test_requests_are_split_back_per_caller():
+    batcher = MicroBatcher("test", _encode, max_batch_size=8, max_wait_ms=50)
+
+    futures = [batcher.submit(["a", "bb"]), batcher.submit(["ccc"])]
+    wait(futures, timeout=5)
+
+    assert futures[0].result().tolist() == [[1.0], [2.0]]
+    assert futures[1].result().tolist() == [[3.0]]
+
+
+def test_encode_error_fails_the_batch_and_later_calls_complete():
+    calls = []
+
+    def flaky_encode(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("CUDA out of memory")
+        return _encode(texts)
+
+    batcher = MicroBatcher("test", flaky_encode, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        batcher.submit(["first"]).result(timeout=5)
+    assert batcher.submit(["second", "third"]).result(timeout=5).tolist() == [[6.0], [5.0]]
+    assert batcher.stats()['batches'] == 1
+
+
+def test_bad_encode_result_does_not_stop_the_batcher():
+    results = iter([None, _encode(["ok"])])
+    batcher = MicroBatcher("test", lambda texts: next(results), max_wait_ms=1)
+
+    with pytest.raises(TypeError):
+        batcher.submit(["first"]).result(timeout=5)
+    assert batcher.submit(["ok"]).result(timeout=5).tolist() == [[2.0]]
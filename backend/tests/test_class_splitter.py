@@ -0,0 +1,56 @@
+from app.services.class_splitter import split_class_pages
+
+
+def _page(number, text, error=None):
+    return {'page': number, 'text': text, 'confidence': 90.0, 'error': error}
+
+
+def test_multi_line_header_is_one_student():
+    pages = [
+        _page(1, "Name: Alice\nRoll No: 12\n1. plants make food\n2. force is mass times acceleration"),
+        _page(2, "Name: Bob\n\nRoll No: 13\n1. photosynthesis uses sunlight"),
+    ]
+
+    sheets = split_class_pages(pages, 'student_id')
+
+    assert [sheet['student_id'] for sheet in sheets] == ["Name: Alice | Roll No: 12", "Name: Bob | Roll No: 13"]
+    assert [sheet['pages'] for sheet in sheets] == [[1], [2]]
+    assert sheets[0]['text'] == "1. plants make food\n2. force is mass times acceleration"
+    assert sheets[1]['text'] == "1. photosynthesis uses sunlight"
+
+
+def test_header_split_across_pages():
+    pages = [
+        _page(1, "Name: Alice\n1. plants make food\nName: Bob"),
+        _page(2, "Roll No: 13\n1. photosynthesis uses sunlight"),
+    ]
+
+    sheets = split_class_pages(pages, 'student_id')
+
+    assert [sheet['student_id'] for sheet in sheets] == ["Name: Alice", "Name: Bob | Roll No: 13"]
+    assert [sheet['pages'] for sheet in sheets] == [[1], [1, 2]]
+
+
+def test_header_without_answers_is_dropped():
+    pages = [
+        _page(1, "Name: Alice\nRoll No: 12\n1. plants make food"),
+        _page(2, "Name: Bob\nRoll No: 13"),
+    ]
+
+    sheets = split_class_pages(pages, 'student_id')
+
+    assert [sheet['student_id'] for sheet in sheets] == ["Name: Alice | Roll No: 12"]
+
+
+def test_failed_page_is_kept_with_its_student():
+    pages = [
+        _page(1, "Name: Alice\n1. plants make food"),
+        _page(2, "Name: Bob"),
+        _page(3, "", error="tesseract failed"),
+    ]
+
+    sheets = split_class_pages(pages, 'student_id')
+
+    assert [sheet['student_id'] for sheet in sheets] == ["Name: Alice", "Name: Bob"]
+    assert sheets[1]['failed_pages'] == [3]
+    assert sheets[1]['text'] == ""
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.services.concept_service import calculate_concept_coverage, check_concept_presence, get_text_embedding
+
+TEACHER = "Photosynthesis converts light energy into chemical energy stored in glucose molecules"
+STUDENT = "Leaves capture sunlight and store food for the plant"
+
+
+def test_student_answer_is_encoded_once_per_request(deterministic_models):
+    result = calculate_concept_coverage(TEACHER, STUDENT)
+
+    encoded = [text for call in deterministic_models.concept_calls for text in call]
+    assert len(deterministic_models.concept_calls) == 1
+    assert encoded.count(STUDENT) == 1
+    # The concepts the keyword tiers could not decide went through the same pass
+    concepts = [entry['concept'] for entry in result['concept_analysis']]
+    assert set(encoded) - {STUDENT} <= set(concepts)
+    assert len(encoded) > 2
+
+
+def test_precomputed_student_embedding_is_reused(deterministic_models):
+    student_embedding = get_text_embedding(STUDENT)
+    deterministic_models.concept_calls.clear()
+
+    with_embedding = check_concept_presence("chemical energy", STUDENT, student_embedding=student_embedding)
+
+    assert [text for call in deterministic_models.concept_calls for text in call] == ["chemical energy"]
+    assert with_embedding == check_concept_presence("chemical energy", STUDENT)
+
+
+def test_keyword_matches_need_no_model(deterministic_models):
+    assert check_concept_presence("sunlight", STUDENT) == (True, 100.0, "covered")
+    assert check_concept_presence("", STUDENT) == (False, 0.0, "missing")
+    assert deterministic_models.concept_calls == []
+    assert np.asarray(get_text_embedding(STUDENT)).ndim == 1
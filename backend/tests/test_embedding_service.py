@@ -0,0 +1,78 @@
+import numpy as np
+
+from app.services.embedding_service import EmbeddingCache, encode_with_cache
+
+VECTOR_BYTES = 4 * 4  # four float32 values
+
+
+def _vector(value):
+    return np.full(4, value, dtype=np.float32)
+
+
+def test_key_ignores_whitespace_and_separates_models():
+    assert EmbeddingCache.make_key("m", "plants  make\nfood ") == EmbeddingCache.make_key("m", "plants make food")
+    assert EmbeddingCache.make_key("m", "plants") != EmbeddingCache.make_key("other", "plants")
+    assert EmbeddingCache.make_key("m", "plants") != EmbeddingCache.make_key("m", "Plants")
+
+
+def test_hits_misses_and_least_recently_used_eviction():
+    cache = EmbeddingCache(max_bytes=2 * VECTOR_BYTES)
+    a, b, c = (cache.make_key("m", text) for text in "abc")
+
+    assert cache.get(a) is None
+    cache.put(a, _vector(1))
+    cache.put(b, _vector(2))
+    assert cache.get(a).tolist() == [1.0] * 4  # a is now the most recently used
+    cache.put(c, _vector(3))
+
+    assert cache.get(b) is None
+    assert cache.get(c).tolist() == [3.0] * 4
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (2, 2 * VECTOR_BYTES, 1)
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+
+def test_float16_storage_returns_float32():
+    cache = EmbeddingCache(max_bytes=VECTOR_BYTES, use_float16=True)
+    key = cache.make_key("m", "a")
+    cache.put(key, _vector(0.5))
+
+    vector = cache.get(key)
+    assert vector.dtype == np.float32
+    assert cache.stats()['bytes'] == VECTOR_BYTES // 2
+
+
+def test_replacing_an_entry_and_oversized_vectors():
+    cache = EmbeddingCache(max_bytes=VECTOR_BYTES)
+    key = cache.make_key("m", "a")
+    cache.put(key, _vector(1))
+    cache.put(key, _vector(2))
+    cache.put(cache.make_key("m", "big"), np.ones(8, dtype=np.float32))
+
+    assert cache.get(key).tolist() == [2.0] * 4
+    assert cache.stats()['bytes'] == VECTOR_BYTES
+    assert cache.stats()['evictions'] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = EmbeddingCache(max_bytes=0)
+    key = cache.make_key("m", "a")
+    cache.put(key, _vector(1))
+
+    assert not cache.enabled
+    assert cache.get(key) is None
+
+
+def test_encode_with_cache_encodes_each_new_text_once(deterministic_models):
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+    first = encode_with_cache(["aa", "b", "aa"], "test-model", encode)
+    second = encode_with_cache(["b", "ccc"], "test-model", encode)
+
+    assert calls == [["aa", "b"], ["ccc"]]
+    assert first.tolist() == [[2.0], [1.0], [2.0]]
+    assert second.tolist() == [[1.0], [3.0]]
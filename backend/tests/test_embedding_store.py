@@ -0,0 +1,64 @@
+import numpy as np
+
+from app.services.embedding_store import EmbeddingStore
+
+DIGEST_A = "aa" * 32
+DIGEST_B = "bb" * 32
+DIGEST_C = "cc" * 32
+
+
+def test_reset_by_another_model_is_not_overwritten(tmp_path):
+    old = EmbeddingStore(str(tmp_path), "sentences", "old-model")
+    old.add_many([(DIGEST_A, np.ones(4))])
+
+    new = EmbeddingStore(str(tmp_path), "sentences", "new-model")  # wipes the old model's vectors
+    new.add_many([(DIGEST_B, np.full(4, 3.0))])
+    old.add_many([(DIGEST_C, np.full(4, 2.0))])
+
+    fresh = EmbeddingStore(str(tmp_path), "sentences", "new-model")
+    assert len(fresh) == 1
+    assert fresh.get(DIGEST_B).tolist() == [3.0] * 4
+    assert fresh.get(DIGEST_C) is None
+
+
+def test_reader_drops_rows_after_reset(tmp_path):
+    writer = EmbeddingStore(str(tmp_path), "sentences", "model")
+    reader = EmbeddingStore(str(tmp_path), "sentences", "model")
+    writer.add_many([(DIGEST_A, np.ones(4)), (DIGEST_B, np.full(4, 2.0))])
+    assert reader.get(DIGEST_B).tolist() == [2.0] * 4
+
+    EmbeddingStore(str(tmp_path), "sentences", "other-model")
+    EmbeddingStore(str(tmp_path), "sentences", "model").add_many([(DIGEST_B, np.full(4, 5.0))])
+
+    reader.add_many([(DIGEST_A, np.ones(4))])
+    fresh = EmbeddingStore(str(tmp_path), "sentences", "model")
+    assert fresh.get(DIGEST_B).tolist() == [5.0] * 4
+    assert fresh.get(DIGEST_A).tolist() == [1.0] * 4
+
+
+def test_vectors_survive_reopening(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "sentences", "model")
+    store.add_many([(DIGEST_A, np.ones(4)), (DIGEST_B, np.full(4, 2.0)), (DIGEST_A, np.full(4, 9.0))])
+
+    reopened = EmbeddingStore(str(tmp_path), "sentences", "model")
+    assert len(reopened) == 2
+    assert reopened.get(DIGEST_A).tolist() == [1.0] * 4
+    assert reopened.get(DIGEST_C) is None
+    assert reopened.stats()['dim'] == 4
+
+
+def test_other_processes_see_appended_vectors(tmp_path):
+    reader = EmbeddingStore(str(tmp_path), "sentences", "model")
+    EmbeddingStore(str(tmp_path), "sentences", "model").add_many([(DIGEST_A, np.ones(4))])
+
+    assert reader.get(DIGEST_A, refresh=False) is None
+    assert reader.get(DIGEST_A).tolist() == [1.0] * 4
+
+
+def test_wrong_dimension_is_not_stored(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "sentences", "model")
+    store.add_many([(DIGEST_A, np.ones(4))])
+    store.add_many([(DIGEST_B, np.ones(8))])
+
+    assert store.get(DIGEST_B) is None
+    assert len(EmbeddingStore(str(tmp_path), "sentences", "model")) == 1
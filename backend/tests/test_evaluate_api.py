@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.evaluate import _sse
+from app.main import app
+from app.services.executor_service import shutdown_executors
+
+QUESTIONS = "1. What is photosynthesis?\n2. State Newton's second law.\n3. What is evaporation?"
+MODEL_ANSWERS = (
+    "1. Plants use sunlight, water and carbon dioxide to make glucose and oxygen.\n"
+    "2. Force equals mass times acceleration.\n"
+    "3. Evaporation is a liquid turning into vapour at its surface."
+)
+STUDENT = "1. Plants make glucose from sunlight and water.\n2. Force is mass times acceleration."
+
+
+@pytest.fixture
+def client(deterministic_models):
+    # No lifespan: the stand-in models need no loading and no database is used
+    yield TestClient(app)
+    shutdown_executors()
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_sse_event_is_one_event_and_one_data_line():
+    frame = _sse("question", {'text': "line one\nline two", 'at': datetime(2024, 1, 2)})
+
+    assert frame.endswith("\n\n")
+    assert _parse_sse(frame) == [("question", {'text': "line one\nline two", 'at': "2024-01-02 00:00:00"})]
+
+
+def test_stream_reassembles_to_the_full_paper_result(client):
+    body = {"questions": QUESTIONS, "model_answers": MODEL_ANSWERS, "student_answers": STUDENT, "marks_per_question": 10}
+    full = client.post("/evaluate/full-paper", json=body).json()
+
+    response = client.post("/evaluate/full-paper/stream", json=body)
+
+    assert response.headers['content-type'].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert sorted(name for name, _ in events[:-1]) == ["feedback"] * 3 + ["question"] * 3
+    results = {}
+    for name, data in events:
+        if name == "question":
+            assert data['feedback'] is None or data['status'] == 'not_answered'
+            results[data.pop('index')] = data
+        elif name == "feedback":
+            # A question's feedback never arrives before its marks
+            results[data['index']]['feedback'] = data['feedback']
+    assert [results[i] for i in sorted(results)] == full['question_wise_results']
+    assert events[-1][1] == {'summary': full['summary']}
+
+
+def test_batch_streams_one_json_line_per_student(client):
+    response = client.post("/evaluate/full-paper/batch", data={
+        "questions": QUESTIONS,
+        "model_answers": MODEL_ANSWERS,
+        "marks_per_question": "10",
+        "student_answers": [STUDENT, "1. Sunlight."]
+    })
+
+    assert response.headers['content-type'].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line['student_id'], line['status']) for line in lines[:-1]] == [("text-1", "completed"), ("text-2", "completed")]
+    assert lines[-1]['done'] is True
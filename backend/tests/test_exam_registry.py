@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import exam_registry
+from app.services.exam_registry import (
+    compile_exam, exam_from_document, exam_to_document, get_compiled_exam, is_exam_current, make_exam_id
+)
+
+QUESTIONS = "1. What is photosynthesis?\n2. State Newton's second law."
+MODEL_ANSWERS = (
+    "1. Plants use sunlight, water and carbon dioxide to make glucose and oxygen.\n"
+    "2. Force equals mass times acceleration."
+)
+
+
+@pytest.fixture
+def registry(deterministic_models, monkeypatch):
+    monkeypatch.setattr(exam_registry, '_compiled_exams', OrderedDict())
+    monkeypatch.setattr(settings, 'INFERENCE_BACKEND', "torch")
+
+
+def _assert_same_exam(actual, expected):
+    assert actual.keys() == expected.keys()
+    for field, value in expected.items():
+        if isinstance(value, np.ndarray):
+            assert actual[field].dtype == np.float32
+            assert np.array_equal(actual[field], value), field
+        else:
+            assert actual[field] == value, field
+
+
+def test_document_round_trip_restores_the_compiled_exam(registry):
+    key = compile_exam(QUESTIONS, MODEL_ANSWERS, title="Science")
+
+    restored = exam_from_document(exam_to_document(key))
+
+    _assert_same_exam(restored, key)
+    assert set(restored['required_concepts']) == {1, 2}
+    assert restored['concept_embeddings'].shape == (len(key['concepts']), 64)
+
+
+def test_document_has_only_string_keys(registry):
+    document = exam_to_document(compile_exam(QUESTIONS, MODEL_ANSWERS))
+
+    def _keys(value):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                yield k
+                yield from _keys(v)
+
+    assert all(isinstance(k, str) for k in _keys(document))
+
+
+def test_exam_id_depends_only_on_content(registry):
+    key = compile_exam(QUESTIONS, MODEL_ANSWERS)
+
+    assert key['exam_id'] == make_exam_id(QUESTIONS, MODEL_ANSWERS)
+    assert key['exam_id'] != make_exam_id(QUESTIONS, MODEL_ANSWERS + " ")
+    assert get_compiled_exam(key['exam_id']) is key
+
+
+def test_exam_compiled_with_other_models_is_stale(registry, monkeypatch):
+    key = compile_exam(QUESTIONS, MODEL_ANSWERS)
+    assert is_exam_current(key)
+
+    monkeypatch.setattr(settings, 'INFERENCE_BACKEND', "onnx-int8")
+    assert not is_exam_current(key)
+
+
+def test_in_memory_exams_are_bounded(registry, monkeypatch):
+    monkeypatch.setattr(settings, 'EXAM_CACHE_SIZE', 1)
+    first = compile_exam(QUESTIONS, MODEL_ANSWERS)
+    second = compile_exam(QUESTIONS, "1. Something else entirely.\n2. Also different.")
+
+    assert get_compiled_exam(first['exam_id']) is None
+    assert get_compiled_exam(second['exam_id']) is second
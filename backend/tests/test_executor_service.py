@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.config import settings
+from app.services import executor_service
+from app.services.executor_service import get_torch_thread_budget, run_inference, run_io, shutdown_executors
+
+
+def test_blocking_work_runs_off_the_event_loop_thread():
+    async def scenario():
+        loop_thread = threading.current_thread().name
+        inference_thread = await run_inference(lambda: threading.current_thread().name)
+        io_thread = await run_io(lambda x, y=0: (threading.current_thread().name, x + y), 1, y=2)
+        return loop_thread, inference_thread, io_thread
+
+    try:
+        loop_thread, inference_thread, (io_thread, total) = asyncio.run(scenario())
+    finally:
+        shutdown_executors()
+
+    assert inference_thread.startswith("inference") and inference_thread != loop_thread
+    assert io_thread.startswith("io")
+    assert total == 3
+
+
+def test_ocr_without_workers_shares_the_inference_pool(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_WORKERS', 0)
+
+    try:
+        assert executor_service.get_ocr_executor() is executor_service.get_inference_executor()
+    finally:
+        shutdown_executors()
+    assert executor_service._inference_executor is None
+
+
+def test_torch_threads_are_split_across_question_workers(monkeypatch):
+    monkeypatch.setattr(executor_service.os, 'cpu_count', lambda: 8)
+    monkeypatch.setattr(settings, 'PARALLEL_TORCH_THREADS', 0)
+    assert [get_torch_thread_budget(workers) for workers in (1, 2, 3, 16)] == [8, 4, 2, 1]
+
+    monkeypatch.setattr(settings, 'PARALLEL_TORCH_THREADS', 3)
+    assert get_torch_thread_budget(2) == 3
@@ -0,0 +1,80 @@
+import random
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APITimeoutError, BadRequestError, RateLimitError
+
+from app.services.feedback_service import MAX_RETRY_DELAY, LLMFeedbackClient
+
+REQUEST = httpx.Request("POST", "https://llm.test/v1/chat/completions")
+MESSAGES = [{"role": "user", "content": "Give feedback"}]
+
+
+def _status_error(error_type, status, headers=None):
+    return error_type("error", response=httpx.Response(status, headers=headers, request=REQUEST), body=None)
+
+
+class FakeCompletions:
+    """Raises the scripted errors in turn, then answers"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Strengths: clear"))])
+
+
+def _client(errors, **kwargs):
+    client = LLMFeedbackClient(api_key="test", timeout=2.5, retry_base_delay=0.0, **kwargs)
+    completions = FakeCompletions(errors)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_retry_delay_is_jittered_capped_and_honours_retry_after():
+    client = LLMFeedbackClient(api_key="test", retry_base_delay=0.5)
+    random.seed(3)
+    timeout = APITimeoutError(request=REQUEST)
+
+    for attempt in range(6):
+        delays = [client._retry_delay(attempt, timeout) for _ in range(50)]
+        assert 0 <= min(delays) and max(delays) <= min(MAX_RETRY_DELAY, 0.5 * 2 ** attempt)
+
+    assert client._retry_delay(0, _status_error(RateLimitError, 429, {'retry-after': "3"})) >= 3.0
+    assert client._retry_delay(0, _status_error(RateLimitError, 429, {'retry-after': "120"})) == MAX_RETRY_DELAY
+    assert client._retry_delay(0, _status_error(RateLimitError, 429, {'retry-after': "soon"})) <= 0.5
+
+
+def test_transient_errors_are_retried_with_the_attempt_timeout():
+    client, completions = _client([APITimeoutError(request=REQUEST), _status_error(RateLimitError, 429)])
+    try:
+        assert client.submit(MESSAGES).result(timeout=5) == "Strengths: clear"
+    finally:
+        client.close()
+
+    assert len(completions.calls) == 3
+    assert all(call['timeout'] == 2.5 for call in completions.calls)
+    stats = client.stats()
+    assert (stats['requests'], stats['retries'], stats['failures'], stats['in_flight']) == (1, 2, 0, 0)
+
+
+def test_requests_fail_after_max_retries_or_on_client_errors():
+    client, completions = _client([APITimeoutError(request=REQUEST)] * 3, max_retries=2)
+    try:
+        with pytest.raises(APITimeoutError):
+            client.submit(MESSAGES).result(timeout=5)
+        assert len(completions.calls) == 3
+
+        completions.errors = [_status_error(BadRequestError, 400)]
+        with pytest.raises(BadRequestError):
+            client.submit(MESSAGES).result(timeout=5)
+        assert len(completions.calls) == 4
+    finally:
+        client.close()
+
+    assert (client.stats()['retries'], client.stats()['failures']) == (2, 2)
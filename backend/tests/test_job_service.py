@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.services import job_service
+from app.services.job_service import InMemoryJobStore, JobManager
+
+LEASE_SECONDS = 60
+
+
+def _job(job_id, created_at):
+    return {
+        'job_id': job_id,
+        'type': 'test',
+        'status': 'queued',
+        'payload': {'n': 1},
+        'file_ids': [],
+        'attempts': 0,
+        'error': None,
+        'created_at': created_at,
+        'started_at': None,
+        'heartbeat_at': None,
+        'finished_at': None
+    }
+
+
+async def _expire_lease(store, job_id):
+    await store.update(job_id, {'heartbeat_at': datetime.utcnow() - timedelta(seconds=LEASE_SECONDS + 1)})
+
+
+def test_claim_takes_oldest_queued_job_once():
+    async def scenario():
+        store = InMemoryJobStore()
+        now = datetime.utcnow()
+        await store.insert(_job('newer', now))
+        await store.insert(_job('older', now - timedelta(seconds=1)))
+
+        first = await store.claim(LEASE_SECONDS, max_attempts=3)
+        second = await store.claim(LEASE_SECONDS, max_attempts=3)
+        third = await store.claim(LEASE_SECONDS, max_attempts=3)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert (first['job_id'], first['status'], first['attempts']) == ('older', 'running', 1)
+    assert second['job_id'] == 'newer'
+    assert third is None
+
+
+def test_job_is_reclaimed_only_after_its_lease_expires():
+    async def scenario():
+        store = InMemoryJobStore()
+        await store.insert(_job('job', datetime.utcnow()))
+        await store.claim(LEASE_SECONDS, max_attempts=3)
+
+        while_leased = await store.claim(LEASE_SECONDS, max_attempts=3)
+        await _expire_lease(store, 'job')
+        after_expiry = await store.claim(LEASE_SECONDS, max_attempts=3)
+        return while_leased, after_expiry
+
+    while_leased, after_expiry = asyncio.run(scenario())
+
+    assert while_leased is None
+    assert (after_expiry['status'], after_expiry['attempts']) == ('running', 2)
+
+
+def test_job_fails_once_attempts_are_used_up():
+    async def scenario():
+        store = InMemoryJobStore()
+        await store.insert(_job('job', datetime.utcnow()))
+        claims = []
+        for _ in range(3):
+            claims.append(await store.claim(LEASE_SECONDS, max_attempts=2))
+            await _expire_lease(store, 'job')
+        return claims, await store.claim(LEASE_SECONDS, max_attempts=2), await store.get('job')
+
+    claims, after_failure, stored = asyncio.run(scenario())
+
+    assert [claim['status'] for claim in claims] == ['running', 'running', 'failed']
+    assert claims[2]['attempts'] == 2
+    assert 'payload' not in claims[2]
+    assert after_failure is None
+    assert stored['status'] == 'failed'
+    assert stored['error'] == "Job did not finish after 2 attempts"
+
+
+def test_worker_does_not_run_a_job_out_of_attempts(monkeypatch):
+    ran = []
+
+    async def handler(payload, progress):
+        ran.append(payload)
+        return {}
+
+    monkeypatch.setitem(job_service._handlers, 'test', handler)
+    monkeypatch.setattr(settings, 'JOB_MAX_ATTEMPTS', 1)
+    monkeypatch.setattr(settings, 'JOB_LEASE_SECONDS', LEASE_SECONDS)
+
+    async def scenario():
+        store = InMemoryJobStore()
+        manager = JobManager(store, workers=1, poll_interval=0.01)
+        file_id = await manager.put_file(b"sheet")
+        job = {**_job('job', datetime.utcnow()), 'status': 'running', 'attempts': 1, 'file_ids': [file_id]}
+        await store.insert(job)
+        await _expire_lease(store, 'job')
+
+        await manager.start()
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return await store.get('job'), store._files
+
+    stored, files = asyncio.run(scenario())
+
+    assert ran == []
+    assert stored['status'] == 'failed'
+    assert files == {}
@@ -0,0 +1,72 @@
+import os
+
+from app.config import settings
+from app.services import ocr_cache
+from app.services.ocr_cache import OcrCache, ocr_cache_key, ocr_settings_fingerprint
+
+
+def _entry(size=100):
+    return {'text': "x" * size, 'confidence': 90.0, 'pages': [{'page': 1, 'source': 'ocr'}], 'engine': "tesserocr"}
+
+
+def test_get_counts_hits_misses_and_rejected_entries(tmp_path):
+    cache = OcrCache(str(tmp_path), 1024 * 1024)
+    cache.put("a", _entry())
+
+    assert cache.get("a") == _entry()
+    assert cache.get("missing") is None
+    # An entry the caller can't use (e.g. written before page text was cached) is a miss
+    assert cache.get("a", accept=lambda entry: 'text' in entry['pages'][0]) is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 1)
+
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path):
+    cache = OcrCache(str(tmp_path), 1024 * 1024)
+    for key in ("a", "b", "c"):
+        cache.put(key, _entry())
+    size = os.path.getsize(cache._path("a"))
+    cache.max_bytes = 3 * size
+    for mtime, key in enumerate(("a", "b", "c"), start=1):
+        os.utime(cache._path(key), (mtime, mtime))
+
+    cache.get("a")
+    cache.put("d", _entry())
+
+    assert sorted(name[:-len(".json")] for name in os.listdir(tmp_path)) == ["a", "c", "d"]
+    assert cache.stats()['bytes'] == 3 * size
+
+
+def test_size_estimate_tracks_puts_between_rescans(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, 'RESCAN_EVERY_PUTS', 4)
+    cache = OcrCache(str(tmp_path), 1024 * 1024)
+    cache.put("a", _entry(100))
+    cache.put("b", _entry(300))
+    cache.put("a", _entry(50))
+
+    assert cache._puts_since_scan == 2
+    assert cache._bytes == cache.stats()['bytes']
+
+    # Another process's write is only picked up by the periodic rescan
+    with open(os.path.join(tmp_path, "other.json"), "w") as f:
+        f.write("{}")
+    cache.put("c", _entry())
+    assert cache._bytes == cache.stats()['bytes'] - 2
+    cache.put("d", _entry())
+    assert cache._puts_since_scan == 0
+    assert cache._bytes == cache.stats()['bytes']
+
+
+def test_cache_key_covers_content_type_and_ocr_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_ENGINE', "auto")
+    key = ocr_cache_key(b"%PDF", "application/pdf")
+
+    assert ocr_cache_key(b"%PDF", "application/pdf") == key
+    assert ocr_cache_key(b"%PDF", "image/png") != key
+    assert ocr_cache_key(b"%PDF-1.7", "application/pdf") != key
+    # The configured engine, not whichever one "auto" resolves to in this process
+    assert ocr_settings_fingerprint()['engine'] == "auto"
+
+    monkeypatch.setattr(settings, 'OCR_DPI', settings.OCR_DPI + 100)
+    assert ocr_cache_key(b"%PDF", "application/pdf") != key
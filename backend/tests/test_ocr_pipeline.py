@@ -0,0 +1,130 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.config import settings
+from app.services import ocr_pipeline
+from app.services.executor_service import shutdown_executors
+from app.services.job_service import JobProgress
+from app.services.ocr_service import combine_page_results
+
+PAGES = 7
+NATIVE_PAGE = 2
+FAILED_PAGE = 5
+
+
+def _classified():
+    return [
+        {'page': n, 'source': 'native', 'text': f"typed {n}"} if n == NATIVE_PAGE else {'page': n, 'source': 'ocr', 'text': ''}
+        for n in range(1, PAGES + 1)
+    ]
+
+
+def _ocr_result(n, dpi=300):
+    if n == FAILED_PAGE:
+        return {'page': n, 'source': 'ocr', 'text': '', 'confidence': None, 'dpi': dpi, 'error': "tesseract crashed"}
+    return {'page': n, 'source': 'ocr', 'text': f"page {n}", 'confidence': 80.0 + n, 'dpi': dpi, 'error': None}
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """OCR in threads with stand-ins for page classification and OCR; records the page chunks"""
+    monkeypatch.setattr(settings, 'OCR_WORKERS', 0)
+    monkeypatch.setattr(settings, 'OCR_CACHE_DIR', "")
+    monkeypatch.setattr(settings, 'OCR_PAGE_CONCURRENCY', 3)
+    monkeypatch.setattr(ocr_pipeline, 'classify_pdf_pages', lambda pdf_bytes: _classified())
+    monkeypatch.setattr(ocr_pipeline, 'resolve_ocr_engine_name', lambda: "fake")
+    chunks = []
+    lock = threading.Lock()
+
+    def ocr_pdf_pages(pdf_bytes, page_numbers, get_confidence=False):
+        with lock:
+            chunks.append(list(page_numbers))
+        return [_ocr_result(n) for n in page_numbers]
+
+    monkeypatch.setattr(ocr_pipeline, 'ocr_pdf_pages', ocr_pdf_pages)
+    yield chunks
+    shutdown_executors()
+
+
+def test_scanned_pages_are_split_into_one_chunk_per_worker(fake_ocr):
+    progress = JobProgress()
+
+    result = asyncio.run(ocr_pipeline.ocr_document(b"%PDF", "application/pdf", progress=progress, page_text=True))
+
+    assert sorted(fake_ocr) == [[1, 3], [4, 5], [6, 7]]
+    assert [page['page'] for page in result['pages']] == list(range(1, PAGES + 1))
+    assert result['text'] == "page 1\n\ntyped 2\n\npage 3\n\npage 4\n\npage 6\n\npage 7"
+    assert result['failed_pages'] == [FAILED_PAGE]
+    assert result['pages'][NATIVE_PAGE - 1]['confidence'] is None
+    assert result['engine'] == "fake"
+    assert progress.snapshot()['progress'] == {'ocr_pages': {'done': PAGES, 'total': PAGES}}
+
+
+def test_page_text_is_left_out_unless_asked_for(fake_ocr):
+    result = asyncio.run(ocr_pipeline.ocr_document(b"%PDF", "application/pdf"))
+
+    assert all('text' not in page for page in result['pages'])
+
+
+def test_every_page_failing_fails_the_document():
+    pages = [{'page': n, 'text': '', 'confidence': None, 'error': "boom"} for n in (2, 1)]
+
+    with pytest.raises(RuntimeError, match="every page"):
+        combine_page_results(pages)
+
+
+def test_unsupported_file_type_is_rejected(fake_ocr):
+    with pytest.raises(ValueError):
+        asyncio.run(ocr_pipeline.ocr_document(b"text", "text/plain"))
+
+
+
+def _slow_ocr(delay, started, cancelled):
+    """ocr_chunk stand-in taking delay(page) seconds; records started and cancelled pages"""
+    async def ocr_chunk(page_numbers):
+        started.append(page_numbers[0])
+        try:
+            await asyncio.sleep(delay(page_numbers[0]))
+        except asyncio.CancelledError:
+            cancelled.append(page_numbers[0])
+            raise
+        return [_ocr_result(n) for n in page_numbers]
+    return ocr_chunk
+
+
+def test_pages_are_handed_on_in_page_order(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_PAGE_CONCURRENCY', 3)
+    started = []
+    handed_on = []
+    # Later pages finish first
+    ocr_chunk = _slow_ocr(lambda n: 0.01 * (PAGES - n), started, [])
+
+    pages = asyncio.run(ocr_pipeline._ocr_pages_in_order(
+        _classified(), ocr_chunk, lambda page: handed_on.append(page['page'])
+    ))
+
+    assert handed_on == [page['page'] for page in pages] == list(range(1, PAGES + 1))
+    assert started[:3] == [1, 3, 4]
+    assert pages[NATIVE_PAGE - 1]['text'] == "typed 2"
+    assert pages[FAILED_PAGE - 1]['error'] == "tesseract crashed"
+
+
+def test_a_failing_page_callback_cancels_the_other_pages(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_PAGE_CONCURRENCY', 3)
+    started = []
+    cancelled = []
+    ocr_chunk = _slow_ocr(lambda n: 0 if n == 1 else 30, started, cancelled)
+
+    def on_page(page):
+        if page['page'] == 1:
+            raise RuntimeError("client went away")
+
+    with pytest.raises(RuntimeError, match="client went away"):
+        asyncio.run(ocr_pipeline._ocr_pages_in_order(_classified(), ocr_chunk, on_page))
+
+    # Pages still waiting for a slot never start; those running are cancelled rather than awaited
+    assert started[:3] == [1, 3, 4]
+    assert len(started) < PAGES - 1
+    assert sorted(cancelled) == started[1:]
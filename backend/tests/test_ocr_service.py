@@ -0,0 +1,173 @@
+import io
+
+import fitz
+from PIL import Image
+
+from app.config import settings
+from app.services import ocr_service
+from app.services.ocr_engine import TSV_COLUMNS, parse_tsv
+from app.services.ocr_service import classify_pdf_pages, ocr_pdf_pages
+
+TYPED = "Question 1. Explain how plants make their food using sunlight, water and carbon dioxide."
+
+
+def _png(width=200, height=200):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _pdf(*builders):
+    doc = fitz.open()
+    for build in builders:
+        build(doc.new_page())
+    return doc.tobytes()
+
+
+def _typed(page):
+    page.insert_text((72, 72), TYPED, fontsize=9)
+
+
+def _scan_with_typed_header(page):
+    page.insert_image(page.rect, stream=_png())
+    page.insert_text((72, 40), TYPED, fontsize=9)
+
+
+def _short_label(page):
+    page.insert_text((72, 72), "Page 3")
+
+
+def _label_on_ruled_paper(page):
+    page.insert_text((72, 72), "Name:")
+    for y in range(100, 700, 30):
+        page.draw_line((72, y), (520, y))
+
+
+def _blank(page):
+    pass
+
+
+def test_each_page_gets_the_cheapest_usable_source():
+    pdf = _pdf(_typed, _scan_with_typed_header, _short_label, _label_on_ruled_paper, _blank)
+
+    pages = classify_pdf_pages(pdf)
+
+    assert [(page['page'], page['source']) for page in pages] == [
+        (1, 'native'), (2, 'ocr'), (3, 'native'), (4, 'ocr'), (5, 'blank')
+    ]
+    assert pages[0]['text'] == TYPED
+    assert pages[2]['text'] == "Page 3"
+    assert all(page['text'] == '' for page in pages if page['source'] != 'native')
+
+
+def _fake_rendered_pages(monkeypatch, confidences):
+    """Stand in for rendering plus tesseract: confidences[dpi][page] (None means the page failed)"""
+    calls = []
+
+    def rendered_pages(pdf_bytes, page_numbers, dpi, get_confidence):
+        calls.append((page_numbers, dpi))
+        pages = []
+        for page in page_numbers or sorted(confidences[dpi]):
+            confidence = confidences[dpi][page]
+            pages.append({
+                'page': page, 'source': 'ocr', 'text': f"{TYPED} page {page} at {dpi}",
+                'confidence': confidence, 'dpi': dpi, 'error': None if confidence is not None else "render failed"
+            })
+        return pages
+
+    monkeypatch.setattr(ocr_service, '_ocr_rendered_pages', rendered_pages)
+    return calls
+
+
+def test_standard_mode_renders_once_at_full_dpi(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_MODE', "standard")
+    calls = _fake_rendered_pages(monkeypatch, {settings.OCR_DPI: {1: 40.0, 2: 90.0}})
+
+    pages = ocr_pdf_pages(b"%PDF", get_confidence=True)
+
+    assert calls == [(None, settings.OCR_DPI)]
+    assert [page['confidence'] for page in pages] == [40.0, 90.0]
+
+
+def test_adaptive_mode_rerenders_only_low_quality_pages(monkeypatch):
+    monkeypatch.setattr(settings, 'OCR_MODE', "adaptive")
+    monkeypatch.setattr(settings, 'OCR_LOW_DPI', 200)
+    monkeypatch.setattr(settings, 'OCR_DPI', 300)
+    monkeypatch.setattr(settings, 'OCR_RETRY_CONFIDENCE', 70.0)
+    calls = _fake_rendered_pages(monkeypatch, {
+        200: {1: 95.0, 2: 40.0, 3: 50.0, 4: None},
+        300: {2: 85.0, 3: 30.0},
+    })
+
+    pages = ocr_pdf_pages(b"%PDF", get_confidence=True)
+
+    # Page 4 failed to render, which a higher DPI will not fix
+    assert calls == [(None, 200), ([2, 3], 300)]
+    assert [(page['page'], page['dpi'], page['confidence']) for page in pages] == [
+        (1, 200, 95.0), (2, 300, 85.0), (3, 200, 50.0), (4, 200, None)
+    ]
+    assert pages[3]['error'] == "render failed"
+
+    calls.clear()
+    pages = ocr_pdf_pages(b"%PDF", [2], get_confidence=False)
+
+    assert calls == [([2], 200), ([2], 300)]
+    assert [(page['dpi'], page['confidence']) for page in pages] == [(300, None)]
+
+
+# Tesseract TSV (GetTSVText has no header row): page, block, paragraph, line and word levels
+TSV = "\n".join("\t".join(str(field) for field in row) for row in [
+    (1, 1, 0, 0, 0, 0, 0, 0, 800, 600, -1, ""),
+    (2, 1, 1, 0, 0, 0, 10, 10, 700, 200, -1, ""),
+    (3, 1, 1, 1, 0, 0, 10, 10, 700, 90, -1, ""),
+    (4, 1, 1, 1, 1, 0, 10, 10, 700, 40, -1, ""),
+    (5, 1, 1, 1, 1, 1, 10, 10, 30, 40, 96.5, "1."),
+    (5, 1, 1, 1, 1, 2, 50, 10, 300, 40, 90, "Photosynthesis"),
+    (4, 1, 1, 1, 2, 0, 10, 60, 700, 40, -1, ""),
+    (5, 1, 1, 1, 2, 1, 10, 60, 120, 40, 0, "makes"),
+    (5, 1, 1, 1, 2, 2, 140, 60, 90, 40, 80, "food"),
+    (5, 1, 1, 1, 2, 3, 240, 60, 10, 40, -1, " "),
+    (3, 1, 1, 2, 0, 0, 10, 120, 700, 40, -1, ""),
+    (4, 1, 1, 2, 1, 0, 10, 120, 700, 40, -1, ""),
+    (5, 1, 1, 2, 1, 1, 10, 120, 30, 40, 95, "2."),
+    (5, 1, 1, 2, 1, 2, 50, 120, 60, 40, -1, "~"),
+    (5, 1, 1, 2, 1, 3, 120, 120, 200, 40, 85, "Newton"),
+])
+
+
+def test_parse_tsv_matches_pytesseract_dict_layout():
+    data = parse_tsv("level\tpage_num\tblock_num\n" + TSV + "\n")
+
+    assert list(data) == list(TSV_COLUMNS)
+    assert all(len(values) == 15 for values in data.values())
+    assert data['level'][:5] == [1, 2, 3, 4, 5]
+    # Confidences are truncated to int like pytesseract's
+    assert data['conf'][4] == 96
+    assert data['text'][4:6] == ["1.", "Photosynthesis"]
+    assert data['text'][9] == " "
+
+
+class FakeOcrEngine:
+    name = "fake"
+
+    def __init__(self, data):
+        self.data = data
+
+    def image_to_data(self, image):
+        return self.data
+
+
+def test_recognize_image_rebuilds_lines_and_paragraphs(monkeypatch):
+    monkeypatch.setattr(ocr_service, 'get_ocr_engine', lambda: FakeOcrEngine(parse_tsv(TSV)))
+
+    result = ocr_service.recognize_image(Image.new("L", (800, 600), 255))
+
+    assert result['text'] == "1. Photosynthesis\nmakes food\n\n2. ~ Newton"
+    assert [line['text'] for line in result['lines']] == ["1. Photosynthesis", "makes food", "2. ~ Newton"]
+    assert [line['confidence'] for line in result['lines']] == [93.0, 40.0, 90.0]
+    assert [(word['text'], word['confidence'], word['line']) for word in result['words']] == [
+        ("1.", 96.0, 0), ("Photosynthesis", 90.0, 0), ("makes", 0.0, 1), ("food", 80.0, 1),
+        ("2.", 95.0, 2), ("~", None, 2), ("Newton", 85.0, 2)
+    ]
+    # Mean of positive word confidences only: the 0 and -1 words do not count
+    assert result['confidence'] == (96 + 90 + 80 + 95 + 85) / 5
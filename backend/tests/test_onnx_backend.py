@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.onnx_backend import _pool, get_artifact_dir, get_inference_backend, get_model_variant
+
+
+@pytest.mark.parametrize("backend, variant", [
+    ("torch", "bert-base-uncased"),
+    ("ONNX", "bert-base-uncased@onnx"),
+    ("onnx-int8", "bert-base-uncased@onnx-int8"),
+])
+def test_model_variant_keys_vectors_by_backend(monkeypatch, backend, variant):
+    monkeypatch.setattr(settings, 'INFERENCE_BACKEND', backend)
+
+    assert get_model_variant("bert-base-uncased") == variant
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, 'INFERENCE_BACKEND', "tensorrt")
+
+    with pytest.raises(ValueError, match="tensorrt"):
+        get_inference_backend()
+
+
+def test_artifact_dir_is_a_single_safe_directory(monkeypatch):
+    monkeypatch.setattr(settings, 'ONNX_MODEL_DIR', "models")
+
+    assert get_artifact_dir("sentence-transformers/all-MiniLM-L6-v2") == os.path.join(
+        "models", "sentence-transformers__all-MiniLM-L6-v2"
+    )
+
+
+def test_pooling_skips_padding():
+    hidden = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    assert _pool(hidden, mask, "mean").tolist() == [[2.0, 2.0]]
+    assert _pool(hidden, mask, "cls").tolist() == [[1.0, 1.0]]
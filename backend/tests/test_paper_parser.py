@@ -0,0 +1,166 @@
+import random
+import re
+
+from app.services.paper_parser import (
+    StreamingPaperParser, iter_paper_items, iter_student_sections, parse_paper, parse_questions_and_answers,
+    parse_student_paper
+)
+
+
+def baseline_parse(text):
+    """parse_questions_and_answers as it was before the single-pattern streaming parser"""
+    if not text or not text.strip():
+        return []
+
+    items = []
+    current_item = None
+    current_content = []
+    number_pattern = re.compile(r'^(\d+)[\.\)]\s*(.+)$', re.IGNORECASE)
+    q_pattern = re.compile(r'^[Qq](\d+)[\.\)]\s*(.+)$', re.IGNORECASE)
+    question_pattern = re.compile(r'^[Qq]uestion\s+(\d+)[:\-\.]\s*(.+)$', re.IGNORECASE)
+
+    for line in text.split('\n'):
+        line = line.strip()
+        match = None
+        for pattern in [number_pattern, q_pattern, question_pattern]:
+            match = pattern.match(line)
+            if match:
+                number = int(match.group(1))
+                content_start = match.group(2).strip()
+                break
+
+        if match:
+            if current_item:
+                current_item['content'] = '\n'.join(current_content).strip()
+                if current_item['content']:
+                    items.append(current_item)
+            current_item = {'number': number, 'content': content_start}
+            current_content = [content_start] if content_start else []
+        elif current_item:
+            if line or current_content:
+                current_content.append(line)
+
+    if current_item:
+        current_item['content'] = '\n'.join(current_content).strip()
+        if current_item['content']:
+            items.append(current_item)
+    return items
+
+
+LINES = [
+    "1. Explain photosynthesis.", "2) What is an operating system?", "Q3. State Newton's law.",
+    "q4) Define force.", "Question 5: Describe osmosis.", "QUESTION 6- Name a gas.", "question 7. Why?",
+    "12. A two-digit number", "1.", "Q.", "Question 8 no separator", "1.5 is a decimal", "Q1 without dot",
+    "   indented continuation", "continuation text", "", "   ", "\t", "Qx. not numbered", "10)closing paren",
+    "Question  9 :   spaced", "1. ", "  3)  leading spaces  ",
+]
+
+
+def random_text(rng):
+    return "\n".join(rng.choice(LINES) for _ in range(rng.randint(0, 40)))
+
+
+def chunked(text, rng):
+    parser = StreamingPaperParser()
+    items = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 20)
+        items.extend(parser.feed(text[position:position + size]))
+        position += size
+    return items + parser.close()
+
+
+def test_parse_matches_baseline():
+    rng = random.Random(7)
+    texts = [
+        "",
+        "no numbering at all",
+        "1. First question\nwith a second line\n\n2) Second\nQ3. Third\nQuestion 4: Fourth",
+        "\n\n1. answer with trailing blank lines\n\n\n",
+        "intro line\n1. after an intro\n2.\n3) kept\n\n\nmore",
+    ] + [random_text(rng) for _ in range(500)]
+
+    for text in texts:
+        expected = baseline_parse(text)
+        assert parse_questions_and_answers(text) == expected
+        assert list(iter_paper_items(text)) == expected
+        assert list(iter_paper_items(iter(text.split('\n')))) == expected
+        assert chunked(text, rng) == expected
+
+
+def test_multi_line_header_is_one_section():
+    text = "Name: Alice\nRoll No: 12\n1. plants make food\nName: Bob\n\nRoll No: 13\n1. force\n2. mass"
+
+    sheets = list(iter_student_sections(text))
+
+    assert [sheet['header'] for sheet in sheets] == ["Name: Alice | Roll No: 12", "Name: Bob | Roll No: 13"]
+    assert [sheet['items'] for sheet in sheets] == [
+        [{'number': 1, 'content': "plants make food"}],
+        [{'number': 1, 'content': "force"}, {'number': 2, 'content': "mass"}],
+    ]
+
+
+def test_sections_match_parsing_each_sheet():
+    sheets = [
+        "1. plants make food\nfrom sunlight\n2) chlorophyll",
+        "Q1. force is mass times acceleration\n\nQuestion 2: inertia",
+        "1. osmosis",
+    ]
+    text = "\n".join(f"Roll No: {i}\n{sheet}" for i, sheet in enumerate(sheets))
+
+    sections = list(iter_student_sections(text))
+
+    assert [section['header'] for section in sections] == [f"Roll No: {i}" for i in range(len(sheets))]
+    assert [section['items'] for section in sections] == [baseline_parse(sheet) for sheet in sheets]
+
+
+QUESTIONS = "1. What is photosynthesis?\n2. Define force.\n3. What is osmosis?"
+MODEL_ANSWERS = "1. Plants make food from sunlight.\n2. Mass times acceleration.\n3. Water moving through a membrane."
+STUDENT_ANSWERS = "1. Plants use sunlight to make food.\n3. Movement of water."
+
+
+def test_parsed_paper_hashes_items_and_carries_ocr_metadata():
+    paper = parse_paper(QUESTIONS, MODEL_ANSWERS, STUDENT_ANSWERS, ocr_quality_score=82.5)
+
+    assert [item['question_no'] for item in paper.items] == [1, 2, 3]
+    assert [item['has_student_answer'] for item in paper.items] == [True, False, True]
+    assert all(item['is_ocr_extracted'] and item['ocr_quality_score'] == 82.5 for item in paper.items)
+
+    other = parse_paper(QUESTIONS, MODEL_ANSWERS, STUDENT_ANSWERS.replace("Movement of water.", "Diffusion."))
+    changed = [a['content_hash'] != b['content_hash'] for a, b in zip(paper.items, other.items)]
+    assert changed == [False, False, True]
+    assert other.content_hash != paper.content_hash
+    assert all('is_ocr_extracted' not in item for item in other.items)
+
+    paper.set_ocr_metadata(None)
+    assert all('ocr_quality_score' not in item for item in paper.items)
+
+
+def test_student_paper_against_parsed_key_matches_full_parse():
+    questions = parse_questions_and_answers(QUESTIONS)
+    model_answers = parse_questions_and_answers(MODEL_ANSWERS)
+
+    paper = parse_student_paper(questions, model_answers, STUDENT_ANSWERS)
+
+    expected = parse_paper(QUESTIONS, MODEL_ANSWERS, STUDENT_ANSWERS)
+    assert paper.items == expected.items
+    assert paper.content_hash == expected.content_hash
+
+
+def test_evaluate_full_paper_does_not_parse_a_parsed_paper(deterministic_models, monkeypatch):
+    from app.services import full_paper_evaluator
+
+    expected = full_paper_evaluator.evaluate_full_paper(
+        QUESTIONS, MODEL_ANSWERS, STUDENT_ANSWERS, 5, 0.5, 0.5, parallel_workers=0
+    )
+    paper = parse_paper(QUESTIONS, MODEL_ANSWERS, STUDENT_ANSWERS)
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(full_paper_evaluator, 'parse_paper', no_parsing)
+    monkeypatch.setattr(full_paper_evaluator, 'parse_questions_and_answers', no_parsing)
+    result = full_paper_evaluator.evaluate_full_paper(None, None, None, 5, 0.5, 0.5, parallel_workers=0, paper=paper)
+
+    assert result == expected
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.similarity_service import (
+    calculate_cosine_similarity, calculate_pairwise_similarities, calculate_similarity_matrix
+)
+
+REFERENCES = ["plants make glucose from sunlight", "force equals mass times acceleration", "water boils at 100 degrees"]
+CANDIDATES = ["plants use sunlight", "mass times acceleration", ""]
+
+
+def test_pairwise_similarities_are_one_forward_pass(deterministic_models):
+    scores = calculate_pairwise_similarities(REFERENCES, CANDIDATES)
+
+    assert len(deterministic_models.embedding_calls) == 1
+    expected = [calculate_cosine_similarity(r, c) if c else 0.0 for r, c in zip(REFERENCES, CANDIDATES)]
+    assert scores == pytest.approx(expected)
+    assert scores[2] == 0.0
+
+
+def test_similarity_matrix_scores_every_candidate_against_every_reference(deterministic_models):
+    matrix = calculate_similarity_matrix(REFERENCES, CANDIDATES[:2])
+
+    assert matrix.shape == (2, 3)
+    assert len(deterministic_models.embedding_calls) == 1
+    for i, candidate in enumerate(CANDIDATES[:2]):
+        for j, reference in enumerate(REFERENCES):
+            assert matrix[i, j] == pytest.approx(calculate_cosine_similarity(reference, candidate))
+    assert matrix[0].argmax() == 0 and matrix[1].argmax() == 1
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        calculate_pairwise_similarities(REFERENCES, CANDIDATES[:1])